@@ -1,53 +1,505 @@
 import pandas as pd
+import io
 import os
 import re
+import sys
+import time
+import warnings
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
 from datetime import datetime
+from itertools import islice
 
-# Function to get all PartsLog CSV files from the selected folder path
 from pandas import Timestamp  # Import Timestamp
+from schema import PARTS_LOG_DTYPES, COUNTER_COLUMNS, CHART_COLUMNS, apply_schema, concat_frames
+from instrumentation import stage
+
+# Folder of the .exe when frozen, otherwise of the source files; FolderAddress.txt and the cache live here
+def get_base_path():
+    if getattr(sys, 'frozen', False):
+        return os.path.dirname(sys.executable)
+    return os.path.dirname(__file__)
+
+def read_folders_from_file(file_path="FolderAddress.txt"):
+    folder_info = []
+    full_path = os.path.join(get_base_path(), file_path)
+    try:
+        with open(full_path, 'r') as file:
+            for line in file:
+                line = line.strip()
+                if line and ' ' in line:
+                    address, machine_name = line.rsplit(' ', 1)
+                    folder_info.append((address, machine_name))
+                else:
+                    print(f"Skipping invalid line in {file_path}: '{line}'")
+        return folder_info
+    except FileNotFoundError:
+        print(f"Error: {full_path} not found.")
+        return []
 
-def get_csv_files(folder_info, start_date=None, end_date=None):
+# Function to get all PartsLog CSV files from the selected folder path
+def get_csv_files(folder_info, start_date=None, end_date=None, timings=None):
     csv_files = []
-    for folder_path, machine_name in folder_info:  # Unpacking tuples
-        for root, dirs, files in os.walk(folder_path):
-            for file in files:
-                if file.startswith('PartsLog_') and file.endswith('.csv'):
-                    file_date_str = file.split('_')[-1][:8]  # Extract the date
-                    try:
-                        file_date = Timestamp(datetime.strptime(file_date_str, '%Y%m%d').date())  # Convert to Timestamp
-                        # Check if the file date is within the selected range
-                        if (start_date is None or file_date >= start_date) and (end_date is None or file_date <= end_date):
-                            csv_files.append((os.path.join(root, file), machine_name))  # Append both file path and machine name
-                    except ValueError:
-                        print(f"Skipping file with unexpected date format: {file}")
+    with stage(timings, 'scan') as counts:
+        for folder_path, machine_name in folder_info:  # Unpacking tuples
+            for root, dirs, files in os.walk(folder_path):
+                for file in files:
+                    if file.startswith('PartsLog_') and file.endswith('.csv'):
+                        file_date_str = file.split('_')[-1][:8]  # Extract the date
+                        try:
+                            file_date = Timestamp(datetime.strptime(file_date_str, '%Y%m%d').date())  # Convert to Timestamp
+                            # Check if the file date is within the selected range
+                            if (start_date is None or file_date >= start_date) and (end_date is None or file_date <= end_date):
+                                csv_files.append((os.path.join(root, file), machine_name))  # Append both file path and machine name
+                        except ValueError:
+                            print(f"Skipping file with unexpected date format: {file}")
+        counts['files'] = len(csv_files)
     return csv_files
 
+# Dates that have PartsLog files; a FileCatalog answers from its index after re-listing changed directories
+def get_available_dates(folder_paths, catalog=None, timings=None):
+    with stage(timings, 'scan'):
+        if catalog is not None:
+            catalog.refresh(folder_paths)
+            return catalog.available_dates()
+
+        available_dates = set()
+        for folder, _ in folder_paths:
+            for root, _, files in os.walk(folder):
+                for file in files:
+                    if file.startswith("PartsLog_") and file.endswith(".csv"):
+                        file_date_str = file.split('_')[-1][:8]
+                        try:
+                            file_date = datetime.strptime(file_date_str, '%Y%m%d').date()
+                            available_dates.add(file_date)
+                        except ValueError:
+                            print(f"Skipping file with unexpected date format: {file}")
+        return sorted(available_dates)
+
+
+
+# Columns added by read_parts_log, always kept regardless of usecols
+ADDED_COLUMNS = ['Machine Name', 'Program Name', 'File Name', 'Date']
+
+# Rows per chunk when a file is streamed instead of parsed whole (see rollup.stream_rollups)
+STREAM_CHUNK_ROWS = 200_000
+
+# A file not modified for this long is read to its end; younger files only up to their last complete line
+SETTLED_SECONDS = 10 * 60
+
+# Worker processes only pay off for enough data: starting them and sending the frames back costs more
+# than parsing small files here (measure with benchmark_workers). With workers > 1, files smaller than
+# PARALLEL_MIN_FILE_BYTES are still parsed in this process, and the pool is started once the larger ones
+# add up to PARALLEL_MIN_BYTES, so small loads stay serial.
+PARALLEL_MIN_FILE_BYTES = 1024 ** 2  # 1 MB
+PARALLEL_MIN_BYTES = 64 * 1024 ** 2  # 64 MB
+
+def _pool_bytes(file, offset=0, min_file_bytes=None):
+    # Bytes a worker would parse from `file`, or 0 when it is cheaper to parse it here
+    # (smaller than min_file_bytes, PARALLEL_MIN_FILE_BYTES by default)
+    if min_file_bytes is None:
+        min_file_bytes = PARALLEL_MIN_FILE_BYTES
+    try:
+        size = os.path.getsize(file) - offset
+    except OSError:
+        return 0  # Parsed here, which reports the error
+    return size if size >= max(min_file_bytes, 1) else 0
+
+def _add_timing(timings, key, value):
+    if timings is not None:
+        timings[key] = timings.get(key, 0) + value
+
+def format_timings(timings):
+    stages = ', '.join(f"{key} {timings[key]:.2f}s" for key in ('cache_read', 'parse', 'cache_write', 'concat', 'total') if key in timings)
+    issues = ''.join(f", {timings[key]} {label}" for key, label in (('bad_line_files', 'with skipped lines'),
+                                                                     ('partial_files', 'still being written'),
+                                                                     ('quarantined_files', 'quarantined'))
+                     if timings.get(key))
+    return (f"Loaded {timings.get('files', 0)} files ({timings.get('cached_files', 0)} from cache, "
+            f"{timings.get('fallback_files', 0)} via Python engine{issues}), {timings.get('rows', 0)} rows: {stages}")
+
+# Drops the lines right after the header that have more fields than it. Further down both parsers skip such
+# lines, but the extra fields of a first data line are taken for an index, which shifts every column (the
+# Python engine does the same) so that no row survives. Returns (data, lines dropped).
+def _drop_leading_long_lines(data, names=None):
+    start = 0
+    if names is None:
+        for _ in range(3):  # Two preamble lines and the header
+            header_start, newline = start, data.find(b'\n', start)
+            if newline < 0:
+                return data, 0
+            start = newline + 1
+        max_separators = data[header_start:start].count(b',')
+    else:
+        max_separators = len(names) - 1
+
+    kept, dropped, position = [data[:start]], 0, start
+    while position < len(data):
+        end = data.find(b'\n', position)
+        end = len(data) if end < 0 else end + 1
+        line = data[position:end]
+        if line.strip():
+            if line.count(b',') <= max_separators:
+                break
+            dropped += 1
+        else:
+            kept.append(line)
+        position = end
+    if not dropped:
+        return data, 0
+    return b''.join(kept) + data[position:], dropped
+
+# names: column names for data without the preamble and header lines (the rest of a growing file).
+# outcome (a dict, see _parse_file) counts the lines that were skipped and records the engine used.
+def _read_csv(file, usecols=None, timings=None, names=None, outcome=None):
+    column_filter = (lambda col: col in usecols) if usecols is not None else None
+    header_args = {'skiprows': 2} if names is None else {'header': None, 'names': names}
+    if isinstance(file, io.BytesIO):
+        data = file.getvalue()
+    else:
+        with open(file, 'rb') as f:
+            data = f.read()
+    data, dropped = _drop_leading_long_lines(data, names)
+    _count_bad_lines(outcome, dropped)
+    file = io.BytesIO(data)
+    try:
+        # Fast path: C parser with the known schema. Skipped lines are reported as one ParserWarning per block.
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter('always', pd.errors.ParserWarning)
+            df = pd.read_csv(file, delimiter=',', on_bad_lines='warn', engine='c',
+                             dtype=PARTS_LOG_DTYPES, usecols=column_filter, **header_args)
+        _count_bad_lines(outcome, _skipped_lines(caught))
+        return df
+    except (pd.errors.ParserError, ValueError):
+        # Malformed file or values that do not fit the schema: let the Python engine infer types.
+        # usecols is applied afterwards because read_csv stops skipping over-long lines when usecols is set.
+        _add_timing(timings, 'fallback_files', 1)
+        if outcome is not None:
+            outcome['engine'] = 'python'
+        file.seek(0)
+        bad_lines = []
+        df = pd.read_csv(file, delimiter=',', on_bad_lines=bad_lines.append, engine='python', **header_args)
+        df, unparsable = _coerce_counters(df[[col for col in df.columns if column_filter(col)]] if column_filter else df)
+        _count_bad_lines(outcome, len(bad_lines) + unparsable)
+        return df
+
+def _skipped_lines(caught):
+    # Lines the C parser skipped, from the ParserWarnings recorded by warnings.catch_warnings
+    return sum(str(warning.message).count('Skipping line') for warning in caught
+               if issubclass(warning.category, pd.errors.ParserWarning))
+
+def _count_bad_lines(outcome, count):
+    if outcome is not None:
+        outcome['bad_lines'] = outcome.get('bad_lines', 0) + count
+
+# Rows whose counters are not numbers are dropped, so a Python-engine frame has the same types as a
+# C-engine one (and can be cached instead of being parsed again next time). Returns (frame, rows dropped).
+def _coerce_counters(df):
+    counters = [col for col in COUNTER_COLUMNS if col in df.columns]
+    if not counters:
+        return df, 0
+    numeric = df[counters].apply(pd.to_numeric, errors='coerce')
+    valid = numeric.notna().all(axis=1)
+    df = df.assign(**{col: numeric[col] for col in counters})[valid]
+    df = df.astype({col: 'int64' for col in counters})
+    if 'Parts Name' in df.columns:
+        df['Parts Name'] = df['Parts Name'].astype(str)
+    return df, int((~valid).sum())
 
+def _select_columns(df, usecols):
+    if usecols is None:
+        return df
+    return df[[col for col in df.columns if col in usecols or col in ADDED_COLUMNS]]
 
+# What merge_and_clean returns when no file had rows (all empty or quarantined): no rows, but the columns a
+# parsed file has, so callers can still filter and group on them
+def _empty_frame(usecols=None):
+    columns = {'Program Name': pd.Series(dtype=object)}
+    columns.update({col: pd.Series(dtype=PARTS_LOG_DTYPES[col]) for col in CHART_COLUMNS
+                    if usecols is None or col in usecols})
+    columns.update({'Machine Name': pd.Series(dtype=object), 'File Name': pd.Series(dtype=object),
+                    'Date': pd.Series(dtype='datetime64[ns]')})
+    return pd.DataFrame(columns)
+
+def _program_name(file_name):
+    match = re.search(r"PartsLog_(.+?)_\d{14}\.csv", file_name)
+    return match.group(1) if match else "Unknown"
+
+def _add_file_columns(df, file_name, machine_name, program_name):
+    df['Machine Name'] = machine_name  # Use machine name from .txt file
+    df['Program Name'] = program_name
+    df['File Name'] = file_name
+
+    if 'Parts Name' in df.columns:
+        columns = df.columns.tolist()
+        columns.insert(columns.index('Parts Name'), columns.pop(columns.index('Program Name')))
+        df = df[columns].copy()
+
+    df['Date'] = pd.to_datetime(file_name.split('_')[-1][:8], format='%Y%m%d')
+    return df
+
+# Function to parse a single PartsLog CSV file and attach Machine/Program/File Name and Date
+def read_parts_log(file, machine_name, usecols=None, timings=None, outcome=None):
+    file_name = os.path.basename(file)
+    df = _read_csv(file, usecols, timings, outcome=outcome)
+    return _add_file_columns(df, file_name, machine_name, _program_name(file_name))
+
+def _header_columns(file):
+    with open(file, 'r', newline='') as f:
+        header = [f.readline() for _ in range(3)][-1]
+    return header.rstrip('\r\n').split(',')
+
+# Rows of a file that may still be written to, from byte `offset` (a line start) up to its last complete
+# line. Returns (frame or None, offset after the last complete line, CSV column names); pass the offset and
+# column names back in to continue where the previous call stopped. complete=True also reads a last line
+# without a newline (the file is finished). outcome['truncated'] tells whether bytes were left unread.
+def read_parts_log_from(file, machine_name, offset=0, columns=None, timings=None, usecols=None, outcome=None,
+                        complete=False):
+    with open(file, 'rb') as f:
+        f.seek(offset)
+        data = f.read()
+    end = len(data) if complete else data.rfind(b'\n') + 1
+    if outcome is not None:
+        outcome['truncated'] = end < len(data)
+    if end == 0:
+        return None, offset, columns  # Nothing complete yet
+
+    try:
+        if offset == 0:
+            df = _read_csv(io.BytesIO(data[:end]), usecols, timings, outcome=outcome)
+            columns = _header_columns(file) if usecols is not None else [str(col) for col in df.columns]
+        else:
+            if columns is None:
+                columns = _header_columns(file)
+            df = _read_csv(io.BytesIO(data[:end]), usecols, timings, names=columns, outcome=outcome)
+    except pd.errors.EmptyDataError:
+        return None, offset, columns  # Only the preamble so far
+    file_name = os.path.basename(file)
+    return _add_file_columns(df, file_name, machine_name, _program_name(file_name)), offset + end, columns
+
+# Reads a PartsLog file `chunksize` lines at a time, yielding frames shaped like read_parts_log's
+# (64-bit counters, so chunk sums cannot overflow). Each chunk is parsed like a whole file by
+# _read_csv (C engine, Python fallback for that chunk). Lines with more fields than the header are dropped
+# first: the parser only skips them in the middle of its input and takes a first line's extra fields for
+# an index, which would shift every column of a chunk starting with one.
+# complete=False stops at the last complete line (a file still being written, see read_parts_log_from);
+# outcome counts skipped lines and unparsable counters like _read_csv's, records truncation and holds the
+# header's column names under 'columns' once the first chunk is read.
+def iter_parts_log(file, machine_name, usecols=None, chunksize=STREAM_CHUNK_ROWS, complete=True, outcome=None):
+    file_name = os.path.basename(file)
+    program_name = _program_name(file_name)
+    with open(file, 'rb') as f:
+        header = [f.readline() for _ in range(3)][-1]
+        if not header.strip():
+            raise pd.errors.EmptyDataError("No columns to parse from file")
+        columns = header.decode('utf-8', errors='replace').rstrip('\r\n').split(',')
+        if outcome is not None:
+            outcome['columns'] = columns
+        max_separators = len(columns) - 1
+        while True:
+            lines = list(islice(f, chunksize))
+            if not lines:
+                return
+            if not complete and not lines[-1].endswith(b'\n'):
+                lines.pop()  # Still being written
+                if outcome is not None:
+                    outcome['truncated'] = True
+            kept = [line for line in lines if line.count(b',') <= max_separators]
+            _count_bad_lines(outcome, len(lines) - len(kept))
+            if not any(line.strip() for line in kept):
+                continue
+            df = _read_csv(io.BytesIO(b''.join(kept)), usecols, names=columns, outcome=outcome)
+            yield _add_file_columns(df, file_name, machine_name, program_name)
+
+class LoadCancelled(Exception):
+    pass
+
+# Parses one file (from byte `offset` on when resuming a file that was still being written); runs inside a
+# worker process when merge_and_clean is given workers > 1. Returns (frame or None, timings, outcome) where
+# outcome holds what the parse ran into: bad_lines, engine, complete (the file has settled and was read to
+# its end; otherwise offset/columns say where to resume), truncated (a last line still being written was left
+# for later), header_mismatch, empty (no rows after the preamble), error, and quarantine when the file cannot be
+# used until it changes.
+def _parse_file(file, machine_name, usecols=None, offset=0, columns=None):
+    timings = {}
+    outcome = {'bad_lines': 0, 'engine': 'c', 'truncated': False, 'header_mismatch': False, 'error': None,
+               'quarantine': False, 'complete': False, 'offset': offset, 'columns': columns}
+    started = time.perf_counter()
+    try:
+        # A file nobody wrote to for a while is finished, even if its last line has no newline
+        complete = outcome['complete'] = time.time() - os.path.getmtime(file) >= SETTLED_SECONDS
+        if complete and offset == 0:
+            df = read_parts_log(file, machine_name, usecols, timings, outcome)
+        else:
+            df, outcome['offset'], outcome['columns'] = read_parts_log_from(
+                file, machine_name, offset, columns, timings, usecols, outcome, complete)
+        missing = [col for col in CHART_COLUMNS
+                   if df is not None and (usecols is None or col in usecols) and col not in df.columns]
+        if missing:
+            outcome.update(header_mismatch=True, quarantine=True, error=f"Missing columns: {', '.join(missing)}")
+            print(f"Error reading {file}: {outcome['error']}")
+            df = None
+    except pd.errors.EmptyDataError:
+        # Nothing after the preamble (or not even that): no rows, reported as empty
+        outcome['empty'] = True
+        df = None
+    except (pd.errors.ParserError, UnicodeDecodeError) as e:
+        print(f"Error reading {file}: {e}")
+        outcome.update(error=str(e), quarantine=True)
+        df = None
+    except OSError as e:
+        # e.g. a share that went away; tried again next time
+        print(f"Error reading {file}: {e}")
+        outcome['error'] = str(e)
+        df = None
+    _add_timing(timings, 'parse', time.perf_counter() - started)
+    return df, timings, outcome
 
 # Function to merge and clean data from all CSV files
-def merge_and_clean(file_paths):
-    combined_df = pd.DataFrame()
-    
-    for file, machine_name in file_paths:
-        try:
-            match = re.search(r"PartsLog_(.+?)_\d{14}\.csv", os.path.basename(file))
-            program_name = match.group(1) if match else "Unknown"
-
-            df = pd.read_csv(file, delimiter=',', skiprows=2, on_bad_lines='skip', engine='python')
-            
-            df['Machine Name'] = machine_name  # Use machine name from .txt file
-            df['Program Name'] = program_name
-            df['File Name'] = os.path.basename(file)
-
-            if 'Parts Name' in df.columns:
-                columns = df.columns.tolist()
-                columns.insert(columns.index('Parts Name'), columns.pop(columns.index('Program Name')))
-                df = df[columns]
-
-            combined_df = pd.concat([combined_df, df], ignore_index=True)
-        except pd.errors.ParserError as e:
-            print(f"Error reading {file}: {e}")
-    
+# If a ParseCache is given, unchanged files are loaded from it instead of being parsed again, files the
+# cache quarantined (unparsable or with the wrong header) are skipped until they change, and files cached
+# while still being written are continued from where the last parse stopped.
+# usecols limits the CSV columns kept, for cached files as well (the cache holds every column and the
+# projection is applied when a frame is taken from it); timings (a dict) collects per-stage seconds and counters.
+# With workers > 1, large cache misses are parsed in a process pool once there is enough to parse
+# (see PARALLEL_MIN_BYTES); rows keep the order of file_paths. force_pool=True sends every cache miss to the
+# pool whatever its size (for benchmark_workers); timings['pool_files'] counts the files the pool parsed.
+# progress(files_done, files_total, rows_done) is called after each file; setting cancel_event
+# stops the load between files with LoadCancelled.
+def merge_and_clean(file_paths, cache=None, usecols=None, timings=None, workers=1, progress=None, cancel_event=None,
+                    force_pool=False):
+    frames = []
+    files_total = len(file_paths)
+    counts = {'files_done': 0, 'rows_done': 0}
+    total_started = time.perf_counter()
+    # Cache the full file so later calls with other usecols can reuse it; usecols is applied in finish_oldest
+    parse_usecols = None if cache is not None else usecols
+    max_in_flight = max(1, workers) * 2
+    executor = None
+    pool_bytes = 0
+    # (file, machine_name, cached frame / Future / None for a quarantined file, frame parsed so far when resuming),
+    # in file_paths order
+    pending = deque()
+
+    def finish_oldest():
+        file, machine_name, result, head = pending.popleft()
+        if isinstance(result, Future):
+            df, parse_timings, outcome = result.result()
+            for key, value in parse_timings.items():
+                _add_timing(timings, key, value)
+            if head is not None:
+                df = head if df is None else concat_frames([head, df])
+            if outcome['bad_lines']:
+                _add_timing(timings, 'bad_line_files', 1)
+            if outcome['truncated']:
+                _add_timing(timings, 'partial_files', 1)
+            if outcome['quarantine']:
+                _add_timing(timings, 'quarantined_files', 1)
+            if cache is not None:
+                outcome['rows'] = len(df) if df is not None else 0
+                cache.record_outcome(file, machine_name, outcome, resumed=head is not None)
+            if df is not None and cache is not None and outcome['error'] is None:
+                started = time.perf_counter()
+                if not outcome['complete']:
+                    # Still being written: the next load parses only what is appended after the offset
+                    cache.put(file, machine_name, df, outcome['offset'], outcome['columns'])
+                else:
+                    cache.put(file, machine_name, df)
+                _add_timing(timings, 'cache_write', time.perf_counter() - started)
+        elif result is None:
+            df = None
+            _add_timing(timings, 'quarantined_files', 1)
+        else:
+            df = result
+            _add_timing(timings, 'cached_files', 1)
+        if df is not None:
+            frames.append(_select_columns(df, usecols))
+            _add_timing(timings, 'files', 1)
+            counts['rows_done'] += len(df)
+        counts['files_done'] += 1
+        if progress is not None:
+            progress(counts['files_done'], files_total, counts['rows_done'])
+
+    def submit(file, machine_name, offset=0, columns=None):
+        nonlocal executor, pool_bytes
+        if workers > 1:
+            size = _pool_bytes(file, offset, 0 if force_pool else None)
+            pool_bytes += size
+            if size and (force_pool or pool_bytes >= PARALLEL_MIN_BYTES):
+                if executor is None:
+                    # Only start worker processes once there is enough to parse
+                    executor = ProcessPoolExecutor(max_workers=workers)
+                _add_timing(timings, 'pool_files', 1)
+                return executor.submit(_parse_file, file, machine_name, parse_usecols, offset, columns)
+        future = Future()
+        future.set_result(_parse_file(file, machine_name, parse_usecols, offset, columns))
+        return future
+
+    try:
+        for file, machine_name in file_paths:
+            if cancel_event is not None and cancel_event.is_set():
+                raise LoadCancelled()
+            if cache is not None and cache.is_quarantined(file, machine_name):
+                pending.append((file, machine_name, None, None))
+            else:
+                started = time.perf_counter()
+                resume = cache.resume(file, machine_name) if cache is not None else None
+                df = cache.get(file, machine_name) if cache is not None and resume is None else None
+                _add_timing(timings, 'cache_read', time.perf_counter() - started)
+
+                if resume is not None:
+                    head, offset, columns = resume
+                    pending.append((file, machine_name, submit(file, machine_name, offset, columns), head))
+                elif df is not None:
+                    pending.append((file, machine_name, df, None))
+                else:
+                    pending.append((file, machine_name, submit(file, machine_name), None))
+
+            # Bound the work in flight so memory stays flat however many files are selected
+            while len(pending) >= max_in_flight:
+                finish_oldest()
+
+        while pending:
+            if cancel_event is not None and cancel_event.is_set():
+                raise LoadCancelled()
+            finish_oldest()
+    finally:
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+        # Keep whatever was parsed before a cancel for the next run
+        if cache is not None:
+            cache.save()
+
+    # Concatenate once instead of growing the frame file by file, then compact the result in one pass
+    started = time.perf_counter()
+    combined_df = apply_schema(concat_frames(frames) if frames else _empty_frame(usecols))
+    _add_timing(timings, 'concat', time.perf_counter() - started)
+    _add_timing(timings, 'rows', len(combined_df))
+    _add_timing(timings, 'total', time.perf_counter() - total_started)
+
     return combined_df
 
+# Throughput of merge_and_clean (no cache) for several worker counts, e.g. to size INGEST_WORKERS or
+# PARALLEL_MIN_BYTES. Below PARALLEL_MIN_BYTES every count parses serially and times the same, unless
+# force_pool=True sends every file to the pool; runs where the pool parsed nothing are marked as serial.
+def benchmark_workers(file_paths, worker_counts=None, usecols=None, force_pool=False):
+    if worker_counts is None:
+        cpu_count = os.cpu_count() or 1
+        worker_counts = sorted({count for count in (1, 2, 4, cpu_count) if count <= cpu_count})
+
+    results = []
+    for workers in worker_counts:
+        timings = {}
+        merge_and_clean(file_paths, usecols=usecols, timings=timings, workers=workers, force_pool=force_pool)
+        seconds = timings['total']
+        results.append({
+            'workers': workers,
+            'seconds': seconds,
+            'files_per_s': timings.get('files', 0) / seconds if seconds else 0,
+            'rows_per_s': timings.get('rows', 0) / seconds if seconds else 0,
+            'pool_files': timings.get('pool_files', 0),
+        })
+        serial = " (pool not used: below PARALLEL_MIN_BYTES)" if workers > 1 and not timings.get('pool_files') else ""
+        print(f"{workers:>3} workers: {seconds:7.2f}s, {results[-1]['files_per_s']:8.1f} files/s, "
+              f"{results[-1]['rows_per_s']:10.0f} rows/s{serial}")
+    return results
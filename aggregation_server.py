@@ -0,0 +1,278 @@
+# aggregation_server.py
+# Optional shared server: one process owns the file catalog, the parse cache and the rollups and
+# answers aggregated queries over HTTP, so the shares are read and the CSVs parsed once for the whole
+# team instead of once per analyzer. Set PARTLOG_SERVER=http://<host>:8765 and the GUI becomes a
+# thin client of it (see AggregationClient).
+#
+#   python aggregation_server.py --port 8765
+#   curl "http://localhost:8765/top?start=2025-03-01&end=2025-03-07&machine=NXT0*"
+#
+# Endpoints (GET, JSON; dates as YYYY-MM-DD, machine/program take the same filters as the GUI):
+#   /dates                                   available days
+#   /rollup?start&end[&machine&program&part] rollup rows (see rollup.py) passing the filters
+#   /top?start&end[&machine&program&n]       worst Parts Name / Machine Name pairs
+#   /programs?start&end&part&machine[&program]  errors by Program Name of one pair
+#   /daily?start&end&part[&machine&program]  daily pickup rate of one part, by machine and per day
+#   /health                                  share status, cache counters and files by ingest status
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from datetime import date
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.error import HTTPError
+from urllib.parse import parse_qs, urlencode, urlparse
+from urllib.request import urlopen
+
+import pandas as pd
+
+DEFAULT_PORT = 8765
+# The catalog is brought up to date at most this often, however many clients ask
+REFRESH_SECONDS = 30
+CLIENT_TIMEOUT = 300  # Seconds a client waits for an answer (a first query may parse many files)
+
+
+def _frame_to_json(frame):
+    return json.loads(frame.to_json(orient='split', index=False, date_format='iso', date_unit='s'))
+
+
+def _frame_from_json(payload):
+    frame = pd.DataFrame(payload['data'], columns=payload['columns'])
+    if 'Date' in frame.columns:
+        frame['Date'] = pd.to_datetime(frame['Date'])
+    return frame
+
+
+class AggregationService:
+    # The queries behind the HTTP endpoints; usable in-process as well (tests, local stand-in)
+    def __init__(self, folder_paths, cache_dir, workers=1, refresh_seconds=REFRESH_SECONDS):
+        from parse_cache import ParseCache
+        from file_catalog import FileCatalog
+        self.folder_paths = folder_paths
+        self.parse_cache = ParseCache(cache_dir)
+        self.catalog = FileCatalog(os.path.join(cache_dir, "catalog.json"))
+        self.workers = workers
+        self.refresh_seconds = refresh_seconds
+        self.refreshed_at = None
+        # The catalog and the parse cache are not thread-safe; requests take turns using them
+        self.lock = threading.Lock()
+
+    def _refresh(self):
+        if self.refreshed_at is None or time.monotonic() - self.refreshed_at >= self.refresh_seconds:
+            self.catalog.refresh(self.folder_paths)
+            self.refreshed_at = time.monotonic()
+
+    def warnings(self):
+        return self.catalog.share_warnings()
+
+    def dates(self):
+        with self.lock:
+            self._refresh()
+            return self.catalog.available_dates()
+
+    def rollup(self, start_date, end_date, machine=None, program=None, part=None):
+        from rollup import load_rollups, ROLLUP_KEYS, ROLLUP_COUNTERS
+        from query import parse_filter, select_files, filter_rows
+        machine_filter, program_filter = parse_filter(machine), parse_filter(program)
+        with self.lock:
+            self._refresh()
+            files = select_files(self.catalog, start_date, end_date, machine_filter, program_filter)
+            if not files:
+                return pd.DataFrame(columns=ROLLUP_KEYS + ROLLUP_COUNTERS + ['Rows'])
+            data = load_rollups(files, self.parse_cache, self.workers)
+        data = filter_rows(data, machine_filter, program_filter)
+        if part:
+            data = data[data['Parts Name'] == part]
+        return data
+
+    def top(self, start_date, end_date, machine=None, program=None, n=20):
+        from data_processing import get_top_10_worst_components
+        data = self.rollup(start_date, end_date, machine, program)
+        return get_top_10_worst_components(data).head(n) if not data.empty else pd.DataFrame()
+
+    def programs(self, start_date, end_date, part, machine, program=None):
+        from metrics import summarize
+        data = self.rollup(start_date, end_date, machine, program, part)
+        program_errors = summarize(data, ['Program Name'], consumed_only=True)
+        return program_errors.sort_values(by='Total Errors', ascending=False)
+
+    def daily(self, start_date, end_date, part, machine=None, program=None):
+        # (Pickup Errors per Date x Machine Name, per-Date sums and Pickup Rate), like metrics.daily_pickup
+        from metrics import daily_pickup
+        return daily_pickup(self.rollup(start_date, end_date, machine, program, part))
+
+    def health(self):
+        with self.lock:
+            ingest = {}
+            for record in self.parse_cache.ingest_outcomes(self.catalog):
+                ingest[record['status']] = ingest.get(record['status'], 0) + 1
+            return {'shares': self.catalog.share_status, 'files': len(self.catalog.order),
+                    'cache_hits': self.parse_cache.hits, 'cache_misses': self.parse_cache.misses,
+                    'ingest': ingest}
+
+
+def _date_param(params, name):
+    if name not in params:
+        raise ValueError(f"missing parameter '{name}'")
+    return pd.Timestamp(date.fromisoformat(params[name]))
+
+
+def _required(params, name):
+    if not params.get(name):
+        raise ValueError(f"missing parameter '{name}'")
+    return params[name]
+
+
+def _handle_daily(service, params):
+    by_machine, daily = service.daily(_date_param(params, 'start'), _date_param(params, 'end'),
+                                      _required(params, 'part'), params.get('machine'), params.get('program'))
+    # Machine names are the columns of by_machine; sent as rows so they keep their type
+    by_machine = by_machine.rename_axis(columns=None).reset_index()
+    return {'by_machine': _frame_to_json(by_machine), 'daily': _frame_to_json(daily)}
+
+
+ROUTES = {
+    '/dates': lambda service, params: {'dates': [day.isoformat() for day in service.dates()]},
+    '/rollup': lambda service, params: {'frame': _frame_to_json(service.rollup(
+        _date_param(params, 'start'), _date_param(params, 'end'),
+        params.get('machine'), params.get('program'), params.get('part')))},
+    '/top': lambda service, params: {'frame': _frame_to_json(service.top(
+        _date_param(params, 'start'), _date_param(params, 'end'),
+        params.get('machine'), params.get('program'), int(params.get('n', 20))))},
+    '/programs': lambda service, params: {'frame': _frame_to_json(service.programs(
+        _date_param(params, 'start'), _date_param(params, 'end'),
+        _required(params, 'part'), _required(params, 'machine'), params.get('program')))},
+    '/daily': _handle_daily,
+    '/health': lambda service, params: service.health(),
+}
+
+
+class AggregationRequestHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        url = urlparse(self.path)
+        params = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        route = ROUTES.get(url.path)
+        if route is None:
+            self._send(404, {'error': f"unknown endpoint {url.path}"})
+            return
+        try:
+            payload = route(self.server.service, params)
+        except ValueError as e:
+            self._send(400, {'error': str(e)})
+            return
+        except Exception as e:
+            self._send(500, {'error': str(e)})
+            return
+        payload['warnings'] = self.server.service.warnings()
+        self._send(200, payload)
+
+    def _send(self, code, payload):
+        body = json.dumps(payload, default=str).encode('utf-8')
+        self.send_response(code)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def start_server(service, host='127.0.0.1', port=DEFAULT_PORT):
+    # Serves `service` on a background thread and returns the server (port=0 picks a free port,
+    # see server.server_address); server.shutdown() stops it
+    server = ThreadingHTTPServer((host, port), AggregationRequestHandler)
+    server.daemon_threads = True
+    server.service = service
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+class AggregationClient:
+    # Same queries as AggregationService, answered by a server
+    def __init__(self, base_url, timeout=CLIENT_TIMEOUT):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self.last_warnings = []
+
+    def _get(self, path, **params):
+        params = {key: (value.strftime('%Y-%m-%d') if hasattr(value, 'strftime') else value)
+                  for key, value in params.items() if value not in (None, '')}
+        url = self.base_url + path + ('?' + urlencode(params) if params else '')
+        try:
+            with urlopen(url, timeout=self.timeout) as response:
+                payload = json.load(response)
+        except HTTPError as e:
+            try:
+                message = json.load(e).get('error', str(e))
+            except ValueError:
+                message = str(e)
+            raise RuntimeError(f"Aggregation server: {message}") from None
+        self.last_warnings = payload.pop('warnings', [])
+        return payload
+
+    def share_warnings(self):
+        # Warnings about the server's shares from the last answer (same as FileCatalog.share_warnings)
+        return self.last_warnings
+
+    def dates(self):
+        return [date.fromisoformat(day) for day in self._get('/dates')['dates']]
+
+    def rollup(self, start_date, end_date, machine=None, program=None, part=None):
+        # Rollup rows in the compact in-memory layout, ready for the charts and the drill-down index
+        from schema import apply_schema
+        return apply_schema(_frame_from_json(self._get('/rollup', start=start_date, end=end_date, machine=machine,
+                                          program=program, part=part)['frame']))
+
+    def top(self, start_date, end_date, machine=None, program=None, n=20):
+        return _frame_from_json(self._get('/top', start=start_date, end=end_date, machine=machine,
+                                          program=program, n=n)['frame'])
+
+    def programs(self, start_date, end_date, part, machine, program=None):
+        return _frame_from_json(self._get('/programs', start=start_date, end=end_date, part=part,
+                                          machine=machine, program=program)['frame'])
+
+    def daily(self, start_date, end_date, part, machine=None, program=None):
+        payload = self._get('/daily', start=start_date, end=end_date, part=part, machine=machine, program=program)
+        by_machine = _frame_from_json(payload['by_machine']).set_index('Date')
+        by_machine.columns.name = 'Machine Name'
+        return by_machine, _frame_from_json(payload['daily'])
+
+    def health(self):
+        return self._get('/health')
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Serve aggregated Part Log queries to analyzer clients over HTTP.")
+    parser.add_argument('--host', default='0.0.0.0', help="Interface to listen on (default: all)")
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT, help=f"Port (default {DEFAULT_PORT})")
+    parser.add_argument('--folders', default='FolderAddress.txt', help="Folder list, same format as the GUI uses")
+    parser.add_argument('--cache-dir', default=None, help="Parse cache and catalog (default PartLogCache next to the program)")
+    parser.add_argument('--workers', type=int, default=max(1, min(8, (os.cpu_count() or 1) - 1)),
+                        help="Processes used for parsing")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    from FileHandler import get_base_path, read_folders_from_file
+    args = parse_args(argv)
+    folder_paths = read_folders_from_file(os.path.abspath(args.folders) if os.path.exists(args.folders) else args.folders)
+    if not folder_paths:
+        return 1
+    service = AggregationService(folder_paths, args.cache_dir or os.path.join(get_base_path(), "PartLogCache"),
+                                 args.workers)
+    print(f"Scanning {len(folder_paths)} folders...")
+    print(f"{len(service.dates())} days of logs available")
+    for warning in service.warnings():
+        print(f"Warning: {warning}")
+    server = start_server(service, args.host, args.port)
+    print(f"Serving on http://{args.host}:{server.server_address[1]} (Ctrl+C to stop)")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
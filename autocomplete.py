@@ -0,0 +1,91 @@
+# autocomplete.py
+# As-you-type suggestions under an Entry. suggest(text) returns the values to offer (see
+# value_index.py); with multiple=True only the value after the last comma is completed, for the
+# comma-separated Machine/Program Name filters.
+from tkinter import Listbox, Toplevel, END
+
+MAX_VISIBLE = 10  # Rows of the drop-down list; longer lists scroll
+
+
+class Autocomplete:
+    def __init__(self, entry, variable, suggest, multiple=False):
+        self.entry = entry
+        self.variable = variable
+        self.suggest = suggest
+        self.multiple = multiple
+        self.popup = None
+        self.listbox = None
+
+        entry.bind('<KeyRelease>', self._on_key, add='+')
+        entry.bind('<Down>', self._focus_list, add='+')
+        entry.bind('<Escape>', lambda event: self.hide(), add='+')
+        entry.bind('<FocusOut>', lambda event: entry.after(150, self._hide_unless_focused), add='+')
+
+    def _split(self):
+        # (text before the value being typed, the value being typed)
+        text = self.variable.get()
+        if not self.multiple:
+            return '', text
+        head, separator, term = text.rpartition(',')
+        return (head + separator + ' ' if separator else ''), term
+
+    def _on_key(self, event):
+        if event.keysym in ('Down', 'Up', 'Return', 'Escape', 'Tab'):
+            return
+        if str(self.entry.cget('state')) == 'disabled':
+            return
+        term = self._split()[1].strip()
+        values = self.suggest(term) if term else []
+        if not values or values == [term]:
+            self.hide()
+            return
+        self._show(values)
+
+    def _show(self, values):
+        if self.popup is None:
+            self.popup = Toplevel(self.entry)
+            self.popup.overrideredirect(True)
+            self.listbox = Listbox(self.popup, exportselection=False, activestyle='dotbox')
+            self.listbox.pack(fill='both', expand=True)
+            self.listbox.bind('<ButtonRelease-1>', self._choose)
+            self.listbox.bind('<Return>', self._choose)
+            self.listbox.bind('<Escape>', lambda event: self.hide())
+            self.listbox.bind('<FocusOut>', lambda event: self.entry.after(150, self._hide_unless_focused))
+        self.listbox.delete(0, END)
+        self.listbox.insert(END, *values)
+        self.listbox.configure(height=min(len(values), MAX_VISIBLE), width=int(self.entry.cget('width')))
+        x = self.entry.winfo_rootx()
+        y = self.entry.winfo_rooty() + self.entry.winfo_height()
+        self.popup.geometry(f"+{x}+{y}")
+        self.popup.deiconify()
+        self.popup.lift()
+
+    def _is_shown(self):
+        return self.popup is not None and self.popup.winfo_viewable()
+
+    def _focus_list(self, event):
+        if not self._is_shown():
+            return None
+        self.listbox.focus_set()
+        self.listbox.selection_clear(0, END)
+        self.listbox.selection_set(0)
+        self.listbox.activate(0)
+        return 'break'
+
+    def _choose(self, event=None):
+        selection = self.listbox.curselection()
+        if selection:
+            prefix = self._split()[0]
+            self.variable.set(prefix + self.listbox.get(selection[0]))
+        self.hide()
+        self.entry.focus_set()
+        self.entry.icursor(END)
+
+    def _hide_unless_focused(self):
+        focus = self.entry.focus_get()
+        if focus is not self.entry and focus is not self.listbox:
+            self.hide()
+
+    def hide(self):
+        if self.popup is not None:
+            self.popup.withdraw()
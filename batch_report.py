@@ -0,0 +1,170 @@
+# batch_report.py
+# Headless report mode for scheduled runs: the same top-N, per-program and daily pickup-rate
+# analyses as the GUI, written as PNG + CSV files without a display.
+#
+#   python batch_report.py --start 2025-03-01 --end 2025-03-07 --output-dir reports
+#   python batch_report.py --start 2025-03-01 --end 2025-03-07 --part 0603-10K --part 0402-1U --machine NXT01
+#   python batch_report.py --start 2024-01-01 --end 2024-12-31 --streaming
+import argparse
+import os
+import re
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import matplotlib
+matplotlib.use('Agg')  # Non-interactive backend: no Tk window, no display needed
+import matplotlib.pyplot as plt
+import pandas as pd
+
+from FileHandler import get_base_path, read_folders_from_file, format_timings
+from parse_cache import ParseCache
+from file_catalog import FileCatalog
+from rollup import load_rollups, stream_rollups
+from query import parse_filter, select_files, filter_rows
+from data_processing import get_top_10_worst_components
+from metrics import summarize, daily_pickup
+from chart_utils import create_top_10_chart, create_second_chart, create_daily_error_pickup_chart
+
+
+def _safe_name(text):
+    return re.sub(r'[^A-Za-z0-9._-]+', '_', str(text)).strip('_') or 'unnamed'
+
+
+def _save(fig, path):
+    fig.savefig(path, dpi=120)
+    plt.close(fig)
+
+
+# Report jobs run in worker processes, so they only get the (small) rollup rows they need
+
+def render_top_report(data, output_dir):
+    top_components = get_top_10_worst_components(data)
+    csv_path = os.path.join(output_dir, "top_components.csv")
+    top_components.to_csv(csv_path, index=False)
+    written = [csv_path]
+    fig = create_top_10_chart(top_components, data, show=False)
+    if fig is not None:
+        written.append(os.path.join(output_dir, "top_components.png"))
+        _save(fig, written[-1])
+    return written
+
+
+def render_program_report(part_name, machine_name, data, output_dir):
+    name = f"programs_{_safe_name(part_name)}_{_safe_name(machine_name)}"
+    program_errors = summarize(data[data['Consumption'] > 0], ['Program Name'])
+    program_errors = program_errors.sort_values(by='Total Errors', ascending=False)
+    csv_path = os.path.join(output_dir, name + ".csv")
+    program_errors.to_csv(csv_path, index=False)
+    written = [csv_path]
+    fig = create_second_chart(part_name, machine_name, data, show=False)
+    if fig is not None:
+        written.append(os.path.join(output_dir, name + ".png"))
+        _save(fig, written[-1])
+    return written
+
+
+def render_daily_report(part_name, data, output_dir):
+    name = f"daily_{_safe_name(part_name)}"
+    _, daily_data = daily_pickup(data)
+    csv_path = os.path.join(output_dir, name + ".csv")
+    daily_data.to_csv(csv_path, index=False)
+    written = [csv_path]
+    fig = create_daily_error_pickup_chart(part_name, data, show=False)
+    if fig is not None:
+        written.append(os.path.join(output_dir, name + ".png"))
+        _save(fig, written[-1])
+    return written
+
+
+def build_jobs(data, parts, drilldown, output_dir):
+    jobs = [(render_top_report, data, output_dir)]
+
+    top_components = get_top_10_worst_components(data)
+    for _, row in top_components.head(drilldown).iterrows():
+        part_name, machine_name = row['Parts Name'], row['Machine Name']
+        subset = data[(data['Parts Name'] == part_name) & (data['Machine Name'] == machine_name)]
+        jobs.append((render_program_report, part_name, machine_name, subset, output_dir))
+
+    for part_name in parts:
+        subset = data[data['Parts Name'] == part_name]
+        if subset.empty:
+            print(f"No data available for {part_name}; skipping its daily report.")
+            continue
+        jobs.append((render_daily_report, part_name, subset, output_dir))
+    return jobs
+
+
+def run_jobs(jobs, workers):
+    written = []
+    if workers > 1 and len(jobs) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(job[0], *job[1:]) for job in jobs]
+            for future in futures:
+                written.extend(future.result())
+    else:
+        for job in jobs:
+            written.extend(job[0](*job[1:]))
+    return written
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Write Part Log Analyzer reports (PNG + CSV) without the GUI.")
+    parser.add_argument('--start', required=True, help="First day, YYYY-MM-DD")
+    parser.add_argument('--end', required=True, help="Last day, YYYY-MM-DD")
+    parser.add_argument('--machine', action='append', default=[],
+                        help="Only this Machine Name (repeatable, wildcards allowed: NXT0*)")
+    parser.add_argument('--program', action='append', default=[],
+                        help="Only this Program Name (repeatable, wildcards allowed)")
+    parser.add_argument('--part', action='append', default=[], help="Write a daily pickup-rate report for this Parts Name (repeatable)")
+    parser.add_argument('--drilldown', type=int, default=5, help="Per-program reports for the N worst part/machine pairs (default 5)")
+    parser.add_argument('--output-dir', default='reports', help="Where to write the reports (default ./reports)")
+    parser.add_argument('--folders', default='FolderAddress.txt', help="Folder list, same format as the GUI uses")
+    parser.add_argument('--workers', type=int, default=max(1, min(8, (os.cpu_count() or 1) - 1)),
+                        help="Processes used for parsing and rendering")
+    parser.add_argument('--streaming', action='store_true',
+                        help="Read uncached files in chunks into running sums (for ranges larger than RAM)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    start_date = pd.to_datetime(args.start)
+    end_date = pd.to_datetime(args.end)
+
+    # A folder list that exists relative to the current directory wins over the one next to the program
+    folder_paths = read_folders_from_file(os.path.abspath(args.folders) if os.path.exists(args.folders) else args.folders)
+    cache_dir = os.path.join(get_base_path(), "PartLogCache")
+    parse_cache = ParseCache(cache_dir)
+    file_catalog = FileCatalog(os.path.join(cache_dir, "catalog.json"))
+    file_catalog.refresh(folder_paths)
+    for warning in file_catalog.share_warnings():
+        print(f"Warning: {warning}")
+    # Files of other machines/programs are left out before anything is read
+    machine_filter = parse_filter(','.join(args.machine))
+    program_filter = parse_filter(','.join(args.program))
+    all_files = select_files(file_catalog, start_date, end_date, machine_filter, program_filter)
+    if not all_files:
+        print("No CSV files found in the specified folders for the selected date range.")
+        return 1
+
+    # Every report only needs sums, so they are all served from the per-file rollups
+    timings = {}
+    load = stream_rollups if args.streaming else load_rollups
+    data = load(all_files, parse_cache, args.workers, timings)
+    if timings:
+        print(format_timings(timings))
+    data = filter_rows(data, machine_filter, program_filter)
+    if data.empty:
+        print("No data found after applying filters.")
+        return 1
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    jobs = build_jobs(data, args.part, args.drilldown, args.output_dir)
+    written = run_jobs(jobs, args.workers)
+    for path in written:
+        print(f"Wrote {path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,142 @@
+# benchmark.py
+# Times the hot paths on synthetic PartsLog trees (see synthetic_logs.py) at several scales and
+# writes the results as JSON, so runs from different versions can be compared.
+#
+#   python benchmark.py --scales small medium --output bench_v1.8.json
+#   python benchmark.py --scales small medium --output bench_new.json --compare bench_v1.8.json
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import pandas as pd
+
+from FileHandler import get_available_dates, get_csv_files, merge_and_clean
+from data_processing import get_top_10_worst_components
+from metrics import summarize, daily_pickup
+from synthetic_logs import generate_parts_logs
+
+# Arguments for generate_parts_logs; rows = machines * days * programs * 3 shifts * rows_per_file
+SCALES = {
+    'small': {'machines': 3, 'days': 7, 'parts': 200, 'programs': 4, 'rows_per_file': 500, 'bad_line_rate': 0.001},
+    'medium': {'machines': 10, 'days': 30, 'parts': 2000, 'programs': 6, 'rows_per_file': 1000, 'bad_line_rate': 0.001},
+    'large': {'machines': 30, 'days': 90, 'parts': 20000, 'programs': 8, 'rows_per_file': 1500, 'bad_line_rate': 0.001},
+}
+# A run slower than the baseline by more than this factor is reported as a regression
+REGRESSION_FACTOR = 1.2
+
+
+def _time(func, repeat):
+    # (median seconds, result of the last call)
+    seconds = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func()
+        seconds.append(time.perf_counter() - started)
+    return statistics.median(seconds), result
+
+
+def prepare_chart_data(data, top_components):
+    # What the three charts compute before drawing: top-N Good Rates, the per-program
+    # breakdown of the worst pair and the daily pickup rate of the worst part
+    part_name, machine_name = top_components.iloc[0]['Parts Name'], top_components.iloc[0]['Machine Name']
+    pair = data[(data['Parts Name'] == part_name) & (data['Machine Name'] == machine_name)]
+    summarize(pair, ['Program Name'], consumed_only=True)
+    daily_pickup(data[data['Parts Name'] == part_name])
+
+
+def run_scale(name, params, data_dir, repeat):
+    root = os.path.join(data_dir, name)
+    if not os.path.exists(os.path.join(root, "FolderAddress.txt")):
+        generate_parts_logs(root, **params)
+    folder_info = [(os.path.join(root, folder), folder) for folder in sorted(os.listdir(root))
+                   if os.path.isdir(os.path.join(root, folder))]
+    files = get_csv_files(folder_info)
+    csv_bytes = sum(os.path.getsize(file) for file, _ in files)
+
+    stages = {}
+    stages['get_available_dates'], dates = _time(lambda: get_available_dates(folder_info), repeat)
+    stages['get_csv_files'], _ = _time(lambda: get_csv_files(folder_info, pd.Timestamp(dates[0]), pd.Timestamp(dates[-1])), repeat)
+    stages['merge_and_clean'], data = _time(lambda: merge_and_clean(files), repeat)
+    stages['get_top_10_worst_components'], top_components = _time(lambda: get_top_10_worst_components(data), repeat)
+    stages['chart_data'], _ = _time(lambda: prepare_chart_data(data, top_components), repeat)
+
+    result = {
+        'params': params,
+        'files': len(files),
+        'rows': len(data),
+        'csv_bytes': csv_bytes,
+        'memory_bytes': int(data.memory_usage(deep=True).sum()),
+        'seconds': stages,
+        'rows_per_s': {'merge_and_clean': len(data) / stages['merge_and_clean'] if stages['merge_and_clean'] else 0},
+    }
+    print(f"{name}: {len(files)} files, {len(data)} rows, "
+          + ', '.join(f"{stage} {seconds:.3f}s" for stage, seconds in stages.items()))
+    return result
+
+
+def compare(results, baseline):
+    # Lines describing the stages that got slower than REGRESSION_FACTOR x the baseline
+    regressions = []
+    for name, scale in results['scales'].items():
+        old_scale = baseline.get('scales', {}).get(name)
+        if old_scale is None:
+            continue
+        for stage, seconds in scale['seconds'].items():
+            old = old_scale['seconds'].get(stage)
+            if old and seconds > old * REGRESSION_FACTOR:
+                regressions.append(f"{name}/{stage}: {old:.3f}s -> {seconds:.3f}s ({seconds / old:.2f}x)")
+    return regressions
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark Part Log Analyzer hot paths on synthetic data.")
+    parser.add_argument('--scales', nargs='+', default=['small'], choices=sorted(SCALES))
+    parser.add_argument('--repeat', type=int, default=3, help="Runs per stage; the median is reported")
+    parser.add_argument('--data-dir', help="Keep the generated trees here and reuse them (default: temporary folder)")
+    parser.add_argument('--output', help="Write the JSON results to this file (default: print them)")
+    parser.add_argument('--compare', help="Earlier JSON results to check for regressions")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    data_dir = args.data_dir or tempfile.mkdtemp(prefix="partslog_bench_")
+    try:
+        results = {
+            'created': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'pandas': pd.__version__,
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'repeat': args.repeat,
+            'scales': {name: run_scale(name, SCALES[name], data_dir, args.repeat) for name in args.scales},
+        }
+    finally:
+        if not args.data_dir:
+            shutil.rmtree(data_dir, ignore_errors=True)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f"Wrote {args.output}")
+    else:
+        print(json.dumps(results, indent=2))
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            regressions = compare(results, json.load(f))
+        for line in regressions:
+            print(f"Slower: {line}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
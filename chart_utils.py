@@ -1,32 +1,112 @@
 import matplotlib.pyplot as plt
-from tkinter import Toplevel, Text, Scrollbar, RIGHT, BOTTOM, X, Y, END, BOTH, font as tkFont
-import pandas as pd
-
-def create_top_10_chart(top_10_data, full_data):
+from matplotlib._pylab_helpers import Gcf
+from matplotlib.collections import PolyCollection
+from tkinter import Toplevel, Text, END, BOTH
+import numpy as np
+import time
+import weakref
+from metrics import summarize, daily_pickup
+from table_view import VirtualTable
+from instrumentation import add_stage
+
+WINDOW_TITLE = "Transtechnology Vietnam Co., Ltd. - Part Log Analyzer V1.7"
+
+BAR_WIDTH = 0.8
+# Value labels are thinned so a chart over a long range draws about as fast as one over a week
+MAX_SEGMENT_LABELS = 100           # Stacked-segment labels, largest segments first
+MIN_SEGMENT_LABEL_FRACTION = 0.03  # Segments shorter than this share of the tallest stack get no label
+MAX_POINT_LABELS = 40              # Labels per line; every n-th point is labelled above this
+MAX_DATE_TICKS = 45                # Date tick labels; every n-th day is labelled above this
+
+# Click handler currently connected to each figure, so a redrawn figure only reacts to its new bars
+_click_ids = weakref.WeakKeyDictionary()
+# Window shown for each kind of chart ('top', 'programs', 'daily'); the next chart of that kind is drawn into it
+_windows = {}
+
+def _connect_click(fig, on_click):
+    previous = _click_ids.get(fig)
+    if previous is not None:
+        fig.canvas.mpl_disconnect(previous)
+    _click_ids[fig] = fig.canvas.mpl_connect('button_press_event', on_click)
+
+def _new_or_cleared(fig, figsize, show, kind):
+    # (figure, axes, redraw): `fig` or the open window of this kind emptied so the chart is redrawn in it,
+    # otherwise a new (maximized) figure
+    if fig is None and is_open(_windows.get(kind)):
+        fig = _windows[kind]
+    if fig is not None:
+        fig.clf()
+        return fig, fig.add_subplot(), True
+    fig, ax = plt.subplots(figsize=figsize)
+    fig.set_label(kind)
+    # Maximize the chart window
+    if show:
+        fig_manager = plt.get_current_fig_manager()
+        fig_manager.window.state('zoomed')
+        fig_manager.set_window_title(WINDOW_TITLE)
+        _windows[kind] = fig
+    return fig, ax, False
+
+# Shows a figure built with show=False in a maximized window, without blocking the Tk main loop
+def show_figure(fig):
+    fig_manager = fig.canvas.manager
+    fig_manager.window.state('zoomed')
+    fig_manager.set_window_title(WINDOW_TITLE)
+    fig_manager.show()
+    if fig.get_label():
+        _windows[fig.get_label()] = fig
+
+def is_open(fig):
+    # Figure numbers are handed out again once a window is closed, so the open figure must be this one
+    if fig is None:
+        return False
+    manager = Gcf.figs.get(fig.number)
+    return manager is not None and manager.canvas.figure is fig
+
+def _bar_at(event, ax, heights, width=BAR_WIDTH):
+    # Index of the bar under a click, worked out from the click position instead of testing every bar.
+    # Twin axes lie on top of ax, so the click is converted with ax's own data coordinates.
+    if event.inaxes is None or event.inaxes.figure is not ax.figure:
+        return None
+    x, y = ax.transData.inverted().transform((event.x, event.y))
+    i = int(np.floor(x + 0.5))
+    if 0 <= i < len(heights) and abs(x - i) <= width / 2 and min(0, heights[i]) <= y <= max(0, heights[i]):
+        return i
+    return None
+
+def _bar_outlines(x, bottom, height, width=BAR_WIDTH):
+    # Corners of the bars at x, as the (bars, 4, 2) vertex array a PolyCollection takes
+    left, right, top = x - width / 2, x + width / 2, bottom + height
+    return np.stack([np.column_stack([left, bottom]), np.column_stack([left, top]),
+                     np.column_stack([right, top]), np.column_stack([right, bottom])], axis=1)
+
+def _label_stride(count, limit):
+    # Every n-th item gets a label so that at most `limit` are drawn
+    return max(1, -(-count // limit))
+
+# show=False builds the figure without a window (batch reports) and returns it instead of calling plt.show()
+# timings (a dict, see instrumentation.py) receives the time spent building the figure as stage 'render'
+# fig redraws the chart in an existing figure (live watch); without it the open window of the same kind of chart
+# is reused, and a new window is only opened when there is none
+# index (drilldown.DrillDownIndex of full_data) turns the bar-click drill-down into lookups
+def create_top_10_chart(top_10_data, full_data, show=True, timings=None, fig=None, index=None):
+    started = time.perf_counter()
     # Exclude rows with Consumption = 0 from the data used in the chart
     full_data = full_data[full_data['Consumption'] > 0]
 
     if not top_10_data.empty:
-        fig, ax1 = plt.subplots(figsize=(12, 6))
-    
-        # Maximize the chart window
-        fig_manager = plt.get_current_fig_manager()
-        fig_manager.window.state('zoomed')
-        fig_manager.set_window_title("Transtechnology Vietnam Co., Ltd. - Part Log Analyzer V1.7")
+        fig, ax1, redraw = _new_or_cleared(fig, (12, 6), show, 'top')
         
         # Bar chart for Total Errors
         labels = [f"{row['Parts Name']} - {row['Machine Name']}" for _, row in top_10_data.iterrows()]
-        bars = ax1.bar(labels, top_10_data['Total Errors'], color='red', alpha=0.6, label='Total Errors')
-
-        # Calculate Good Rate for each part
-        good_rates = []
-        for _, row in top_10_data.iterrows():
-            part_name = row['Parts Name']
-            machine_name = row['Machine Name']
-            # Filter full_data for the specific part and machine
-            filtered_full_data = full_data[(full_data['Parts Name'] == part_name) & (full_data['Machine Name'] == machine_name)]
-            _, good_rate = calculate_error_and_good_rate(pd.DataFrame([row]), filtered_full_data)  # Convert row to DataFrame
-            good_rates.append(good_rate)
+        bars = ax1.bar(labels, top_10_data['Total Errors'], width=BAR_WIDTH, color='red', alpha=0.6, label='Total Errors')
+
+        # Good Rate for each part, from one grouped pass over the rows with consumption
+        if 'Good Rate' in top_10_data.columns:
+            good_rates = top_10_data['Good Rate'].tolist()
+        else:
+            rates = summarize(full_data, ['Parts Name', 'Machine Name']).set_index(['Parts Name', 'Machine Name'])['Good Rate']
+            good_rates = [rates.get((row['Parts Name'], row['Machine Name']), 100.0) for _, row in top_10_data.iterrows()]
 
         # Create a second y-axis for the Good Rate
         ax2 = ax1.twinx()
@@ -54,181 +134,143 @@ def create_top_10_chart(top_10_data, full_data):
         ax1.legend(loc='upper left')
         ax2.legend(loc='upper right')
 
-        plt.tight_layout()
+        fig.tight_layout()
         ax1.bar_label(bars, labels=[f'{int(val)}' for val in top_10_data['Total Errors']], label_type='center')
 
         # Event handler for clicking on a bar
+        heights = top_10_data['Total Errors'].to_numpy()
+
         def on_click(event):
-            for i, bar in enumerate(bars):
-                if bar.contains(event)[0]:
-                    component_name = top_10_data.iloc[i]['Parts Name']
-                    machine_name = top_10_data.iloc[i]['Machine Name']
-                    create_second_chart(component_name, machine_name, full_data)
-                    break  # Only create the second chart
-
-        fig.canvas.mpl_connect('button_press_event', on_click)
-        plt.show()
+            i = _bar_at(event, ax1, heights)
+            if i is not None:
+                component_name = top_10_data.iloc[i]['Parts Name']
+                machine_name = top_10_data.iloc[i]['Machine Name']
+                create_second_chart(component_name, machine_name, full_data, index=index)
+
+        _connect_click(fig, on_click)
+        add_stage(timings, 'render', time.perf_counter() - started, rows=len(full_data))
+        if redraw:
+            fig.canvas.draw_idle()
+        elif show:
+            plt.show()
+        return fig
     else:
         print("No data available for charting.")
 
-def calculate_error_and_good_rate(top_10_data, full_data):
-    # Filter out rows with zero consumption to avoid distortion in error rate calculation
-    valid_data = full_data[full_data['Consumption'] > 0]
-
-    # Calculate total errors and total consumption for the filtered data
-    total_errors = valid_data['Total Errors'].sum()
-    total_consumption = valid_data['Consumption'].sum()
-
-    if total_consumption > 0:  # Avoid division by zero
-        error_rate = (total_errors / total_consumption) * 100
-        good_rate = 100 - error_rate
+def create_second_chart(part_name, machine_name, full_data, show=True, timings=None, index=None):
+    started = time.perf_counter()
+    if index is not None:
+        # Per-program totals were grouped when the data was loaded
+        program_errors = index.program_errors(part_name, machine_name)
     else:
-        error_rate = 0
-        good_rate = 100
-
-    return error_rate, good_rate
-
-def create_second_chart(part_name, machine_name, full_data):
-    # Filter data to exclude rows with Consumption = 0
-    filtered_data = full_data[(full_data['Parts Name'] == part_name) & (full_data['Machine Name'] == machine_name)]
-    filtered_data = filtered_data[filtered_data['Consumption'] > 0]
-    
-    if not filtered_data.empty:
-        error_columns = ['Pick Error Counter', 'Vision Error Counter', 'Nozzle Error Counter', 'Coplanarity Error Counter']
-        
-        if all(col in filtered_data.columns for col in error_columns):
-            filtered_data.loc[:, 'Total Errors'] = filtered_data[error_columns].sum(axis=1)
-        
-        program_errors = filtered_data.groupby('Program Name')['Total Errors'].sum().reset_index()
+        # Filter data to exclude rows with Consumption = 0
+        filtered_data = full_data[(full_data['Parts Name'] == part_name) & (full_data['Machine Name'] == machine_name)]
+        filtered_data = filtered_data[filtered_data['Consumption'] > 0]
+        program_errors = summarize(filtered_data, ['Program Name'])
         program_errors = program_errors.sort_values(by='Total Errors', ascending=False).head(20)
+    
+    if not program_errors.empty:
 
-        fig, ax = plt.subplots(figsize=(12, 6))
+        fig, ax, redraw = _new_or_cleared(None, (12, 6), show, 'programs')
 
-        # Maximize the chart window
-        fig_manager = plt.get_current_fig_manager()
-        fig_manager.window.state('zoomed')
-        fig_manager.set_window_title("Transtechnology Vietnam Co., Ltd. - Part Log Analyzer V1.7")
-
-        bars = ax.bar(program_errors['Program Name'], program_errors['Total Errors'], color='blue')
+        bars = ax.bar(program_errors['Program Name'], program_errors['Total Errors'], width=BAR_WIDTH, color='blue')
         ax.bar_label(bars, label_type='center')
 
-        plt.title(f'Top Worst by Program for {part_name} on {machine_name}')
-        plt.xlabel('Program Name')
-        plt.ylabel('Total Error Count')
-        plt.xticks(rotation=45, ha='right')
+        ax.set_title(f'Top Worst by Program for {part_name} on {machine_name}')
+        ax.set_xlabel('Program Name')
+        ax.set_ylabel('Total Error Count')
+        ax.tick_params(axis='x', labelrotation=45)
+        for tick_label in ax.get_xticklabels():
+            tick_label.set_horizontalalignment('right')
 
         max_errors = int(program_errors['Total Errors'].max())
         step = max(1, max_errors // 5)
         ax.set_yticks(range(0, max_errors + step, step))
 
+        heights = program_errors['Total Errors'].to_numpy()
+
         def on_click(event):
-            for i, bar in enumerate(bars):
-                if bar.contains(event)[0]:
-                    program_name = program_errors.iloc[i]['Program Name']
-                    show_program_details(program_name, part_name, machine_name, full_data)
-                    break
-
-        fig.canvas.mpl_connect('button_press_event', on_click)
-        plt.tight_layout()
-        plt.show()
+            i = _bar_at(event, ax, heights)
+            if i is not None:
+                program_name = program_errors.iloc[i]['Program Name']
+                show_program_details(program_name, part_name, machine_name, full_data, index)
+
+        _connect_click(fig, on_click)
+        fig.tight_layout()
+        add_stage(timings, 'render', time.perf_counter() - started, rows=len(program_errors))
+        if redraw:
+            fig.canvas.draw_idle()
+        elif show:
+            plt.show()
+        return fig
     else:
         print(f"No data available for {part_name} on {machine_name} to create the second chart.")
 
-def show_program_details(program_name, part_name, machine_name, full_data):
-    filtered_data = full_data[(full_data['Parts Name'] == part_name) & (full_data['Machine Name'] == machine_name) & (full_data['Program Name'] == program_name)]
+def show_program_details(program_name, part_name, machine_name, full_data, index=None):
+    if index is not None:
+        filtered_data = index.rows(part_name, machine_name, program_name)
+    else:
+        filtered_data = full_data[(full_data['Parts Name'] == part_name) & (full_data['Machine Name'] == machine_name) & (full_data['Program Name'] == program_name)]
     
     detail_window = Toplevel()
     detail_window.title(f"Details for Program: {program_name} on {part_name} - {machine_name}")
     detail_window.state('zoomed')  # Maximize window
 
-    text_widget = Text(detail_window, wrap="none", undo=True)
-    scroll_y = Scrollbar(detail_window, orient="vertical", command=text_widget.yview)
-    scroll_x = Scrollbar(detail_window, orient="horizontal", command=text_widget.xview, width=20)
-
-    text_widget.configure(yscrollcommand=scroll_y.set, xscrollcommand=scroll_x.set)
-    monospaced_font = tkFont.Font(family="Courier", size=10)
-    text_widget.configure(font=monospaced_font)
-
     if not filtered_data.empty:
-        header = filtered_data.columns.tolist()
-        column_widths = [
-            max(len(str(val)) for val in [col] + filtered_data[col].tolist()) + 2
-            for col in header
-        ]
-        header_str = ''.join([f"{col:<{column_widths[i]}}" for i, col in enumerate(header)])
-        text_widget.insert(END, header_str + "\n" + "-" * len(header_str) + "\n")
-        
-        for _, row in filtered_data.iterrows():
-            row_str = ''.join([f"{str(val):<{column_widths[i]}}" for i, val in enumerate(row)])
-            text_widget.insert(END, row_str + "\n")
+        # Only the rows on screen are turned into widgets, so this opens quickly for any number of rows
+        VirtualTable(detail_window, filtered_data).pack(side="top", fill=BOTH, expand=True)
     else:
+        text_widget = Text(detail_window, wrap="none")
         text_widget.insert(END, f"No data available for program {program_name}.\n")
+        text_widget.pack(side="top", fill=BOTH, expand=True)
 
-    text_widget.pack(side="top", fill=BOTH, expand=True)
-    scroll_y.pack(side=RIGHT, fill=Y)
-    scroll_x.pack(side=BOTTOM, fill=X)
-
-import matplotlib.pyplot as plt
-from tkinter import Toplevel, Text, Scrollbar, RIGHT, BOTTOM, X, Y, END, BOTH, font as tkFont
-import pandas as pd
 
-def create_daily_error_pickup_chart(part_name, full_data):
+def create_daily_error_pickup_chart(part_name, full_data, show=True, timings=None, fig=None):
     """Vẽ biểu đồ Total Errors (cột chồng theo máy), Pickup Rate (đường), và Valid Consumption (đường) theo ngày cho Parts Name được chọn."""
-    filtered_data = full_data[(full_data['Parts Name'] == part_name) & (full_data['Consumption'] > 0)].copy()
+    started = time.perf_counter()
+    filtered_data = full_data[(full_data['Parts Name'] == part_name) & (full_data['Consumption'] > 0)]
     
     if not filtered_data.empty:
-        # Các cột lỗi liên quan
-        error_columns = ['Pick Error Counter', 'Vision Error Counter', 'Coplanarity Error Counter']  # Không bao gồm Nozzle Error Counter
-        if all(col in filtered_data.columns for col in error_columns):
-            # Tính Total Errors theo công thức yêu cầu
-            filtered_data['Total Errors'] = (filtered_data['Pick Error Counter'] + 
-                                            filtered_data['Vision Error Counter'] + 
-                                            filtered_data['Coplanarity Error Counter'] - 
-                                            filtered_data.get('No Parts Error Counter', 0))
-        
-        # Tính Valid Consumption
-        filtered_data['Valid Consumption'] = filtered_data['Consumption'] - filtered_data.get('No Parts Error Counter', 0)
-        
-        # Nhóm dữ liệu theo Date và Machine Name cho Total Errors (cột chồng)
-        daily_machine_data = filtered_data.groupby(['Date', 'Machine Name'])['Total Errors'].sum().unstack(fill_value=0)
-        
-        # Nhóm dữ liệu theo Date và tính tổng từng cột để tính Pickup Rate
-        daily_data = filtered_data.groupby('Date').agg({
-            'Pick Error Counter': 'sum',
-            'Vision Error Counter': 'sum',
-            'Coplanarity Error Counter': 'sum',
-            'No Parts Error Counter': 'sum',
-            'Consumption': 'sum',
-            'Valid Consumption': 'sum'  # Dùng để vẽ đường Valid Consumption
-        }).reset_index()
-        
-        # Tính Pickup Rate dựa trên tổng các cột
-        daily_data['Error Sum'] = (daily_data['Pick Error Counter'] + 
-                                  daily_data['Vision Error Counter'] + 
-                                  daily_data['Coplanarity Error Counter'] - 
-                                  daily_data['No Parts Error Counter'])
-        daily_data['Pickup Rate'] = 100 - (daily_data['Error Sum'] / daily_data['Valid Consumption'] * 100)
-
-        # Vẽ biểu đồ
-        fig, ax1 = plt.subplots(figsize=(15, 6))
-        fig_manager = plt.get_current_fig_manager()
-        fig_manager.window.state('zoomed')
-        fig_manager.set_window_title("Transtechnology Vietnam Co., Ltd. - Part Log Analyzer V1.7")
-
-        # Biểu đồ cột chồng cho Total Errors theo máy
-        daily_machine_data.plot(kind='bar', stacked=True, ax=ax1, alpha=0.6, width=0.8)
+        # Total Errors (cột chồng) = Pick + Vision + Coplanarity - No Parts (không bao gồm Nozzle Error Counter),
+        # Pickup Rate và Valid Consumption theo ngày; tính trong một lần groupby (metrics.daily_pickup)
+        daily_machine_data, daily_data = daily_pickup(filtered_data)
+
+        # Vẽ biểu đồ (hoặc vẽ lại trong cửa sổ đang mở khi theo dõi trực tiếp)
+        fig, ax1, redraw = _new_or_cleared(fig, (15, 6), show, 'daily')
+
+        # Biểu đồ cột chồng cho Total Errors theo máy: một PolyCollection cho mỗi máy thay vì một
+        # Rectangle cho mỗi ngày x máy; giá trị âm chồng riêng phía dưới 0 như pandas
+        values = daily_machine_data.to_numpy(dtype=float)
+        x = np.arange(len(values))
+        positive_base, negative_base = np.zeros(len(x)), np.zeros(len(x))
+        bases = np.zeros_like(values)
+        colors = plt.rcParams['axes.prop_cycle'].by_key()['color']
+        for j, machine in enumerate(daily_machine_data.columns):
+            heights = values[:, j]
+            bases[:, j] = np.where(heights >= 0, positive_base, negative_base)
+            positive_base += np.clip(heights, 0, None)
+            negative_base += np.clip(heights, None, 0)
+            ax1.add_collection(PolyCollection(_bar_outlines(x, bases[:, j], heights), facecolors=colors[j % len(colors)],
+                                              alpha=0.6, label=str(machine)))
+        ax1.set_xlim(-0.5, len(x) - 0.5)
+        ax1.autoscale_view(scalex=False)
+        ax1.set_ylim(bottom=min(0, negative_base.min()))
         ax1.set_xlabel('Date')
         ax1.set_ylabel('Total Error Count', color='black')
         ax1.tick_params(axis='y', labelcolor='black')
 
-        # Thêm giá trị số lỗi vào từng phần của stack chart
-        for i, (date, row) in enumerate(daily_machine_data.iterrows()):
-            cumulative = 0
-            for machine, errors in row.items():
-                if errors > 0:
-                    ax1.text(i, cumulative + errors / 2, f'{int(errors)}', 
-                             ha='center', va='center', fontsize=8, color='white', weight='bold')
-                    cumulative += errors
+        # Thêm giá trị số lỗi vào các phần của stack chart: chỉ những phần đủ cao để đọc được,
+        # tối đa MAX_SEGMENT_LABELS phần lớn nhất
+        days, machines = np.nonzero(values > 0)
+        errors = values[days, machines]
+        readable = errors >= positive_base.max() * MIN_SEGMENT_LABEL_FRACTION
+        days, machines, errors = days[readable], machines[readable], errors[readable]
+        if len(errors) > MAX_SEGMENT_LABELS:
+            largest = np.argsort(errors, kind='stable')[-MAX_SEGMENT_LABELS:]
+            days, machines, errors = days[largest], machines[largest], errors[largest]
+        for i, j, error_count in zip(days, machines, errors):
+            ax1.text(i, bases[i, j] + error_count / 2, f'{int(error_count)}',
+                     ha='center', va='center', fontsize=8, color='white', weight='bold')
 
         # Trục y thứ hai: Đường Pickup Rate
         ax2 = ax1.twinx()
@@ -237,8 +279,9 @@ def create_daily_error_pickup_chart(part_name, full_data):
         ax2.set_ylim(0, 120)
         ax2.tick_params(axis='y', labelcolor='green')
 
-        # Thêm chú thích giá trị cho Pickup Rate
-        for i, rate in enumerate(daily_data['Pickup Rate']):
+        # Thêm chú thích giá trị cho Pickup Rate (mỗi n điểm một nhãn khi khoảng ngày dài)
+        step = _label_stride(len(daily_data), MAX_POINT_LABELS)
+        for i, rate in list(enumerate(daily_data['Pickup Rate']))[::step]:
             ax2.annotate(f'{rate:.2f}%', xy=(i, rate), xytext=(0, 5), 
                          textcoords="offset points", ha='center', color='green', fontsize=9)
 
@@ -250,14 +293,15 @@ def create_daily_error_pickup_chart(part_name, full_data):
         ax3.tick_params(axis='y', labelcolor='orange')
 
         # Thêm chú thích giá trị cho Valid Consumption
-        for i, cons in enumerate(daily_data['Valid Consumption']):
+        for i, cons in list(enumerate(daily_data['Valid Consumption']))[::step]:
             ax3.annotate(f'{int(cons)}', xy=(i, cons), xytext=(0, -10), 
                          textcoords="offset points", ha='center', color='orange', fontsize=9)
 
         # Định dạng nhãn ngày tháng
         date_labels = [date.strftime('%Y-%m-%d') for date in daily_machine_data.index]
-        ax1.set_xticks(range(len(date_labels)))
-        ax1.set_xticklabels(date_labels, rotation=45, ha='right', fontsize=8)
+        tick_step = _label_stride(len(date_labels), MAX_DATE_TICKS)
+        ax1.set_xticks(range(0, len(date_labels), tick_step))
+        ax1.set_xticklabels(date_labels[::tick_step], rotation=45, ha='right', fontsize=8)
 
         # Tiêu đề và định dạng
         ax1.set_title(f'Daily Total Errors by Machine, Pickup Rate, and Valid Consumption for {part_name}')
@@ -267,9 +311,15 @@ def create_daily_error_pickup_chart(part_name, full_data):
         lines1, labels1 = ax1.get_legend_handles_labels()
         lines2, labels2 = ax2.get_legend_handles_labels()
         lines3, labels3 = ax3.get_legend_handles_labels()
-        ax1.legend(lines1 + lines2 + lines3, labels1 + labels2 + labels3, loc='upper left')
-
-        plt.tight_layout()
-        plt.show()
+        ax1.legend(lines1 + lines2 + lines3, labels1 + labels2 + labels3, loc='upper left',
+                   ncol=_label_stride(len(labels1) + 2, 15))
+
+        fig.tight_layout()
+        add_stage(timings, 'render', time.perf_counter() - started, rows=len(filtered_data))
+        if redraw:
+            fig.canvas.draw_idle()
+        elif show:
+            plt.show()
+        return fig
     else:
         print(f"No data available for {part_name} to create the daily error, pickup, and consumption chart.")
\ No newline at end of file
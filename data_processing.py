@@ -1,17 +1,14 @@
 # data_processing.py
 import pandas as pd
+from metrics import ERROR_COLUMNS, top_components
+from instrumentation import stage
 
-def get_top_10_worst_components(data):
-    if 'Pick Error Counter' in data.columns and 'No Parts Error Counter' in data.columns:
-        data['Pick Error Counter'] = data['Pick Error Counter'] - data['No Parts Error Counter']
-    
-    error_columns = ['Pick Error Counter', 'Vision Error Counter', 'Nozzle Error Counter', 'Coplanarity Error Counter']
-    
-    if all(col in data.columns for col in error_columns):
-        data['Total Errors'] = data[error_columns].sum(axis=1)
-        component_errors = data.groupby(['Parts Name', 'Machine Name'])['Total Errors'].sum().reset_index()
-        top_10_worst_components = component_errors.sort_values(by='Total Errors', ascending=False).head(20)
-        return top_10_worst_components
+def get_top_10_worst_components(data, timings=None):
+    # Total Errors = (Pick - No Parts) + Vision + Nozzle + Coplanarity, computed without modifying `data`
+    if all(col in data.columns for col in ERROR_COLUMNS):
+        with stage(timings, 'aggregate') as counts:
+            counts['rows'] = len(data)
+            return top_components(data, n=20)
     else:
         print("Error columns missing from data.")
         return pd.DataFrame()  # Return an empty DataFrame if error columns are missing
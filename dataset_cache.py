@@ -0,0 +1,81 @@
+# dataset_cache.py
+# Session-level cache of loaded PartsLog rows, kept per day.
+# A request for a date range is served from the days already in memory; only days that were
+# never loaded (or were invalidated because their files changed) go back to the loader.
+from collections import OrderedDict
+
+import pandas as pd
+
+from schema import concat_frames
+
+DEFAULT_MAX_BYTES = 2 * 1024 ** 3  # 2 GB
+
+
+def _contiguous_runs(days):
+    # [d1, d2, d3, d5] -> [(d1, d3), (d5, d5)]
+    runs = []
+    for day in days:
+        if runs and day - runs[-1][1] == pd.Timedelta(days=1):
+            runs[-1] = (runs[-1][0], day)
+        else:
+            runs.append((day, day))
+    return runs
+
+
+class SessionDataset:
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.days = OrderedDict()  # day -> rows of that day (least recently used first)
+        self.day_bytes = {}
+        self.columns = None
+
+    def total_bytes(self):
+        return sum(self.day_bytes.values())
+
+    def invalidate(self, dates):
+        # Forget days whose files changed on disk so they are loaded again
+        for date in dates:
+            day = pd.Timestamp(date).normalize()
+            self.days.pop(day, None)
+            self.day_bytes.pop(day, None)
+
+    def _store(self, run_start, run_end, data):
+        if self.columns is None and not data.empty:
+            self.columns = data.columns
+        by_day = dict(iter(data.groupby('Date', sort=False))) if not data.empty else {}
+        for day in pd.date_range(run_start, run_end, freq='D'):
+            # Days without any rows are remembered too, so they are not loaded again
+            day_data = by_day.get(day, data.iloc[0:0])
+            self.days[day] = day_data
+            self.day_bytes[day] = int(day_data.memory_usage(deep=True).sum()) if not day_data.empty else 0
+
+    def _evict(self, keep):
+        total = self.total_bytes()
+        for day in list(self.days):
+            if total <= self.max_bytes:
+                break
+            if day in keep:
+                continue
+            total -= self.day_bytes.pop(day)
+            del self.days[day]
+
+    def covers(self, start_date, end_date):
+        # True when every day of the range is in memory, so get() would not call the loader
+        wanted = pd.date_range(pd.Timestamp(start_date).normalize(), pd.Timestamp(end_date).normalize(), freq='D')
+        return all(day in self.days for day in wanted)
+
+    def get(self, start_date, end_date, loader):
+        # loader(start_date, end_date) must return the rows (with a Date column) for that range
+        wanted = pd.date_range(pd.Timestamp(start_date).normalize(), pd.Timestamp(end_date).normalize(), freq='D')
+        missing = [day for day in wanted if day not in self.days]
+        for run_start, run_end in _contiguous_runs(missing):
+            self._store(run_start, run_end, loader(run_start, run_end))
+
+        for day in wanted:
+            self.days.move_to_end(day)
+        self._evict(keep=set(wanted))
+
+        frames = [self.days[day] for day in wanted if not self.days[day].empty]
+        if not frames:
+            return pd.DataFrame(columns=self.columns)
+        return concat_frames(frames)
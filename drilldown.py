@@ -0,0 +1,43 @@
+# drilldown.py
+# Index for the bar-click drill-down (top-N chart -> programs of a part/machine -> rows of a program).
+# It is built once per loaded dataset with two groupby passes; every click afterwards is a dictionary
+# lookup instead of masking the full frame again.
+import numpy as np
+
+from metrics import summarize
+
+PAIR_KEYS = ['Parts Name', 'Machine Name']
+PROGRAM_KEYS = ['Parts Name', 'Machine Name', 'Program Name']
+
+
+class DrillDownIndex:
+    def __init__(self, data):
+        self.data = data
+        # (part, machine, program) -> row positions in data, in row order; the detail table shows every row
+        self.positions = data.groupby(PROGRAM_KEYS, observed=True, sort=False).indices
+        self.pair_programs = {}
+        for part_name, machine_name, program_name in self.positions:
+            self.pair_programs.setdefault((part_name, machine_name), []).append(program_name)
+        # Error totals and rates per part/machine/program, grouped by part/machine. Like the charts,
+        # these only count rows that consumed parts
+        self.program_totals = summarize(data, PROGRAM_KEYS, consumed_only=True)
+        self.pair_rows = self.program_totals.groupby(PAIR_KEYS, observed=True, sort=False).indices
+
+    def program_errors(self, part_name, machine_name, n=20):
+        # Worst programs for a part/machine, as create_second_chart shows them
+        rows = self.pair_rows.get((part_name, machine_name))
+        if rows is None:
+            return self.program_totals.iloc[0:0].drop(columns=PAIR_KEYS)
+        program_errors = self.program_totals.iloc[rows].drop(columns=PAIR_KEYS).reset_index(drop=True)
+        return program_errors.sort_values(by='Total Errors', ascending=False).head(n)
+
+    def rows(self, part_name, machine_name, program_name=None):
+        # Rows of one program of a part/machine, or of all its programs
+        if program_name is not None:
+            programs = [program_name]
+        else:
+            programs = self.pair_programs.get((part_name, machine_name), [])
+        positions = [self.positions[(part_name, machine_name, program)] for program in programs
+                     if (part_name, machine_name, program) in self.positions]
+        positions = np.sort(np.concatenate(positions)) if positions else np.empty(0, dtype=np.intp)
+        return self.data.iloc[positions]
@@ -0,0 +1,323 @@
+# file_catalog.py
+# Persistent catalog of the PartsLog files found under the folders in FolderAddress.txt.
+# A refresh only re-lists directories whose mtime changed since the last scan, so the
+# available dates and the file selection for a date range no longer need a full os.walk.
+# Appending to a file does not change its directory's mtime, so files that may still be
+# written to are stat'ed again even in unchanged directories.
+import json
+import os
+import re
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+from datetime import datetime, timedelta
+
+CATALOG_VERSION = 1
+# Network shares (one per mounter) are listed concurrently; one that has not answered after
+# SHARE_TIMEOUT seconds is reported as unreachable instead of holding up the other machines
+SHARE_TIMEOUT = 5.0
+SHARE_SLOW_SECONDS = 2.0   # Listing took longer than this: reported as slow
+SHARE_ATTEMPTS = 3         # Tries to open a share's top folder within the timeout
+SHARE_RETRY_DELAY = 0.5
+# Files of the last ACTIVE_DAYS days, or modified less than ACTIVE_SECONDS ago, may still be growing
+ACTIVE_DAYS = 2
+ACTIVE_SECONDS = 10 * 60
+
+
+def parse_parts_log_name(file_name):
+    # Returns (program_name, 'YYYYMMDD') for PartsLog_<program>_<yyyymmddHHMMSS>.csv, or None
+    if not (file_name.startswith('PartsLog_') and file_name.endswith('.csv')):
+        return None
+    file_date_str = file_name.split('_')[-1][:8]
+    try:
+        datetime.strptime(file_date_str, '%Y%m%d')
+    except ValueError:
+        print(f"Skipping file with unexpected date format: {file_name}")
+        return None
+    match = re.search(r"PartsLog_(.+?)_\d{14}\.csv", file_name)
+    program_name = match.group(1) if match else "Unknown"
+    return program_name, file_date_str
+
+
+class FileCatalog:
+    def __init__(self, catalog_path=None):
+        self.catalog_path = catalog_path
+        self.dirs = {}    # directory -> {'mtime', 'machine', 'files': [...], 'subdirs': [...]}
+        self.files = {}   # file path -> {'machine', 'program', 'date', 'size', 'mtime'}
+        self.order = []   # file paths in os.walk order, folder by folder
+        self.by_date = {}
+        self.by_machine = {}
+        self.by_program = {}
+        self.listed_dirs = 0
+        self.changed_dates = set()  # 'YYYYMMDD' of files added, changed or removed by the last refresh
+        self.share_status = {}      # folder path -> {'machine', 'status' (healthy/slow/unreachable), 'error', 'seconds'}
+        self._pending = {}          # (folder path, machine) -> scan still running (a share that did not answer)
+        if catalog_path:
+            self._load()
+
+    def _load(self):
+        try:
+            with open(self.catalog_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return
+        if data.get('version') != CATALOG_VERSION:
+            return
+        self.dirs = data.get('dirs', {})
+        self.files = data.get('files', {})
+        self.order = data.get('order', [])
+        self._build_indexes()
+
+    def save(self):
+        if not self.catalog_path:
+            return
+        os.makedirs(os.path.dirname(self.catalog_path) or '.', exist_ok=True)
+        tmp_path = self.catalog_path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'version': CATALOG_VERSION, 'dirs': self.dirs, 'files': self.files, 'order': self.order}, f)
+        os.replace(tmp_path, self.catalog_path)
+
+    def _build_indexes(self):
+        # Built aside and assigned together: the Tk thread reads them (check_filters) while a load refreshes
+        by_date, by_machine, by_program = {}, {}, {}
+        for path in self.order:
+            info = self.files[path]
+            by_date.setdefault(info['date'], set()).add(path)
+            by_machine.setdefault(info['machine'], set()).add(path)
+            by_program.setdefault(info['program'], set()).add(path)
+        self.by_date, self.by_machine, self.by_program = by_date, by_machine, by_program
+
+    def _list_dir(self, path, machine_name, known_files, result):
+        # Re-list one directory and record its PartsLog files
+        files, subdirs = [], []
+        with os.scandir(path) as entries:
+            for entry in entries:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        subdirs.append(entry.name)
+                        continue
+                    parsed = parse_parts_log_name(entry.name)
+                    if parsed is None:
+                        continue
+                    stat = entry.stat()
+                except OSError as e:
+                    print(f"Error reading {entry.path}: {e}")
+                    continue
+                program_name, file_date_str = parsed
+                files.append(entry.name)
+                previous = known_files.get(entry.path)
+                if previous is None or previous['size'] != stat.st_size or previous['mtime'] != stat.st_mtime:
+                    result['changed_dates'].add(file_date_str)
+                result['files'][entry.path] = {
+                    'machine': machine_name,
+                    'program': program_name,
+                    'date': file_date_str,
+                    'size': stat.st_size,
+                    'mtime': stat.st_mtime,
+                }
+        result['listed_dirs'] += 1
+        return files, subdirs
+
+    def _restat(self, file_path, info, result):
+        # Catalog entry of a known file in an unchanged directory, with its size/mtime re-read if it may be growing
+        if info['date'] < result['active_from'] and time.time() - info['mtime'] >= ACTIVE_SECONDS:
+            return info
+        try:
+            stat = os.stat(file_path)
+        except OSError as e:
+            print(f"Error reading {file_path}: {e}")
+            return info
+        if stat.st_size == info['size'] and stat.st_mtime == info['mtime']:
+            return info
+        result['changed_dates'].add(info['date'])
+        return dict(info, size=stat.st_size, mtime=stat.st_mtime)
+
+    def _scan(self, path, machine_name, known_dirs, known_files, result):
+        try:
+            mtime = os.stat(path).st_mtime
+        except OSError as e:
+            print(f"Error reading {path}: {e}")
+            return
+
+        cached = known_dirs.get(path)
+        if cached is None or cached['mtime'] != mtime or cached['machine'] != machine_name:
+            try:
+                files, subdirs = self._list_dir(path, machine_name, known_files, result)
+            except OSError as e:
+                print(f"Error reading {path}: {e}")
+                return
+        else:
+            files, subdirs = cached['files'], cached['subdirs']
+            for name in files:
+                file_path = os.path.join(path, name)
+                if file_path in known_files:
+                    result['files'][file_path] = self._restat(file_path, known_files[file_path], result)
+        result['dirs'][path] = {'mtime': mtime, 'machine': machine_name, 'files': files, 'subdirs': subdirs}
+
+        result['order'].extend(os.path.join(path, name) for name in files)
+        for name in subdirs:
+            self._scan(os.path.join(path, name), machine_name, known_dirs, known_files, result)
+
+    def _scan_share(self, folder_path, machine_name, known_dirs, known_files, deadline):
+        # Runs on its own thread and only reads the snapshots it is given, so a scan that is given up on
+        # (share not answering) cannot change the catalog when it returns later.
+        # A share whose top folder cannot be opened is tried again while the retry budget and time allow.
+        started = time.perf_counter()
+        for attempt in range(SHARE_ATTEMPTS):
+            result = {'dirs': {}, 'files': {}, 'order': [], 'changed_dates': set(), 'listed_dirs': 0, 'error': None,
+                      'active_from': (datetime.now() - timedelta(days=ACTIVE_DAYS - 1)).strftime('%Y%m%d')}
+            try:
+                os.stat(folder_path)
+            except OSError as e:
+                result['error'] = str(e)
+                if attempt + 1 < SHARE_ATTEMPTS and time.perf_counter() + SHARE_RETRY_DELAY < deadline:
+                    time.sleep(SHARE_RETRY_DELAY)
+                    continue
+                break
+            self._scan(folder_path, machine_name, known_dirs, known_files, result)
+            break
+        result['seconds'] = time.perf_counter() - started
+        return result
+
+    def _start_scan(self, folder_path, machine_name, known_dirs, known_files, deadline):
+        # Daemon thread rather than a thread pool: a scan stuck on a dead share must not keep the program from exiting
+        future = Future()
+
+        def run():
+            try:
+                future.set_result(self._scan_share(folder_path, machine_name, known_dirs, known_files, deadline))
+            except Exception as e:
+                future.set_exception(e)
+
+        threading.Thread(target=run, daemon=True).start()
+        return future
+
+    def _known_share(self, folder_path):
+        # (dirs, files) recorded for a share at its last successful scan
+        dirs, files, pending = {}, {}, [folder_path]
+        while pending:
+            path = pending.pop()
+            info = self.dirs.get(path)
+            if info is None:
+                continue
+            dirs[path] = info
+            for name in info['files']:
+                file_path = os.path.join(path, name)
+                if file_path in self.files:
+                    files[file_path] = self.files[file_path]
+            pending.extend(os.path.join(path, name) for name in info['subdirs'])
+        return dirs, files
+
+    def refresh(self, folder_info, timeout=SHARE_TIMEOUT):
+        # Bring the catalog up to date with the folders; unchanged directories are not re-listed.
+        # All shares are listed at once; a share that has not answered after `timeout` seconds is reported
+        # as unreachable in share_status and its files are left out until it answers again.
+        self.listed_dirs = 0
+        self.changed_dates = set()
+        deadline = time.perf_counter() + timeout
+        known_dirs, known_files = dict(self.dirs), dict(self.files)
+        selectable = set(self.order)
+        futures = []
+        for folder_path, machine_name in folder_info:
+            pending = self._pending.get((folder_path, machine_name))
+            if pending is not None and not pending.done():
+                # The scan started by an earlier refresh is still stuck; do not pile up another thread
+                futures.append((folder_path, machine_name, None))
+                continue
+            if pending is not None and pending.exception() is None and pending.result()['error'] is None:
+                # A scan an earlier refresh gave up on has finished since: its listing is used as it is, so a share
+                # slower than the timeout becomes selectable and the next refresh only re-lists what changed.
+                # Starting over without its directories would run into the timeout again.
+                del self._pending[(folder_path, machine_name)]
+                futures.append((folder_path, machine_name, pending))
+                continue
+            future = self._start_scan(folder_path, machine_name, known_dirs, known_files, deadline)
+            self._pending[(folder_path, machine_name)] = future
+            futures.append((folder_path, machine_name, future))
+
+        dirs, files, order, offline = {}, {}, [], {}
+        self.share_status = {}
+        for folder_path, machine_name, future in futures:
+            result, error = None, "still not answering since an earlier scan"
+            if future is not None:
+                try:
+                    result = future.result(timeout=max(0.0, deadline - time.perf_counter()))
+                    error = result['error']
+                except FutureTimeout:
+                    error = f"no answer within {timeout:g} s"
+                except Exception as e:
+                    error = str(e)
+
+            if result is None or result['error'] is not None:
+                # Keep what was known about the share so nothing has to be re-listed once it is back
+                self.share_status[folder_path] = {'machine': machine_name, 'status': 'unreachable', 'error': error,
+                                                  'seconds': result['seconds'] if result else None}
+                share_dirs, share_files = self._known_share(folder_path)
+                dirs.update(share_dirs)
+                offline.update(share_files)
+                # Its files are no longer selectable: days read while it was online must be read again without them
+                self.changed_dates.update(info['date'] for path, info in share_files.items() if path in selectable)
+                continue
+
+            self._pending.pop((folder_path, machine_name), None)
+            status = 'slow' if result['seconds'] > SHARE_SLOW_SECONDS else 'healthy'
+            self.share_status[folder_path] = {'machine': machine_name, 'status': status, 'error': None,
+                                              'seconds': result['seconds']}
+            dirs.update(result['dirs'])
+            files.update(result['files'])
+            order.extend(result['order'])
+            self.changed_dates |= result['changed_dates']
+            # Files of a share that was unreachable are selectable again: their days must be read again too
+            self.changed_dates.update(info['date'] for path, info in result['files'].items() if path not in selectable)
+            self.listed_dirs += result['listed_dirs']
+
+        self.dirs = dirs
+        self.order = [path for path in order if path in files]
+        current = set(self.order)
+        self.changed_dates.update(info['date'] for path, info in self.files.items()
+                                  if path not in current and path not in offline)
+        self.files = {path: info for path, info in files.items() if path in current}
+        self.files.update(offline)
+        self._build_indexes()
+        self.save()
+
+    def share_warnings(self):
+        # One line per share that was slow or did not answer during the last refresh
+        warnings = []
+        for folder_path, info in self.share_status.items():
+            if info['status'] == 'unreachable':
+                warnings.append(f"{info['machine']} unreachable ({folder_path}: {info['error']})")
+            elif info['status'] == 'slow':
+                warnings.append(f"{info['machine']} slow ({info['seconds']:.1f} s to list {folder_path})")
+        return warnings
+
+    def is_removed(self, path):
+        # True if `path` lies in a share the last refresh could list and the catalog no longer holds it.
+        # Answered from memory (no stat), so a share that is not answering cannot block the caller.
+        if path in self.files:
+            return False
+        path = os.path.normcase(os.path.abspath(path))
+        for folder_path, info in self.share_status.items():
+            folder_path = os.path.join(os.path.normcase(os.path.abspath(folder_path)), '')
+            if info['status'] != 'unreachable' and path.startswith(folder_path):
+                return True
+        return False
+
+    def available_dates(self):
+        return [datetime.strptime(date_str, '%Y%m%d').date() for date_str in sorted(self.by_date)]
+
+    def select(self, start_date=None, end_date=None, machines=None, programs=None):
+        # Returns [(file path, machine name)] in the same order get_csv_files would
+        start_str = start_date.strftime('%Y%m%d') if start_date is not None else None
+        end_str = end_date.strftime('%Y%m%d') if end_date is not None else None
+
+        selected = set()
+        for date_str, paths in self.by_date.items():
+            if (start_str is None or date_str >= start_str) and (end_str is None or date_str <= end_str):
+                selected |= paths
+        if machines is not None:
+            selected &= set().union(*(self.by_machine.get(name, set()) for name in machines))
+        if programs is not None:
+            selected &= set().union(*(self.by_program.get(name, set()) for name in programs))
+
+        return [(path, self.files[path]['machine']) for path in self.order if path in selected]
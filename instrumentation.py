@@ -0,0 +1,130 @@
+# instrumentation.py
+# Lightweight per-stage measurements (wall time, rows, bytes, peak memory) kept in the same
+# `timings` dict that merge_and_clean fills, under timings['stages']. Passing timings=None
+# turns every measurement into a no-op.
+import cProfile
+import json
+import logging
+import logging.handlers
+import os
+import sys
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+TIMING_LOG_MAX_BYTES = 1024 ** 2  # Rotate the JSON timing log at 1 MB
+TIMING_LOG_BACKUPS = 3
+
+
+def peak_memory_bytes():
+    # High-water mark of this process's memory, or None where it cannot be read
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == 'darwin' else peak * 1024  # kB on Linux, bytes on macOS
+    except ImportError:
+        pass
+    if sys.platform == 'win32':
+        import ctypes
+        from ctypes import wintypes
+
+        class PROCESS_MEMORY_COUNTERS(ctypes.Structure):
+            _fields_ = [('cb', wintypes.DWORD), ('PageFaultCount', wintypes.DWORD),
+                        ('PeakWorkingSetSize', ctypes.c_size_t), ('WorkingSetSize', ctypes.c_size_t),
+                        ('QuotaPeakPagedPoolUsage', ctypes.c_size_t), ('QuotaPagedPoolUsage', ctypes.c_size_t),
+                        ('QuotaPeakNonPagedPoolUsage', ctypes.c_size_t), ('QuotaNonPagedPoolUsage', ctypes.c_size_t),
+                        ('PagefileUsage', ctypes.c_size_t), ('PeakPagefileUsage', ctypes.c_size_t)]
+
+        counters = PROCESS_MEMORY_COUNTERS()
+        counters.cb = ctypes.sizeof(counters)
+        kernel32 = ctypes.windll.kernel32
+        kernel32.GetCurrentProcess.restype = wintypes.HANDLE
+        if ctypes.windll.psapi.GetProcessMemoryInfo(kernel32.GetCurrentProcess(), ctypes.byref(counters), counters.cb):
+            return counters.PeakWorkingSetSize
+    return None
+
+
+def add_stage(timings, name, seconds, **counts):
+    # Adds one measurement of stage `name`; counts (rows, bytes, files, ...) are summed over calls
+    if timings is None:
+        return
+    record = timings.setdefault('stages', {}).setdefault(name, {'seconds': 0.0, 'calls': 0})
+    record['seconds'] += seconds
+    record['calls'] += 1
+    for key, value in counts.items():
+        if value is not None:
+            record[key] = record.get(key, 0) + value
+    peak = peak_memory_bytes()
+    if peak is not None:
+        record['peak_memory'] = peak
+
+
+@contextmanager
+def stage(timings, name):
+    # with stage(timings, 'filter') as counts: ...; counts['rows'] = len(data)
+    counts = {}
+    started = time.perf_counter()
+    try:
+        yield counts
+    finally:
+        add_stage(timings, name, time.perf_counter() - started, **counts)
+
+
+def _format_bytes(value):
+    if value >= 1024 ** 3:
+        return f"{value / 1024 ** 3:.1f} GB"
+    if value >= 1024 ** 2:
+        return f"{value / 1024 ** 2:.1f} MB"
+    return f"{value / 1024:.0f} kB"
+
+
+def format_stages(timings):
+    # One status line: "scan 0.02s, load 3.10s (126,000 rows, 4.6 MB), ... | peak 512.0 MB"
+    stages = (timings or {}).get('stages', {})
+    parts = []
+    for name, record in stages.items():
+        details = []
+        if 'rows' in record:
+            details.append(f"{record['rows']:,} rows")
+        if 'bytes' in record:
+            details.append(_format_bytes(record['bytes']))
+        parts.append(f"{name} {record['seconds']:.2f}s" + (f" ({', '.join(details)})" if details else ""))
+    peaks = [record['peak_memory'] for record in stages.values() if 'peak_memory' in record]
+    if peaks:
+        parts.append(f"peak {_format_bytes(max(peaks))}")
+    return ', '.join(parts)
+
+
+def write_timing_log(path, timings, **context):
+    # Appends one JSON line per run to `path`, rotated at TIMING_LOG_MAX_BYTES
+    logger = logging.getLogger('partlog.timings.' + os.path.abspath(path))
+    if not logger.handlers:
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        handler = logging.handlers.RotatingFileHandler(path, maxBytes=TIMING_LOG_MAX_BYTES,
+                                                       backupCount=TIMING_LOG_BACKUPS, encoding='utf-8')
+        handler.setFormatter(logging.Formatter('%(message)s'))
+        logger.addHandler(handler)
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+    entry = {'time': datetime.now().isoformat(timespec='seconds')}
+    entry.update(context)
+    entry.update(timings or {})
+    logger.info(json.dumps(entry, default=str))
+
+
+@contextmanager
+def profiled(path):
+    # cProfile everything run in this thread inside the block and dump it to `path` (no-op if path is None).
+    # Open the dump with: python -m pstats <path>, or snakeviz
+    if not path:
+        yield
+        return
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        profiler.dump_stats(path)
+        print(f"Profile written to {path}")
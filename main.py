@@ -7,64 +7,188 @@
 # Ver1.6: 20250319 Correct formula to calculate Pickup Rate/ Error Count in case Filter by Part Name
 # Ver1.7: 20250319 Add advance filter. Change better GUI (theme)
 
-from FileHandler import get_csv_files, merge_and_clean
-from Chart_TopCountByPart import create_top_10_chart, get_top_10_worst_components
-from chart_utils import create_daily_error_pickup_chart
+import importlib
 import os
-import sys
-import pandas as pd
+from functools import partial
+import multiprocessing
+import queue
+import threading
+import time
 from tkinter import Tk, Frame, Label, Button, StringVar, BooleanVar, Entry, ttk
-from tkcalendar import DateEntry
-from datetime import datetime
-
-def read_folders_from_file(file_path="FolderAddress.txt"):
-    folder_info = []
-    if getattr(sys, 'frozen', False):
-        base_path = os.path.dirname(sys.executable)
-    else:
-        base_path = os.path.dirname(__file__)
-    full_path = os.path.join(base_path, file_path)
-    try:
-        with open(full_path, 'r') as file:
-            for line in file:
-                line = line.strip()
-                if line and ' ' in line:
-                    address, machine_name = line.rsplit(' ', 1)
-                    folder_info.append((address, machine_name))
-                else:
-                    print(f"Skipping invalid line in {file_path}: '{line}'")
-        return folder_info
-    except FileNotFoundError:
-        print(f"Error: {full_path} not found.")
-        return []
-
-def get_available_dates(folder_paths):
-    available_dates = set()
-    for folder, _ in folder_paths:
-        for root, _, files in os.walk(folder):
-            for file in files:
-                if file.startswith("PartsLog_") and file.endswith(".csv"):
-                    file_date_str = file.split('_')[-1][:8]
-                    try:
-                        file_date = datetime.strptime(file_date_str, '%Y%m%d').date()
-                        available_dates.add(file_date)
-                    except ValueError:
-                        print(f"Skipping file with unexpected date format: {file}")
-    return sorted(available_dates)
-
-def load_initial_data(folder_paths, start_date, end_date):
+from instrumentation import stage, format_stages, write_timing_log, profiled
+from autocomplete import Autocomplete
+
+# pandas, matplotlib, tkcalendar and the loaders take seconds to import, so they are imported on a
+# background thread after the window is shown (and by worker processes only when they need them)
+HEAVY_MODULES = ['pandas', 'tkcalendar', 'FileHandler', 'parse_cache', 'file_catalog', 'dataset_cache', 'rollup',
+                 'Chart_TopCountByPart', 'chart_utils', 'watch', 'drilldown', 'query',
+                 'value_index']
+
+# Number of processes used to parse log files that are not in the cache yet
+INGEST_WORKERS = max(1, min(8, (os.cpu_count() or 1) - 1))
+# Selections with more CSV bytes than this are streamed into running sums instead of loaded row by row
+STREAMING_THRESHOLD_BYTES = 1024 ** 3  # 1 GB
+# Live watch: how often the folders are checked for new rows
+WATCH_INTERVAL_MS = 60 * 1000
+# Set PARTLOG_TIMING_LOG to a file path (or to 1 for PartLogCache/timings.jsonl) to log the stage timings of every run
+TIMING_LOG_ENV = 'PARTLOG_TIMING_LOG'
+# Set PARTLOG_SERVER to the URL of an aggregation_server.py (http://host:8765) to query it instead of reading the folders
+SERVER_ENV = 'PARTLOG_SERVER'
+
+def preload_modules():
+    for name in HEAVY_MODULES:
+        importlib.import_module(name)
+
+# machine_filter / program_filter (query.ValueFilter) leave out the files of other machines and programs
+def select_files(folder_paths, start_date, end_date, catalog=None, machine_filter=None, program_filter=None):
+    if catalog is not None:
+        from query import select_files as select_catalog_files
+        return select_catalog_files(catalog, start_date, end_date, machine_filter, program_filter)
+
+    from FileHandler import get_csv_files
+    from file_catalog import parse_parts_log_name
     all_files = []
     for folder, machine_name in folder_paths:
+        if machine_filter is not None and not machine_filter.matches(machine_name):
+            continue
         files = get_csv_files([(folder, machine_name)], start_date, end_date)
+        if program_filter is not None:
+            files = [(file, machine) for file, machine in files
+                     if program_filter.matches(parse_parts_log_name(os.path.basename(file))[0])]
         all_files.extend(files)
+    return all_files
+
+def selection_bytes(files, catalog=None):
+    if catalog is not None:
+        return sum(catalog.files.get(file, {}).get('size', 0) for file, _ in files)
+    total = 0
+    for file, _ in files:
+        try:
+            total += os.path.getsize(file)
+        except OSError:
+            pass
+    return total
+
+def load_data(folder_paths, start_date, end_date, cache=None, catalog=None, timings=None, progress=None, cancel_event=None,
+              machine_filter=None, program_filter=None):
+    import pandas as pd
+    from FileHandler import merge_and_clean
+    all_files = select_files(folder_paths, start_date, end_date, catalog, machine_filter, program_filter)
     
     if all_files:
-        merged_data = merge_and_clean(all_files)
-        merged_data['Date'] = pd.to_datetime(merged_data['File Name'].apply(lambda x: x.split('_')[-1][:8]), format='%Y%m%d')
+        merged_data = merge_and_clean(all_files, cache, timings=timings, workers=INGEST_WORKERS,
+                                      progress=progress, cancel_event=cancel_event)
         filtered_data = merged_data[(merged_data['Date'] >= start_date) & (merged_data['Date'] <= end_date)]
         return filtered_data
     return pd.DataFrame()
 
+def check_filters(value_index, catalog, start_date, end_date, part_name=None, machine_filter=None, program_filter=None):
+    # (message explaining why the filters cannot match anything (with suggestions), whether it is certain),
+    # or None. Runs before loading, so a typo does not cost a full read and an empty chart.
+    # Machine and Program Names come from the folders and are certain, except for the machines (and so the
+    # programs) of shares that did not answer the last scan. Parts Names come from the value index of the
+    # last folder scan, which may not have seen rows written since, so that answer is not certain either.
+    unreachable = {info['machine'] for info in catalog.share_status.values() if info['status'] == 'unreachable'}
+    for column, value_filter, names in (('Machine Name', machine_filter, catalog.by_machine),
+                                        ('Program Name', program_filter, catalog.by_program)):
+        if value_filter is None or value_filter.resolve(names):
+            continue
+        offline = value_filter.resolve(unreachable) if column == 'Machine Name' else unreachable
+        if offline:
+            return (f"No {column} matches '{value_filter.text}' on the shares that answered; "
+                    f"{', '.join(sorted(offline))} could not be reached."), False
+        suggestions = value_index.suggest(column, value_filter.text.split(',')[-1].strip('*?[] '), 5)
+        hint = f" Did you mean: {', '.join(suggestions)}?" if suggestions else ""
+        return f"No {column} matches '{value_filter.text}'.{hint}", True
+
+    if part_name:
+        start_str, end_str = start_date.strftime('%Y%m%d'), end_date.strftime('%Y%m%d')
+        dates = [date_str for date_str in catalog.by_date if start_str <= date_str <= end_str]
+        if value_index.has_part(part_name, dates) is False:
+            suggestions = value_index.suggest('Parts Name', part_name, 5)
+            hint = f" Did you mean: {', '.join(suggestions)}?" if suggestions else ""
+            return (f"Parts Name '{part_name}' does not occur from {start_date:%Y-%m-%d} to {end_date:%Y-%m-%d} "
+                    f"as of the last folder scan.{hint}"), False
+    return None
+
+def with_share_warnings(status, catalog):
+    # Shares that were slow or did not answer during the last folder scan (of the FileCatalog, or of the
+    # server for an AggregationClient), appended to a status line
+    warnings = catalog.share_warnings() if catalog is not None else []
+    if not warnings:
+        return status
+    return (status + " | " if status else "") + "Warning: " + "; ".join(warnings)
+
+# Ingest health: outcome statuses recorded by the parse cache, as shown in the summary
+INGEST_STATUS_LABELS = {'quarantined': 'quarantined', 'error': 'unreadable', 'empty': 'without rows',
+                        'partial': 'still being written', 'bad_lines': 'with skipped lines',
+                        'fallback': 'read with the Python engine'}
+
+def ingest_summary(records):
+    # e.g. "3 files with skipped lines, 1 quarantined" for ParseCache.ingest_outcomes()
+    counts = {}
+    for record in records:
+        counts[record['status']] = counts.get(record['status'], 0) + 1
+    if not counts:
+        return "All log files were read without problems."
+    return ", ".join(f"{count} file{'s' if count != 1 else ''} {INGEST_STATUS_LABELS[status]}"
+                     for status, count in counts.items())
+
+def ingest_health_rows(records):
+    import pandas as pd
+    return pd.DataFrame([{
+        'Status': record['status'],
+        'File Name': os.path.basename(record['path']),
+        'Machine Name': record['machine'],
+        'Skipped Lines': record['bad_lines'],
+        'Rows': record['rows'],
+        'Engine': record['engine'],
+        'Problem': record['error'] or '',
+        'Checked': time.strftime('%Y-%m-%d %H:%M', time.localtime(record['checked'])),
+        'Path': record['path'],
+    } for record in records])
+
+def timing_log_path():
+    from FileHandler import get_base_path
+    path = os.environ.get(TIMING_LOG_ENV, '').strip()
+    if path in ('', '0'):
+        return None
+    if path == '1':
+        return os.path.join(get_base_path(), "PartLogCache", "timings.jsonl")
+    return path
+
+def discover_dates(startup_queue):
+    # Runs on a worker thread at startup: heavy imports, then the folder scan.
+    # The dates known from the last run are posted first so the date pickers fill in even while shares are slow.
+    try:
+        preload_modules()
+        server_url = os.environ.get(SERVER_ENV, '').strip()
+        if server_url:
+            # Thin client: the server owns the catalog, the parse cache and the rollups
+            from aggregation_server import AggregationClient
+            client = AggregationClient(server_url)
+            startup_queue.put(('ready', [], None, None, None, client.dates(), client))
+            return
+
+        from FileHandler import get_base_path, read_folders_from_file, get_available_dates
+        from parse_cache import ParseCache
+        from file_catalog import FileCatalog
+        from value_index import ValueIndex
+
+        folder_paths = read_folders_from_file()
+        parse_cache = ParseCache(os.path.join(get_base_path(), "PartLogCache"))
+        file_catalog = FileCatalog(os.path.join(get_base_path(), "PartLogCache", "catalog.json"))
+        known_dates = file_catalog.available_dates()
+        if known_dates:
+            startup_queue.put(('dates', known_dates))
+        available_dates = get_available_dates(folder_paths, file_catalog)
+        # Part/Machine/Program names for suggestions; only files cached since the last run are read
+        value_index = ValueIndex(os.path.join(get_base_path(), "PartLogCache", "values.json"))
+        value_index.refresh(file_catalog, parse_cache)
+        startup_queue.put(('ready', folder_paths, parse_cache, file_catalog, value_index, available_dates, None))
+    except Exception as e:
+        startup_queue.put(('error', str(e)))
+
 def main():
     root = Tk()
     root.title("Transtechnology Vietnam Co., Ltd. - Part Log Analyzer V1.7")
@@ -92,120 +216,511 @@ def main():
     style.configure('Custom.TLabelframe.Label', background='#1a1a1a', foreground='#ffffff')
     filter_frame.pack(fill='x', pady=15)
 
-    # Variables
-    folder_paths = read_folders_from_file()
-    available_dates = get_available_dates(folder_paths)
-
-    if available_dates:
-        start_date_var = StringVar(value=available_dates[0].strftime('%Y-%m-%d'))
-        end_date_var = StringVar(value=available_dates[-1].strftime('%Y-%m-%d'))
-        part_name_var = StringVar()
-        filter_part_var = BooleanVar(value=False)
-        machine_name_var = StringVar()
-        program_name_var = StringVar()
-
-        # Date selection
-        ttk.Label(filter_frame, text="Start Date:").grid(row=0, column=0, padx=15, pady=15, sticky='e')
-        start_date_entry = DateEntry(filter_frame, textvariable=start_date_var, width=15, background='#1abc9c', 
-                                     foreground='white', borderwidth=0, mindate=available_dates[0], maxdate=available_dates[-1])
-        start_date_entry.grid(row=0, column=1, padx=15, pady=15)
-
-        ttk.Label(filter_frame, text="End Date:").grid(row=0, column=2, padx=15, pady=15, sticky='e')
-        end_date_entry = DateEntry(filter_frame, textvariable=end_date_var, width=15, background='#1abc9c', 
-                                   foreground='white', borderwidth=0, mindate=available_dates[0], maxdate=available_dates[-1])
-        end_date_entry.grid(row=0, column=3, padx=15, pady=15)
-
-        # Parts Name filter
-        def toggle_part_name_entry():
-            state = "normal" if filter_part_var.get() else "disabled"
-            part_name_entry.config(state=state)
-            # Trực tiếp áp dụng màu khi disabled
-            if state == "disabled":
-                part_name_entry.configure(background='#666666', foreground='#999999')
-            else:
-                part_name_entry.configure(background='#ffffff', foreground='#000000')
-
-        ttk.Checkbutton(filter_frame, text="Filter by Parts Name", variable=filter_part_var, 
-                        command=toggle_part_name_entry).grid(row=1, column=0, padx=15, pady=15, sticky='e')
-        part_name_entry = ttk.Entry(filter_frame, textvariable=part_name_var, width=30, state="disabled")
-        part_name_entry.grid(row=1, column=1, padx=15, pady=15)
-        # Đảm bảo màu ban đầu khi disabled
-        part_name_entry.configure(background='#666666', foreground='#999999')
-
-        # Machine Name filter
-        ttk.Label(filter_frame, text="Machine Name:").grid(row=1, column=2, padx=15, pady=15, sticky='e')
-        machine_name_entry = ttk.Entry(filter_frame, textvariable=machine_name_var, width=30)
-        machine_name_entry.grid(row=1, column=3, padx=15, pady=15)
-
-        # Program Name filter
-        ttk.Label(filter_frame, text="Program Name:").grid(row=2, column=0, padx=15, pady=15, sticky='e')
-        program_name_entry = ttk.Entry(filter_frame, textvariable=program_name_var, width=30)
-        program_name_entry.grid(row=2, column=1, padx=15, pady=15)
-
-        # Frame cho nút
-        button_frame = Frame(main_frame, bg='#000000')
-        button_frame.pack(pady=30)
-
-        # Tải dữ liệu ban đầu
-        initial_start_date = pd.to_datetime(start_date_var.get())
-        initial_end_date = pd.to_datetime(end_date_var.get())
-        initial_data = load_initial_data(folder_paths, initial_start_date, initial_end_date)
-
-        def process_data():
-            start_date = pd.to_datetime(start_date_var.get())
-            end_date = pd.to_datetime(end_date_var.get())
-            selected_part = part_name_var.get().strip()
-            filter_by_part = filter_part_var.get()
-            selected_machine = machine_name_var.get().strip()
-            selected_program = program_name_var.get().strip()
-
-            all_files = []
-            for folder, machine_name in folder_paths:
-                files = get_csv_files([(folder, machine_name)], start_date, end_date)
-                all_files.extend(files)
-
-            if all_files:
-                merged_data = merge_and_clean(all_files)
-                merged_data['Date'] = pd.to_datetime(merged_data['File Name'].apply(lambda x: x.split('_')[-1][:8]), format='%Y%m%d')
-                filtered_data = merged_data[(merged_data['Date'] >= start_date) & (merged_data['Date'] <= end_date)]
-
-                # Áp dụng bộ lọc nâng cao
-                if filter_by_part and selected_part:
-                    filtered_data = filtered_data[filtered_data['Parts Name'] == selected_part]
-                if selected_machine:
-                    filtered_data = filtered_data[filtered_data['Machine Name'] == selected_machine]
-                if selected_program:
-                    filtered_data = filtered_data[filtered_data['Program Name'] == selected_program]
-
-                # Hiển thị biểu đồ
-                if not filtered_data.empty:
-                    if filter_by_part and selected_part:
-                        create_daily_error_pickup_chart(selected_part, filtered_data)
-                    else:
-                        top_10_worst_components = get_top_10_worst_components(filtered_data)
-                        create_top_10_chart(top_10_worst_components, filtered_data)
-                else:
-                    print("No data found after applying filters.")
-            else:
-                print("No CSV files found in the specified folders for the selected date range.")
+    # Variables (điền sau khi quét thư mục xong ở luồng nền)
+    folder_paths, parse_cache, file_catalog, session_dataset, value_index = [], None, None, None, None
+    aggregation_client = None
+    available_dates = []
+    start_date_var = StringVar()
+    end_date_var = StringVar()
+    part_name_var = StringVar()
+    filter_part_var = BooleanVar(value=False)
+    machine_name_var = StringVar()
+    program_name_var = StringVar()
+    start_date_entry = end_date_entry = None
+
+    # Date selection; the DateEntry widgets are created once the available dates are known
+    ttk.Label(filter_frame, text="Start Date:").grid(row=0, column=0, padx=15, pady=15, sticky='e')
+    ttk.Label(filter_frame, text="End Date:").grid(row=0, column=2, padx=15, pady=15, sticky='e')
+    date_placeholders = [ttk.Label(filter_frame, text="Scanning folders..."),
+                         ttk.Label(filter_frame, text="Scanning folders...")]
+    date_placeholders[0].grid(row=0, column=1, padx=15, pady=15)
+    date_placeholders[1].grid(row=0, column=3, padx=15, pady=15)
 
-        def reset_filters():
+    def set_date_bounds(dates):
+        nonlocal available_dates, start_date_entry, end_date_entry
+        previous_dates, available_dates = available_dates, dates
+        if start_date_entry is None:
+            from tkcalendar import DateEntry
+            for placeholder in date_placeholders:
+                placeholder.destroy()
             start_date_var.set(available_dates[0].strftime('%Y-%m-%d'))
             end_date_var.set(available_dates[-1].strftime('%Y-%m-%d'))
-            part_name_var.set("")
-            filter_part_var.set(False)
-            machine_name_var.set("")
-            program_name_var.set("")
-            toggle_part_name_entry()  # Gọi lại để cập nhật trạng thái và màu sắc
+            start_date_entry = DateEntry(filter_frame, textvariable=start_date_var, width=15, background='#1abc9c', 
+                                         foreground='white', borderwidth=0, mindate=available_dates[0], maxdate=available_dates[-1])
+            start_date_entry.grid(row=0, column=1, padx=15, pady=15)
+            end_date_entry = DateEntry(filter_frame, textvariable=end_date_var, width=15, background='#1abc9c', 
+                                       foreground='white', borderwidth=0, mindate=available_dates[0], maxdate=available_dates[-1])
+            end_date_entry.grid(row=0, column=3, padx=15, pady=15)
+        else:
+            # A later scan found more days: widen the bounds, keep the user's selection
+            for entry in (start_date_entry, end_date_entry):
+                entry.configure(mindate=available_dates[0], maxdate=available_dates[-1])
+            if previous_dates and end_date_var.get() == previous_dates[-1].strftime('%Y-%m-%d'):
+                # Still on the last day of the previous scan: move on to the new last day
+                end_date_var.set(available_dates[-1].strftime('%Y-%m-%d'))
+
+    # Parts Name filter
+    def toggle_part_name_entry():
+        state = "normal" if filter_part_var.get() else "disabled"
+        part_name_entry.config(state=state)
+        # Trực tiếp áp dụng màu khi disabled
+        if state == "disabled":
+            part_name_entry.configure(background='#666666', foreground='#999999')
+        else:
+            part_name_entry.configure(background='#ffffff', foreground='#000000')
+
+    ttk.Checkbutton(filter_frame, text="Filter by Parts Name", variable=filter_part_var, 
+                    command=toggle_part_name_entry).grid(row=1, column=0, padx=15, pady=15, sticky='e')
+    part_name_entry = ttk.Entry(filter_frame, textvariable=part_name_var, width=30, state="disabled")
+    part_name_entry.grid(row=1, column=1, padx=15, pady=15)
+    # Đảm bảo màu ban đầu khi disabled
+    part_name_entry.configure(background='#666666', foreground='#999999')
+
+    # Machine Name filter
+    ttk.Label(filter_frame, text="Machine Name:").grid(row=1, column=2, padx=15, pady=15, sticky='e')
+    machine_name_entry = ttk.Entry(filter_frame, textvariable=machine_name_var, width=30)
+    machine_name_entry.grid(row=1, column=3, padx=15, pady=15)
+
+    # Program Name filter
+    ttk.Label(filter_frame, text="Program Name:").grid(row=2, column=0, padx=15, pady=15, sticky='e')
+    program_name_entry = ttk.Entry(filter_frame, textvariable=program_name_var, width=30)
+    program_name_entry.grid(row=2, column=1, padx=15, pady=15)
+
+    # Gợi ý khi gõ, từ chỉ mục giá trị (có sau khi quét thư mục xong)
+    def suggestions_for(column):
+        return lambda text: value_index.suggest(column, text) if value_index is not None else []
+
+    Autocomplete(part_name_entry, part_name_var, suggestions_for('Parts Name'))
+    Autocomplete(machine_name_entry, machine_name_var, suggestions_for('Machine Name'), multiple=True)
+    Autocomplete(program_name_entry, program_name_var, suggestions_for('Program Name'), multiple=True)
+
+    # Frame cho nút
+    button_frame = Frame(main_frame, bg='#000000')
+    button_frame.pack(pady=30)
+
+    # Tiến trình tải dữ liệu
+    progress_frame = Frame(main_frame, bg='#000000')
+    progress_frame.pack(fill='x', padx=15)
+    progress_bar = ttk.Progressbar(progress_frame, mode='determinate', length=600)
+    progress_bar.pack(pady=5)
+    status_var = StringVar(value="")
+    ttk.Label(progress_frame, textvariable=status_var).pack(pady=5)
+    # Thời gian từng bước của lần chạy gần nhất (scan, read, filter, aggregate, render, bộ nhớ đỉnh)
+    stage_var = StringVar(value="")
+    ttk.Label(progress_frame, textvariable=stage_var).pack(pady=5)
+    profile_next_var = BooleanVar(value=False)
+    watch_var = BooleanVar(value=False)
+
+    load_queue = queue.Queue()
+    cancel_event = threading.Event()
+    loading = False
+    overridable_warning = None  # Filter warning shown by the last Process Data, loaded anyway if pressed again
+    render_profile_path = None  # Profile of the chart rendering of the run being profiled (drawn on this thread)
+    # Live watch: what the open chart shows (data, range, filters, figure) and the watcher following its files
+    live_view = None
+    watcher = None
+    watch_queue = queue.Queue()
+    watch_busy = False
+    watch_job = None
+
+    def load_and_aggregate(start_date, end_date, selected_part, filter_by_part, selected_machine, selected_program,
+                           profile_path=None):
+        # Runs on a worker thread; the result is handed back to the Tk main loop through load_queue
+        import pandas as pd
+        from FileHandler import format_timings, LoadCancelled
+        from rollup import load_rollups, stream_rollups
+        from Chart_TopCountByPart import create_top_10_chart, get_top_10_worst_components
+        from chart_utils import create_daily_error_pickup_chart
+        from drilldown import DrillDownIndex
+        from query import parse_filter, filter_rows
+        started = time.perf_counter()
+        timings = {}
+
+        def report_progress(files_done, files_total, rows_done):
+            elapsed = time.perf_counter() - started
+            load_queue.put(('progress', files_done, files_total, rows_done, elapsed))
+
+        # Machine/Program Name accept several values separated by commas and wildcards (NXT0*, PRG_?)
+        machine_filter = parse_filter(selected_machine)
+        program_filter = parse_filter(selected_program)
+
+        def apply_filters(data):
+            if filter_by_part and selected_part:
+                data = data[data['Parts Name'] == selected_part]
+            return filter_rows(data, machine_filter, program_filter)
+
+        status, chart, view = "", None, None
+        try:
+            # profile_path is only set for the one run the user asked to profile
+            with profiled(profile_path):
+                filtered_data = None
+                if aggregation_client is not None:
+                    # Thin client: the server scans the shares and parses the logs; only rollup rows come back
+                    with stage(timings, 'read') as counts:
+                        filtered_data = aggregation_client.rollup(start_date, end_date, selected_machine, selected_program,
+                                                                  selected_part if filter_by_part else None)
+                        counts['rows'] = len(filtered_data)
+                    status = f"{len(filtered_data):,} rollup rows from {aggregation_client.base_url}"
+                else:
+                    # Pick up files written since the last click; only changed directories are re-listed
+                    with stage(timings, 'scan') as counts:
+                        file_catalog.refresh(folder_paths)
+                        session_dataset.invalidate(pd.to_datetime(sorted(file_catalog.changed_dates), format='%Y%m%d'))
+                        # Only files of the machines/programs passing the filters are read
+                        all_files = select_files(folder_paths, start_date, end_date, file_catalog,
+                                                 machine_filter, program_filter)
+                        counts['files'] = len(all_files)
+                        counts['unreachable'] = sum(info['status'] == 'unreachable'
+                                                    for info in file_catalog.share_status.values())
+
+                    if all_files:
+                        with stage(timings, 'read') as counts:
+                            csv_bytes = selection_bytes(all_files, file_catalog)
+                            if csv_bytes > STREAMING_THRESHOLD_BYTES:
+                                # Too many rows to hold at once: fold the files into rollup sums chunk by chunk.
+                                # The charts give the same numbers; the detail table then lists rollup rows.
+                                filtered_data = stream_rollups(all_files, parse_cache, INGEST_WORKERS, timings,
+                                                               report_progress, cancel_event)
+                                status = "Streamed: " + format_timings(timings)
+                            elif filter_by_part and selected_part:
+                                # The daily chart only needs sums, so it is served from the per-file rollups
+                                filtered_data = load_rollups(all_files, parse_cache, INGEST_WORKERS, timings,
+                                                             report_progress, cancel_event)
+                                status = format_timings(timings) if 'files' in timings else f"{len(filtered_data)} rollup rows loaded"
+                            elif ((machine_filter is not None or program_filter is not None)
+                                  and not session_dataset.covers(start_date, end_date)):
+                                # The session cache holds whole days of every machine; a filtered load reads only
+                                # the selected files and is not cached
+                                filtered_data = load_data(folder_paths, start_date, end_date, parse_cache, file_catalog, timings,
+                                                          report_progress, cancel_event, machine_filter, program_filter)
+                                status = format_timings(timings) if 'files' in timings else f"{len(filtered_data)} rows loaded"
+                            else:
+                                # Only days that are not in the session cache yet are read from disk
+                                filtered_data = session_dataset.get(
+                                    start_date, end_date,
+                                    lambda start, end: load_data(folder_paths, start, end, parse_cache, file_catalog, timings,
+                                                                 report_progress, cancel_event))
+                                status = format_timings(timings) if 'files' in timings else f"{len(filtered_data)} rows served from the session cache"
+                            counts['rows'] = len(filtered_data)
+                            counts['bytes'] = csv_bytes
+
+                        # Part names of the files parsed by this load become suggestions
+                        with stage(timings, 'values'):
+                            value_index.refresh(file_catalog, parse_cache)
+                    else:
+                        status = "No CSV files found in the specified folders for the selected date range."
+
+                if filtered_data is not None:
+                    # Áp dụng bộ lọc nâng cao
+                    with stage(timings, 'filter') as counts:
+                        filtered_data = apply_filters(filtered_data)
+                        counts['rows'] = len(filtered_data)
+
+                    if not filtered_data.empty:
+                        if filter_by_part and selected_part:
+                            chart = (create_daily_error_pickup_chart, selected_part, filtered_data)
+                        else:
+                            top_10_worst_components = get_top_10_worst_components(filtered_data, timings)
+                            # Bar clicks become lookups in an index built once here, off the Tk thread
+                            with stage(timings, 'index') as counts:
+                                drilldown = DrillDownIndex(filtered_data)
+                                counts['rows'] = len(filtered_data)
+                            chart = (partial(create_top_10_chart, index=drilldown), top_10_worst_components, filtered_data)
+                        view = {'data': filtered_data, 'start': start_date, 'end': end_date, 'filter': apply_filters,
+                                'machines': machine_filter, 'programs': program_filter,
+                                'part': selected_part if filter_by_part else None}
+                    else:
+                        status = "No data found after applying filters."
+        except LoadCancelled:
+            status = "Loading cancelled."
+        except Exception as e:
+            status = f"Error while loading data: {e}"
+        load_queue.put(('done', with_share_warnings(status, aggregation_client or file_catalog), chart, timings, view))
+
+    def report_stages(status, timings):
+        # Runs once the chart has been built, so the render stage is included
+        stage_var.set(format_stages(timings))
+        log_path = timing_log_path()
+        if log_path:
+            write_timing_log(log_path, timings, status=status)
+
+    def poll_load_queue():
+        nonlocal loading, live_view, watcher, render_profile_path
+        while True:
+            try:
+                message = load_queue.get_nowait()
+            except queue.Empty:
+                break
+
+            if message[0] == 'progress':
+                _, files_done, files_total, rows_done, elapsed = message
+                progress_bar.configure(maximum=max(files_total, 1), value=files_done)
+                rows_per_second = rows_done / elapsed if elapsed > 0 else 0
+                eta = elapsed / files_done * (files_total - files_done) if files_done else 0
+                status_var.set(f"{files_done}/{files_total} files, {rows_per_second:,.0f} rows/s, ETA {eta:.0f}s")
+            else:
+                _, status, chart, timings, view = message
+                print(status)
+                status_var.set(status)
+                process_button.config(state='normal')
+                cancel_button.config(state='disabled')
+                loading = False
+                # The load re-scanned the folders; new days become selectable
+                if file_catalog is not None and file_catalog.by_date:
+                    set_date_bounds(file_catalog.available_dates())
+                # Hiển thị biểu đồ (chỉ trên main thread)
+                if chart is not None:
+                    from chart_utils import show_figure
+                    with profiled(render_profile_path):
+                        fig = chart[0](*chart[1:], show=False, timings=timings)
+                        if fig is not None:
+                            show_figure(fig)
+                            if render_profile_path:
+                                fig.canvas.draw()  # Otherwise drawn later from the event loop, outside the profile
+                    if fig is not None:
+                        # A range that ends on the newest day keeps following new days while watching
+                        if view['end'].date() >= available_dates[-1]:
+                            view['end'] = None
+                        live_view = dict(view, fig=fig)
+                        watcher = None
+                        if watch_var.get():
+                            schedule_watch(0)
+                render_profile_path = None
+                report_stages(status, timings)
+                return
+        root.after(100, poll_load_queue)
+
+    def schedule_watch(delay=WATCH_INTERVAL_MS):
+        nonlocal watch_job
+        if watch_job is not None:
+            root.after_cancel(watch_job)
+        watch_job = root.after(delay, watch_tick)
+
+    def toggle_watch():
+        nonlocal watcher
+        watcher = None  # Start from what is on screen now
+        if aggregation_client is not None and watch_var.get():
+            watch_var.set(False)
+            status_var.set("Live watch reads the folders directly and is not available with an aggregation server.")
+            return
+        if watch_var.get():
+            schedule_watch(0)
+        elif watch_job is not None:
+            root.after_cancel(watch_job)
+
+    def watch_tick():
+        nonlocal watch_job, watch_busy
+        watch_job = None
+        if not watch_var.get() or live_view is None:
+            return
+        if loading or watch_busy:
+            schedule_watch()
+            return
+        # The watcher re-lists the folders through the shared catalog, so no load may start meanwhile
+        watch_busy = True
+        process_button.config(state='disabled')
+        threading.Thread(target=watch_poll, args=(watcher, live_view), daemon=True).start()
+        root.after(100, poll_watch_queue)
+
+    def watch_poll(current, view):
+        # Runs on a worker thread: parse only new/grown files and recompute the chart data from the running sums
+        from watch import LogWatcher
+        from data_processing import get_top_10_worst_components
+        from chart_utils import create_top_10_chart, create_daily_error_pickup_chart
+        from drilldown import DrillDownIndex
+        try:
+            if current is None:
+                current = LogWatcher(folder_paths, file_catalog, view['data'], view['start'], view['end'], view['filter'],
+                                     view['machines'], view['programs'], parse_cache)
+                watch_queue.put(('polled', current, 0, set(), None))
+                return
+            new_rows, changed_dates = current.poll()
+            redraw = None
+            if not new_rows.empty:
+                rollup = current.rollup
+                if view['part']:
+                    redraw = partial(create_daily_error_pickup_chart, view['part'], rollup)
+                else:
+                    redraw = partial(create_top_10_chart, get_top_10_worst_components(rollup), rollup,
+                                     index=DrillDownIndex(rollup))
+            watch_queue.put(('polled', current, len(new_rows), changed_dates, redraw))
+        except Exception as e:
+            watch_queue.put(('error', str(e)))
+
+    def poll_watch_queue():
+        nonlocal watcher, watch_busy
+        try:
+            message = watch_queue.get_nowait()
+        except queue.Empty:
+            root.after(100, poll_watch_queue)
+            return
+
+        watch_busy = False
+        if not loading:
+            process_button.config(state='normal')
+        if message[0] == 'error':
+            status_var.set(f"Live watch error: {message[1]}")
+        else:
+            import pandas as pd
+            from chart_utils import is_open
+            _, current, new_row_count, changed_dates, redraw = message
+            if watch_var.get() and live_view is not None:
+                watcher = current
+            # Những ngày có dữ liệu mới phải đọc lại từ đĩa ở lần "Process Data" sau
+            session_dataset.invalidate(pd.to_datetime(sorted(changed_dates), format='%Y%m%d'))
+            if redraw is not None and is_open(live_view['fig']):
+                redraw(fig=live_view['fig'])
+            status = f"Live watch: {new_row_count:,} new rows at {time.strftime('%H:%M:%S')}"
+            if current.rewritten:
+                status += f"; {len(current.rewritten)} files were rewritten, click Process Data to reload them"
+            status_var.set(with_share_warnings(status, file_catalog))
+        if watch_var.get():
+            schedule_watch()
+
+    def process_data():
+        nonlocal loading, overridable_warning, render_profile_path
+        import pandas as pd
+        from FileHandler import get_base_path
+        start_date = pd.to_datetime(start_date_var.get())
+        end_date = pd.to_datetime(end_date_var.get())
+        selected_part = part_name_var.get().strip()
+        filter_by_part = filter_part_var.get()
+        selected_machine = machine_name_var.get().strip()
+        selected_program = program_name_var.get().strip()
+        profile_path = None
+        if profile_next_var.get():
+            # Chỉ profile một lần chạy
+            profile_path = os.path.join(get_base_path(), "PartLogCache",
+                                        f"profile_{time.strftime('%Y%m%d_%H%M%S')}.prof")
+            profile_next_var.set(False)
+        # The load runs on a worker thread and the chart is drawn on this one: each gets its own dump
+        render_profile_path = profile_path[:-len('.prof')] + "_render.prof" if profile_path else None
+
+        # Kiểm tra bộ lọc trước khi đọc dữ liệu
+        from query import parse_filter
+        problem = None
+        if value_index is not None:
+            problem = check_filters(value_index, file_catalog, start_date, end_date,
+                                    selected_part if filter_by_part else None,
+                                    parse_filter(selected_machine), parse_filter(selected_program))
+        if problem:
+            message, certain = problem
+            # A warning that may be out of date lets the user load anyway by pressing Process Data again
+            if certain or message != overridable_warning:
+                overridable_warning = None if certain else message
+                status_var.set(message if certain else message + " Press Process Data again to load anyway.")
+                return
+        overridable_warning = None
+
+        cancel_event.clear()
+        loading = True
+        process_button.config(state='disabled')
+        cancel_button.config(state='normal')
+        progress_bar.configure(value=0)
+        status_var.set("Scanning folders...")
+        stage_var.set("")
+        threading.Thread(target=load_and_aggregate, daemon=True,
+                         args=(start_date, end_date, selected_part, filter_by_part, selected_machine, selected_program,
+                               profile_path)).start()
+        root.after(100, poll_load_queue)
+
+    def show_ingest_health():
+        # Per-file outcomes of the parses that did not go cleanly (see ParseCache.record_outcome)
+        if aggregation_client is not None:
+            status_var.set("Ingest health is kept by the aggregation server (see /health).")
+            return
+        if parse_cache is None or loading:
+            status_var.set("Ingest health is available once the current scan or load has finished.")
+            return
+        from tkinter import Toplevel
+        from table_view import VirtualTable
+        records = parse_cache.ingest_outcomes(file_catalog)
+        window = Toplevel(root)
+        window.title("Ingest Health")
+        window.geometry("1200x500")
+        header = Frame(window)
+        header.pack(side='top', fill='x')
+        ttk.Label(header, text=ingest_summary(records)).pack(side='left', padx=10, pady=5)
+
+        def retry_quarantined():
+            released = parse_cache.release_quarantine()
+            parse_cache.save()
+            window.destroy()
+            status_var.set(f"{released} quarantined files will be read again on the next load.")
+
+        if any(record['status'] == 'quarantined' for record in records):
+            ttk.Button(header, text="Retry Quarantined", command=retry_quarantined).pack(side='right', padx=10, pady=5)
+        if records:
+            VirtualTable(window, ingest_health_rows(records)).pack(side='top', fill='both', expand=True)
+
+    def cancel_processing():
+        cancel_event.set()
+        status_var.set("Cancelling...")
+
+    def reset_filters():
+        if not available_dates:
+            return
+        start_date_var.set(available_dates[0].strftime('%Y-%m-%d'))
+        end_date_var.set(available_dates[-1].strftime('%Y-%m-%d'))
+        part_name_var.set("")
+        filter_part_var.set(False)
+        machine_name_var.set("")
+        program_name_var.set("")
+        toggle_part_name_entry()  # Gọi lại để cập nhật trạng thái và màu sắc
+
+    # Nút Process và Reset
+    process_button = ttk.Button(button_frame, text="Process Data", command=process_data, state='disabled')
+    process_button.pack(side='left', padx=15)
+    ttk.Button(button_frame, text="Reset Filters", command=reset_filters).pack(side='left', padx=15)
+    cancel_button = ttk.Button(button_frame, text="Cancel", command=cancel_processing, state='disabled')
+    cancel_button.pack(side='left', padx=15)
+    ttk.Checkbutton(button_frame, text="Profile next run", variable=profile_next_var).pack(side='left', padx=15)
+    ttk.Checkbutton(button_frame, text="Live watch", variable=watch_var, command=toggle_watch).pack(side='left', padx=15)
+    ttk.Button(button_frame, text="Ingest Health", command=show_ingest_health).pack(side='left', padx=15)
+
+    # Khởi động: cửa sổ hiện ngay, import và quét thư mục chạy ở luồng nền; chưa đọc dữ liệu cho đến khi bấm "Process Data"
+    startup_queue = queue.Queue()
+
+    def poll_startup():
+        nonlocal folder_paths, parse_cache, file_catalog, session_dataset, value_index, aggregation_client
+        while True:
+            try:
+                message = startup_queue.get_nowait()
+            except queue.Empty:
+                break
+
+            if message[0] == 'dates':
+                set_date_bounds(message[1])
+                status_var.set("Checking the folders for new log files...")
+            elif message[0] == 'ready':
+                _, folder_paths, parse_cache, file_catalog, value_index, dates, aggregation_client = message
+                from dataset_cache import SessionDataset
+                session_dataset = SessionDataset()
+                if dates:
+                    set_date_bounds(dates)
+                    process_button.config(state='normal')
+                    status_var.set(with_share_warnings(
+                        f"Log files found for {len(dates)} days ({dates[0]:%Y-%m-%d} to {dates[-1]:%Y-%m-%d}).",
+                        aggregation_client or file_catalog))
+                else:
+                    print("No available dates found. Please ensure there are CSV files in the specified folders.")
+                    status_var.set(with_share_warnings(
+                        "No available dates found. Please ensure there are CSV files in the specified folders.",
+                        aggregation_client or file_catalog))
+                return
+            else:
+                print(f"Error while scanning folders: {message[1]}")
+                status_var.set(f"Error while scanning folders: {message[1]}")
+                return
+        root.after(100, poll_startup)
 
-        # Nút Process và Reset
-        ttk.Button(button_frame, text="Process Data", command=process_data).pack(side='left', padx=15)
-        ttk.Button(button_frame, text="Reset Filters", command=reset_filters).pack(side='left', padx=15)
+    status_var.set("Scanning folders...")
+    threading.Thread(target=discover_dates, args=(startup_queue,), daemon=True).start()
+    root.after(100, poll_startup)
 
-    else:
-        print("No available dates found. Please ensure there are CSV files in the specified folders.")
 
     root.mainloop()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    multiprocessing.freeze_support()  # Needed for the process pool in the frozen .exe
+    main()
@@ -0,0 +1,67 @@
+# metrics.py
+# Error/good/pickup-rate metrics for any grouping of PartsLog rows (raw rows or rollups).
+# Every function sums the counters in a single groupby pass and never modifies its input.
+import numpy as np
+import pandas as pd
+
+SUM_COLUMNS = ['Consumption', 'Pick Error Counter', 'Vision Error Counter', 'Nozzle Error Counter',
+               'Coplanarity Error Counter', 'No Parts Error Counter']
+ERROR_COLUMNS = ['Pick Error Counter', 'Vision Error Counter', 'Nozzle Error Counter', 'Coplanarity Error Counter']
+
+
+def add_rates(sums):
+    # Derived metrics from summed counters; returns a new frame.
+    # Sums of the compact int32 counters are widened first so the derived columns cannot overflow.
+    result = sums.astype({col: 'int64' for col in sums.columns if pd.api.types.is_integer_dtype(sums[col].dtype)})
+    no_parts = result['No Parts Error Counter'] if 'No Parts Error Counter' in result.columns else 0
+
+    # Total Errors: pick errors net of "no parts" plus vision, nozzle and coplanarity errors (top-N, per-program)
+    result['Total Errors'] = (result['Pick Error Counter'] - no_parts + result['Vision Error Counter'] +
+                              result['Nozzle Error Counter'] + result['Coplanarity Error Counter'])
+    # Pickup Errors: same without nozzle errors (daily pickup-rate chart)
+    result['Pickup Errors'] = (result['Pick Error Counter'] + result['Vision Error Counter'] +
+                               result['Coplanarity Error Counter'] - no_parts)
+    result['Valid Consumption'] = result['Consumption'] - no_parts
+
+    consumption = result['Consumption']
+    with np.errstate(divide='ignore', invalid='ignore'):
+        result['Error Rate'] = np.where(consumption > 0, result['Total Errors'] / consumption * 100, 0.0)
+        result['Pickup Rate'] = 100 - (result['Pickup Errors'] / result['Valid Consumption'] * 100)
+    result['Good Rate'] = 100 - result['Error Rate']
+    return result
+
+
+def summarize(data, keys, consumed_only=False):
+    # Sums and rates per value of `keys`; consumed_only keeps rows with Consumption > 0 like the charts do
+    if consumed_only:
+        data = data[data['Consumption'] > 0]
+    columns = [col for col in SUM_COLUMNS if col in data.columns]
+    sums = data.groupby(keys, observed=True)[columns].sum()
+    return add_rates(sums).reset_index()
+
+
+def top_components(data, n=20):
+    # Worst Parts Name / Machine Name pairs by Total Errors over all rows, with the Good Rate
+    # over the rows that consumed parts. One groupby pass serves both.
+    keys = ['Parts Name', 'Machine Name']
+    columns = [col for col in SUM_COLUMNS if col in data.columns]
+    consumed = (data['Consumption'] > 0).rename('Consumed')
+    sums = data.groupby(keys + [consumed], observed=True)[columns].sum()
+
+    totals = add_rates(sums.groupby(level=keys, observed=True).sum())
+    consumed_sums = sums[sums.index.get_level_values('Consumed')].droplevel('Consumed')
+    good_rates = add_rates(consumed_sums)['Good Rate'].reindex(totals.index, fill_value=100.0)
+    totals['Good Rate'] = good_rates
+
+    totals = totals.reset_index()
+    return totals.sort_values(by='Total Errors', ascending=False).head(n)
+
+
+def daily_pickup(data):
+    # (Pickup Errors per Date x Machine Name, per-Date sums and Pickup Rate) for the daily chart
+    data = data[data['Consumption'] > 0]
+    columns = [col for col in SUM_COLUMNS if col in data.columns]
+    sums = data.groupby(['Date', 'Machine Name'], observed=True)[columns].sum()
+    daily_machine = add_rates(sums)['Pickup Errors'].unstack(fill_value=0)
+    daily = add_rates(sums.groupby(level='Date').sum()).reset_index()
+    return daily_machine, daily
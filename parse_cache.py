@@ -0,0 +1,434 @@
+# parse_cache.py
+# On-disk cache of parsed PartsLog frames so unchanged log files are not re-read on every "Process Data".
+# Each file is stored as a Parquet file together with its daily rollup (see rollup.py); an index
+# (index.json) maps the source path to its size/mtime, the machine name it was parsed with and the
+# last time it was used (for LRU eviction).
+# A file cached while it was still being written also keeps the byte offset its parse stopped at, so the
+# next load only parses what was appended (see resume()). The index also holds the outcome of every parse
+# that ran into trouble (skipped lines, a last line still being written, a wrong header, a parse error);
+# unusable files are quarantined and not parsed again until they change.
+# Writing the Parquet files takes longer than parsing, so put() only queues them: they are written on a
+# background thread once the load is done (see save()) and their entry is added to the index when written.
+# A first, uncached load therefore takes about as long as one without the cache.
+import atexit
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+from FileHandler import SETTLED_SECONDS
+from rollup import build_rollup
+
+CACHE_VERSION = 4
+DEFAULT_MAX_BYTES = 2 * 1024 ** 3  # 2 GB
+INDEX_FILE = "index.json"
+# Outcome statuses, worst first
+OUTCOME_STATUSES = ['quarantined', 'error', 'empty', 'partial', 'bad_lines', 'fallback']
+
+
+def _file_key(path):
+    return hashlib.sha1(os.path.normcase(os.path.abspath(path)).encode('utf-8')).hexdigest()
+
+
+def _resumable(entry, stat, machine_name):
+    # An entry of a file that was still being written, which has since grown or settled (see resume())
+    if entry.get('offset') is None or entry['machine'] != machine_name or stat.st_size < entry['offset']:
+        return False
+    unchanged = entry['size'] == stat.st_size and entry['mtime'] == stat.st_mtime
+    return not unchanged or time.time() - stat.st_mtime >= SETTLED_SECONDS
+
+
+def _outcome_status(outcome):
+    if outcome.get('quarantine'):
+        return 'quarantined'
+    if outcome.get('error'):
+        return 'error'
+    if outcome.get('empty'):
+        return 'empty'
+    if outcome.get('truncated'):
+        return 'partial'
+    if outcome.get('bad_lines'):
+        return 'bad_lines'
+    if outcome.get('engine') == 'python':
+        return 'fallback'
+    return 'ok'
+
+
+class ParseCache:
+    def __init__(self, cache_dir, max_bytes=DEFAULT_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.entries = {}
+        # key -> outcome of the last parse of a file that did not go cleanly (see record_outcome)
+        self.outcomes = {}
+        self.enabled = True
+        self.hits = 0
+        self.misses = 0
+        self._dirty = False
+        self._writer = None
+        # key -> (frame, index entry, Future of the bytes written or None while queued) of put()s not written yet
+        self._pending = {}
+
+        try:
+            import pyarrow  # noqa: F401  (Parquet engine)
+        except ImportError:
+            print("pyarrow is not installed; parsed-file cache is disabled.")
+            self.enabled = False
+            return
+
+        os.makedirs(cache_dir, exist_ok=True)
+        self._load_index()
+
+    def _index_path(self):
+        return os.path.join(self.cache_dir, INDEX_FILE)
+
+    def _data_path(self, key):
+        return os.path.join(self.cache_dir, key + ".parquet")
+
+    def _load_index(self):
+        try:
+            with open(self._index_path(), 'r', encoding='utf-8') as f:
+                index = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return
+        if index.get('version') != CACHE_VERSION:
+            # Old layout: start over, stale data files are removed on the next eviction pass
+            self._clear_data_files()
+            return
+        self.entries = index.get('entries', {})
+        self.outcomes = index.get('outcomes', {})
+
+    def _clear_data_files(self):
+        for name in os.listdir(self.cache_dir):
+            if name.endswith(".parquet"):
+                try:
+                    os.remove(os.path.join(self.cache_dir, name))
+                except OSError:
+                    pass
+
+    def _rollup_path(self, key):
+        return os.path.join(self.cache_dir, key + ".rollup.parquet")
+
+    def _drop(self, key):
+        self.entries.pop(key, None)
+        for data_path in (self._data_path(key), self._rollup_path(key)):
+            for path in (data_path, data_path + ".tmp"):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+        self._dirty = True
+
+    def _write_files(self, key, df):
+        # Runs on the writer thread; files are replaced whole, so a reader never sees a half-written one
+        written = 0
+        for data_path, frame in ((self._data_path(key), df), (self._rollup_path(key), build_rollup(df))):
+            tmp_path = data_path + ".tmp"
+            frame.to_parquet(tmp_path, index=False)
+            os.replace(tmp_path, data_path)
+            written += os.path.getsize(data_path)
+        return written
+
+    def _start_writes(self):
+        queued = [key for key, (_, _, future) in self._pending.items() if future is None]
+        if not queued:
+            return
+        if self._writer is None:
+            self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix='parse-cache')
+            # The writer thread finishes its queue before the interpreter exits; the index is saved after it
+            atexit.register(self.flush)
+        for key in queued:
+            df, entry, _ = self._pending[key]
+            self._pending[key] = (df, entry, self._writer.submit(self._write_files, key, df))
+
+    def _collect(self, key=None, wait=False):
+        # Adds the entries of finished writes to the index; wait=True waits for them (only for `key` if given)
+        if wait and (key is None or key in self._pending):
+            self._start_writes()
+        collected = False
+        for write_key, (_, entry, future) in list(self._pending.items()):
+            if (key is not None and write_key != key) or future is None or not (wait or future.done()):
+                continue
+            del self._pending[write_key]
+            try:
+                entry['bytes'] = future.result()
+            except Exception as e:
+                # e.g. mixed-type object columns that Parquet cannot store; the file is simply parsed again next time
+                print(f"Could not cache {entry['path']}: {e}")
+                self._drop(write_key)
+                continue
+            self.entries[write_key] = entry
+            self._dirty = collected = True
+        if collected:
+            self._evict()
+
+    def flush(self):
+        # Waits for the Parquet files still being written and saves the index
+        self._collect(wait=True)
+        self.save()
+
+    def total_bytes(self):
+        return sum(entry['bytes'] for entry in self.entries.values())
+
+    def _valid_key(self, path, machine_name):
+        # Key of the entry for `path`, or None if it is missing or the file changed since it was cached
+        key = _file_key(path)
+        self._collect(key, wait=True)
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None  # e.g. a share that is briefly offline: keep the entry for when it is back
+
+        if _resumable(entry, stat, machine_name):
+            return None  # Kept for resume()
+        if (entry['size'] != stat.st_size or entry['mtime'] != stat.st_mtime
+                or entry['machine'] != machine_name):
+            self._drop(key)
+            return None
+        return key
+
+    def _read(self, path, machine_name, data_path_for):
+        if not self.enabled:
+            return None
+        key = self._valid_key(path, machine_name)
+        if key is None or (data_path_for == self._data_path and not self.entries[key].get('frame', True)):
+            # Files cached by stream_rollups only have a rollup
+            self.misses += 1
+            return None
+
+        try:
+            df = pd.read_parquet(data_path_for(key))
+        except Exception as e:
+            print(f"Discarding unreadable cache entry for {path}: {e}")
+            self._drop(key)
+            self.misses += 1
+            return None
+
+        self.entries[key]['last_used'] = time.time()
+        self._dirty = True
+        self.hits += 1
+        return df
+
+    def get(self, path, machine_name):
+        # Return the cached frame for `path`, or None if it is missing or the file changed since it was cached
+        return self._read(path, machine_name, self._data_path)
+
+    def get_rollup(self, path, machine_name):
+        # Same as get() but returns the daily rollup built when the file was cached
+        return self._read(path, machine_name, self._rollup_path)
+
+    def parsed_length(self, path, machine_name):
+        # Bytes of `path` its cached frame or rollup was parsed from (the resume offset of a file that was still
+        # being written), even if the file has grown since; None if it is not cached
+        if not self.enabled:
+            return None
+        key = _file_key(path)
+        entry = self._pending[key][1] if key in self._pending else self.entries.get(key)
+        if entry is None or entry['machine'] != machine_name:
+            return None
+        return entry['offset'] if entry.get('offset') is not None else entry['size']
+
+    def part_names(self, path, machine_name):
+        # Distinct Parts Name values of a cached file (read from its small rollup), or None if it is not cached.
+        # Does not count as a hit or miss, and does not wait for a file whose frame is still to be written.
+        if not self.enabled:
+            return None
+        key = _file_key(path)
+        if key in self._pending:
+            df, entry, _ = self._pending[key]
+            if entry['machine'] != machine_name or 'Parts Name' not in df.columns:
+                return None
+            names = df['Parts Name']
+        else:
+            key = self._valid_key(path, machine_name)
+            if key is None:
+                return None
+            try:
+                names = pd.read_parquet(self._rollup_path(key), columns=['Parts Name'])['Parts Name']
+            except Exception:
+                return None
+        return [str(name) for name in names.dropna().unique()]
+
+    def resume(self, path, machine_name):
+        # (frame parsed so far, byte offset, CSV column names) for a file cached while it was still being
+        # written, once it has grown or has not changed for SETTLED_SECONDS (its last line is then final);
+        # None otherwise. The caller parses from the offset on and put()s the whole frame again.
+        if not self.enabled:
+            return None
+        key = _file_key(path)
+        self._collect(key, wait=True)
+        entry = self.entries.get(key)
+        if entry is None or entry.get('offset') is None:
+            return None
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        if not _resumable(entry, stat, machine_name):
+            return None
+        try:
+            df = pd.read_parquet(self._data_path(key))
+        except Exception as e:
+            print(f"Discarding unreadable cache entry for {path}: {e}")
+            self._drop(key)
+            return None
+        entry['last_used'] = time.time()
+        self._dirty = True
+        return df, entry['offset'], entry['columns']
+
+    def put(self, path, machine_name, df, offset=None, columns=None):
+        # offset/columns: the file is still being written and df holds its rows up to byte `offset`.
+        # Only queues the write (see save()); df must not be modified afterwards.
+        if not self.enabled:
+            return
+        key = _file_key(path)
+        if key in self._pending and self._pending[key][2] is not None:
+            self._collect(key, wait=True)  # An older version must not be written after this one
+        try:
+            stat = os.stat(path)
+        except OSError as e:
+            print(f"Could not cache {path}: {e}")
+            self._pending.pop(key, None)
+            self._drop(key)
+            return
+        # The old entry describes an older version of the file
+        if self.entries.pop(key, None) is not None:
+            self._dirty = True
+
+        entry = {
+            'path': path,
+            'machine': machine_name,
+            'size': stat.st_size,
+            'mtime': stat.st_mtime,
+            'last_used': time.time(),
+        }
+        if offset is not None:
+            entry.update(offset=offset, columns=columns)
+        self._pending[key] = (df, entry, None)
+
+    def put_rollup(self, path, machine_name, rollup):
+        # Cache only the rollup of `path` (streamed files are never held in memory as a whole);
+        # a later put() of the full frame replaces the entry
+        if not self.enabled:
+            return
+        key = _file_key(path)
+        self._collect(key, wait=True)
+        entry = self.entries.get(key)
+        if entry is not None and entry.get('frame', True) and self._valid_key(path, machine_name) is not None:
+            return
+        try:
+            stat = os.stat(path)
+            rollup.to_parquet(self._rollup_path(key), index=False)
+            size_on_disk = os.path.getsize(self._rollup_path(key))
+        except Exception as e:
+            print(f"Could not cache {path}: {e}")
+            self._drop(key)
+            return
+
+        self.entries[key] = {
+            'path': path,
+            'machine': machine_name,
+            'size': stat.st_size,
+            'mtime': stat.st_mtime,
+            'bytes': size_on_disk,
+            'last_used': time.time(),
+            'frame': False,
+        }
+        self._dirty = True
+        self._evict()
+
+    def record_outcome(self, path, machine_name, outcome, resumed=False):
+        # Keeps the outcome of a parse (see FileHandler._parse_file) unless it went cleanly; with resumed=True
+        # the outcome covers only the rows appended since the last parse and skipped lines add up
+        if not self.enabled:
+            return
+        key = _file_key(path)
+        previous = self.outcomes.get(key) if resumed else None
+        bad_lines = outcome.get('bad_lines', 0) + (previous['bad_lines'] if previous else 0)
+        engine = 'python' if previous and previous['engine'] == 'python' else outcome.get('engine', 'c')
+        status = _outcome_status(dict(outcome, bad_lines=bad_lines, engine=engine))
+        if status == 'ok':
+            if self.outcomes.pop(key, None) is not None:
+                self._dirty = True
+            return
+        try:
+            stat = os.stat(path)
+            size, mtime = stat.st_size, stat.st_mtime
+        except OSError:
+            size = mtime = None
+        self.outcomes[key] = {
+            'path': path,
+            'machine': machine_name,
+            'size': size,
+            'mtime': mtime,
+            'status': status,
+            'bad_lines': bad_lines,
+            'engine': engine,
+            'header_mismatch': bool(outcome.get('header_mismatch')),
+            'error': outcome.get('error'),
+            'rows': outcome.get('rows', 0),
+            'checked': time.time(),
+        }
+        self._dirty = True
+
+    def is_quarantined(self, path, machine_name):
+        # True if the last parse of this exact file (same size and mtime) found it unusable
+        record = self.outcomes.get(_file_key(path))
+        if record is None or record['status'] != 'quarantined' or record['machine'] != machine_name:
+            return False
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return False
+        return record['size'] == stat.st_size and record['mtime'] == stat.st_mtime
+
+    def ingest_outcomes(self, catalog=None):
+        # Recorded outcomes, worst status first. Files the catalog (file_catalog.FileCatalog) reports removed
+        # from a reachable share are forgotten; files on a share that is offline are kept.
+        for key, record in list(self.outcomes.items()):
+            if catalog is not None and catalog.is_removed(record['path']):
+                del self.outcomes[key]
+                self._dirty = True
+        return sorted(self.outcomes.values(), key=lambda record: (OUTCOME_STATUSES.index(record['status']), record['path']))
+
+    def release_quarantine(self):
+        # Quarantined files are parsed again on the next load; returns how many there were
+        keys = [key for key, record in self.outcomes.items() if record['status'] == 'quarantined']
+        for key in keys:
+            del self.outcomes[key]
+        if keys:
+            self._dirty = True
+        return len(keys)
+
+    def _evict(self):
+        # Least recently used entries go first until the cache fits in max_bytes
+        total = self.total_bytes()
+        if total <= self.max_bytes:
+            return
+        for key, entry in sorted(self.entries.items(), key=lambda item: item[1]['last_used']):
+            if total <= self.max_bytes:
+                break
+            total -= entry['bytes']
+            self._drop(key)
+
+    def save(self):
+        # Also starts writing the frames put() since the last save; they are added to the index by a later
+        # save() (or flush()) once written
+        if not self.enabled:
+            return
+        self._start_writes()
+        self._collect()
+        if not self._dirty:
+            return
+        tmp_path = self._index_path() + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'version': CACHE_VERSION, 'entries': self.entries, 'outcomes': self.outcomes}, f)
+        os.replace(tmp_path, self._index_path())
+        self._dirty = False
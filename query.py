@@ -0,0 +1,60 @@
+# query.py
+# Machine Name / Program Name filters as typed in the GUI or given to batch_report.py: one or more
+# values separated by commas, each an exact name or a wildcard pattern (*, ?, [...]).
+# The machine of a file is known from its folder and the program from its file name, so a filter is
+# first resolved against the file catalog and files of other machines/programs are never opened.
+# The same filter is then applied to the rows (needed for rows served from the session cache).
+import fnmatch
+import re
+
+import numpy as np
+import pandas as pd
+
+WILDCARD_CHARS = '*?['
+
+
+class ValueFilter:
+    def __init__(self, text):
+        self.text = text
+        terms = [term.strip() for term in re.split(r'[,;]', text) if term.strip()]
+        self.names = {term for term in terms if not any(char in term for char in WILDCARD_CHARS)}
+        self.patterns = [re.compile(fnmatch.translate(term)) for term in terms
+                         if any(char in term for char in WILDCARD_CHARS)]
+
+    def matches(self, value):
+        value = str(value)
+        return value in self.names or any(pattern.match(value) for pattern in self.patterns)
+
+    def resolve(self, values):
+        # The values among `values` (e.g. the machine names in the catalog) that pass the filter
+        return {value for value in values if self.matches(value)}
+
+    def mask(self, series):
+        # Boolean array over `series`; every distinct value is matched once
+        codes, uniques = pd.factorize(series)
+        matching = np.array([self.matches(value) for value in uniques], dtype=bool)
+        if not len(matching):
+            return np.zeros(len(series), dtype=bool)
+        return (codes >= 0) & matching[np.maximum(codes, 0)]
+
+
+def parse_filter(text):
+    # ValueFilter for the text of a filter field, or None when it is empty
+    if text is None or not text.strip():
+        return None
+    return ValueFilter(text)
+
+
+def select_files(catalog, start_date=None, end_date=None, machine_filter=None, program_filter=None):
+    # [(file path, machine name)] of the catalog for the date range that can hold rows passing the filters
+    machines = machine_filter.resolve(catalog.by_machine) if machine_filter is not None else None
+    programs = program_filter.resolve(catalog.by_program) if program_filter is not None else None
+    return catalog.select(start_date, end_date, machines, programs)
+
+
+def filter_rows(data, machine_filter=None, program_filter=None):
+    if machine_filter is not None:
+        data = data[machine_filter.mask(data['Machine Name'])]
+    if program_filter is not None:
+        data = data[program_filter.mask(data['Program Name'])]
+    return data
@@ -0,0 +1,214 @@
+# rollup.py
+# Daily rollups: PartsLog counters summed by Date, Machine Name, Program Name and Parts Name.
+# A rollup keeps the raw column names, so the chart code that sums raw rows gives the same
+# numbers when it is given a rollup instead (a 'Rows' column holds the number of raw rows).
+import os
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+
+import pandas as pd
+
+from FileHandler import (merge_and_clean, iter_parts_log, LoadCancelled, STREAM_CHUNK_ROWS, SETTLED_SECONDS,
+                         PARALLEL_MIN_BYTES, _add_timing, _pool_bytes)
+from schema import CHART_COLUMNS, apply_schema, concat_frames
+
+ROLLUP_KEYS = ['Date', 'Machine Name', 'Program Name', 'Parts Name']
+ROLLUP_COUNTERS = ['Consumption', 'Pick Error Counter', 'Vision Error Counter', 'Nozzle Error Counter',
+                   'Coplanarity Error Counter', 'No Parts Error Counter']
+
+
+def build_rollup(data):
+    keys = [col for col in ROLLUP_KEYS if col in data.columns]
+    counters = [col for col in ROLLUP_COUNTERS if col in data.columns]
+    if data.empty or 'Consumption' not in data.columns:
+        return pd.DataFrame(columns=keys + counters + ['Rows'])
+
+    # Rows with and without consumption are summed separately, so filtering the rollup on
+    # Consumption > 0 (as the charts do) keeps exactly the sums of the raw rows that pass it
+    consumed = (data['Consumption'] > 0).rename('Consumed')
+    grouped = data.groupby(keys + [consumed], sort=False, observed=True, dropna=False)
+    rollup = grouped[counters].sum()
+    rollup['Rows'] = grouped.size()
+    return rollup.reset_index().drop(columns='Consumed')
+
+
+def combine_rollups(rollups):
+    # Folds several rollups into one; groups are merged by summing, so the result equals the
+    # rollup of all their raw rows. A group of rows that consumed parts always has Consumption > 0
+    # and one of rows that did not has Consumption <= 0, so the split survives the fold.
+    rollups = [rollup for rollup in rollups if not rollup.empty]
+    if not rollups:
+        return pd.DataFrame(columns=ROLLUP_KEYS + ROLLUP_COUNTERS + ['Rows'])
+    data = concat_frames(rollups)
+    if len(rollups) == 1:
+        return data
+    keys = [col for col in ROLLUP_KEYS if col in data.columns]
+    counters = [col for col in ROLLUP_COUNTERS + ['Rows'] if col in data.columns]
+    consumed = (data['Consumption'] > 0).rename('Consumed')
+    folded = data.groupby(keys + [consumed], sort=False, observed=True, dropna=False)[counters].sum()
+    return folded.reset_index().drop(columns='Consumed')
+
+
+# Rollup of one file read chunk by chunk; only the running sums are kept between chunks
+# Returns (rollup or None, timings, outcome) like FileHandler._parse_file. Files still being written are read up
+# to their last complete line; stream_rollups does not cache their rollup, they are streamed again next time.
+def _stream_file(file, machine_name, chunksize=STREAM_CHUNK_ROWS):
+    timings = {}
+    outcome = {'bad_lines': 0, 'engine': 'c', 'truncated': False, 'header_mismatch': False, 'error': None,
+               'quarantine': False, 'complete': False}
+    started = time.perf_counter()
+    try:
+        complete = outcome['complete'] = time.time() - os.path.getmtime(file) >= SETTLED_SECONDS
+        partial, rows = [], 0
+        chunks = iter_parts_log(file, machine_name, chunksize=chunksize, complete=complete, outcome=outcome)
+        for chunk in chunks:
+            if any(col not in outcome['columns'] for col in CHART_COLUMNS):
+                break  # Wrong header (see below): not read any further
+            partial = [combine_rollups(partial + [build_rollup(chunk)])]
+            rows += len(chunk)
+        chunks.close()
+        missing = [col for col in CHART_COLUMNS if col not in outcome['columns']]
+        if outcome['engine'] == 'python':
+            _add_timing(timings, 'fallback_files', 1)
+        if missing:
+            # Same rule as FileHandler._parse_file: quarantined, nothing cached
+            outcome.update(header_mismatch=True, quarantine=True, error=f"Missing columns: {', '.join(missing)}")
+            print(f"Error reading {file}: {outcome['error']}")
+            rollup, rows = None, 0
+        else:
+            rollup = apply_schema(combine_rollups(partial))
+    except pd.errors.EmptyDataError:
+        outcome['empty'] = True
+        rollup, rows = None, 0
+    except (pd.errors.ParserError, UnicodeDecodeError) as e:
+        print(f"Error reading {file}: {e}")
+        outcome.update(error=str(e), quarantine=True)
+        rollup, rows = None, 0
+    except OSError as e:
+        # e.g. a share that went away; tried again next time
+        print(f"Error reading {file}: {e}")
+        outcome['error'] = str(e)
+        rollup, rows = None, 0
+    _add_timing(timings, 'parse', time.perf_counter() - started)
+    _add_timing(timings, 'rows', rows)
+    outcome['rows'] = rows
+    return rollup, timings, outcome
+
+
+# Streaming alternative to load_rollups for ranges whose rows do not fit in memory: files are read
+# in chunks and folded into running sums, so peak memory follows the number of groups, not rows.
+# Cached rollups are used as they are; streamed files store only their rollup in the cache, and files
+# the cache quarantined are skipped.
+# Takes the same workers/timings/progress/cancel_event arguments as merge_and_clean (including its
+# PARALLEL_MIN_BYTES threshold for starting the process pool).
+def stream_rollups(file_paths, cache=None, workers=1, timings=None, progress=None, cancel_event=None,
+                   chunksize=STREAM_CHUNK_ROWS):
+    total_started = time.perf_counter()
+    files_total = len(file_paths)
+    counts = {'files_done': 0, 'rows_done': 0}
+    folded, partial_rows = [], 0
+    max_in_flight = max(1, workers) * 2
+    executor = None
+    pool_bytes = 0
+    pending = deque()  # (file, machine_name, cached rollup, Future or None for a quarantined file)
+
+    def finish_oldest():
+        nonlocal folded, partial_rows
+        file, machine_name, result = pending.popleft()
+        if isinstance(result, Future):
+            rollup, parse_timings, outcome = result.result()
+            for key, value in parse_timings.items():
+                _add_timing(timings, key, value)
+            if outcome['bad_lines']:
+                _add_timing(timings, 'bad_line_files', 1)
+            if outcome['truncated']:
+                _add_timing(timings, 'partial_files', 1)
+            if outcome['quarantine']:
+                _add_timing(timings, 'quarantined_files', 1)
+            if cache is not None:
+                cache.record_outcome(file, machine_name, outcome)
+            if rollup is not None and cache is not None and outcome['complete']:
+                cache.put_rollup(file, machine_name, rollup)
+        elif result is None:
+            rollup = None
+            _add_timing(timings, 'quarantined_files', 1)
+        else:
+            rollup = result
+            _add_timing(timings, 'cached_files', 1)
+            _add_timing(timings, 'rows', int(rollup['Rows'].sum()) if 'Rows' in rollup.columns else 0)
+        if rollup is not None:
+            _add_timing(timings, 'files', 1)
+            counts['rows_done'] += int(rollup['Rows'].sum()) if 'Rows' in rollup.columns else 0
+            folded.append(rollup)
+            partial_rows += len(rollup)
+            # Fold once the pieces add up to more rows than the running sums themselves
+            if len(folded) > 1 and partial_rows > 2 * len(folded[0]) + chunksize:
+                folded = [combine_rollups(folded)]
+                partial_rows = len(folded[0])
+        counts['files_done'] += 1
+        if progress is not None:
+            progress(counts['files_done'], files_total, counts['rows_done'])
+
+    try:
+        for file, machine_name in file_paths:
+            if cancel_event is not None and cancel_event.is_set():
+                raise LoadCancelled()
+            quarantined = cache is not None and cache.is_quarantined(file, machine_name)
+            rollup = cache.get_rollup(file, machine_name) if cache is not None and not quarantined else None
+            if quarantined:
+                pending.append((file, machine_name, None))
+            elif rollup is not None:
+                pending.append((file, machine_name, rollup))
+            else:
+                size = _pool_bytes(file) if workers > 1 else 0
+                pool_bytes += size
+                if size and pool_bytes >= PARALLEL_MIN_BYTES:
+                    if executor is None:
+                        executor = ProcessPoolExecutor(max_workers=workers)
+                    pending.append((file, machine_name, executor.submit(_stream_file, file, machine_name, chunksize)))
+                else:
+                    future = Future()
+                    future.set_result(_stream_file(file, machine_name, chunksize))
+                    pending.append((file, machine_name, future))
+
+            while len(pending) >= max_in_flight:
+                finish_oldest()
+
+        while pending:
+            if cancel_event is not None and cancel_event.is_set():
+                raise LoadCancelled()
+            finish_oldest()
+    finally:
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+        if cache is not None:
+            cache.save()
+
+    started = time.perf_counter()
+    result = apply_schema(combine_rollups(folded))
+    _add_timing(timings, 'concat', time.perf_counter() - started)
+    _add_timing(timings, 'total', time.perf_counter() - total_started)
+    return result
+
+
+# Rollups for the given (path, machine_name) files; files without a cached rollup are parsed
+# (and cached, which stores their rollup for next time)
+def load_rollups(file_paths, cache=None, workers=1, timings=None, progress=None, cancel_event=None):
+    rollups, missing = [], []
+    for file, machine_name in file_paths:
+        rollup = cache.get_rollup(file, machine_name) if cache is not None else None
+        if rollup is None:
+            missing.append((file, machine_name))
+        else:
+            rollups.append(rollup)
+
+    if missing:
+        raw = merge_and_clean(missing, cache, timings=timings, workers=workers, progress=progress, cancel_event=cancel_event)
+        if not raw.empty:
+            rollups.append(build_rollup(raw))
+
+    rollups = [rollup for rollup in rollups if not rollup.empty]
+    if not rollups:
+        return pd.DataFrame(columns=ROLLUP_KEYS + ROLLUP_COUNTERS + ['Rows'])
+    return concat_frames(rollups)
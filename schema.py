@@ -0,0 +1,106 @@
+# schema.py
+# Explicit PartsLog schema: column types used when reading and the compact in-memory layout.
+# Repeated text columns become dictionary-encoded categoricals and counters are stored as
+# 32-bit numbers, which cuts the memory per row to a fraction of object strings + int64.
+import numpy as np
+import pandas as pd
+
+COUNTER_COLUMNS = ['Consumption', 'Pick Error Counter', 'Vision Error Counter', 'Nozzle Error Counter',
+                   'Coplanarity Error Counter', 'No Parts Error Counter']
+
+# Types the fast (C engine) parser reads the known PartsLog columns with
+PARTS_LOG_DTYPES = {'Parts Name': str}
+PARTS_LOG_DTYPES.update({col: 'int64' for col in COUNTER_COLUMNS})
+
+# CSV columns the charts and rollups need; pass as usecols to drop everything else
+CHART_COLUMNS = ['Parts Name'] + COUNTER_COLUMNS
+
+# Text columns that repeat: dictionary-encoded. Other text columns stay as read (no per-column scan to guess)
+CATEGORY_COLUMNS = ['Parts Name', 'Machine Name', 'Program Name', 'File Name', 'Feeder ID', 'Nozzle ID']
+
+INT32_MIN, INT32_MAX = np.iinfo(np.int32).min, np.iinfo(np.int32).max
+
+
+def _compact_numeric(series):
+    if pd.api.types.is_integer_dtype(series.dtype):
+        if series.dtype.itemsize > 4 and (series.empty or (series.min() >= INT32_MIN and series.max() <= INT32_MAX)):
+            return series.astype('int32')
+    elif pd.api.types.is_float_dtype(series.dtype) and series.dtype.itemsize > 4:
+        return series.astype('float32')
+    return series
+
+
+def apply_schema(df):
+    # Returns a compact copy of `df`; safe to call again on an already compact frame.
+    # Files are parsed and cached as read and the schema is applied once to the combined frame:
+    # one pass per column instead of one per file (plus another after concatenating)
+    columns = {}
+    for col in df.columns:
+        series = df[col]
+        if isinstance(series.dtype, pd.CategoricalDtype) or col == 'Date':
+            columns[col] = series
+        elif col in CATEGORY_COLUMNS:
+            columns[col] = series.astype('category')
+        elif pd.api.types.is_numeric_dtype(series.dtype) and not pd.api.types.is_bool_dtype(series.dtype):
+            columns[col] = _compact_numeric(series)
+        else:
+            columns[col] = series
+    return pd.DataFrame(columns, index=df.index)
+
+
+def concat_frames(frames):
+    # pd.concat turns categoricals with different categories into plain strings;
+    # give every frame the union of the categories first so the result stays categorical
+    frames = list(frames)
+    if not frames:
+        return pd.DataFrame()
+    categorical = [col for col in frames[0].columns
+                   if all(col in frame.columns and isinstance(frame[col].dtype, pd.CategoricalDtype) for frame in frames)]
+    if categorical and len(frames) > 1:
+        union = {col: pd.Index(pd.unique(np.concatenate([frame[col].cat.categories.to_numpy(dtype=object)
+                                                         for frame in frames])))
+                 for col in categorical}
+        frames = [frame.assign(**{col: frame[col].cat.set_categories(union[col]) for col in categorical})
+                  for frame in frames]
+    return pd.concat(frames, ignore_index=True)
+
+
+def _legacy_dtype(series):
+    # Layout frames had before this schema: object strings and 64-bit numbers
+    if isinstance(series.dtype, pd.CategoricalDtype) or pd.api.types.is_string_dtype(series.dtype):
+        return object
+    if pd.api.types.is_integer_dtype(series.dtype):
+        return 'int64'
+    if pd.api.types.is_float_dtype(series.dtype):
+        return 'float64'
+    return series.dtype
+
+
+def memory_report(df):
+    # Bytes per row of `df` in the old layout and in the compact schema, for sizing hardware
+    legacy = df.astype({col: _legacy_dtype(df[col]) for col in df.columns if col != 'Date'})
+    compact = apply_schema(df)
+    rows = max(len(df), 1)
+    before = int(legacy.memory_usage(deep=True).sum())
+    after = int(compact.memory_usage(deep=True).sum())
+    return {
+        'rows': len(df),
+        'bytes_before': before,
+        'bytes_after': after,
+        'bytes_per_row_before': before / rows,
+        'bytes_per_row_after': after / rows,
+    }
+
+
+def format_memory_report(report):
+    return (f"{report['rows']} rows: {report['bytes_per_row_before']:.0f} bytes/row before, "
+            f"{report['bytes_per_row_after']:.0f} bytes/row with the compact schema "
+            f"({report['bytes_before'] / 1024 ** 2:.1f} MB -> {report['bytes_after'] / 1024 ** 2:.1f} MB)")
+
+
+if __name__ == "__main__":
+    # python schema.py <PartsLog csv files...>  prints the memory per row before/after the schema
+    import sys
+    from FileHandler import merge_and_clean
+    data = merge_and_clean([(path, "Unknown") for path in sys.argv[1:]])
+    print(format_memory_report(memory_report(data)))
@@ -0,0 +1,98 @@
+# synthetic_logs.py
+# Writes realistic PartsLog trees for benchmarks and experiments: one folder per machine with
+# PartsLog_<program>_<yyyymmddHHMMSS>.csv files (two preamble lines, then the CSV header, as
+# read_parts_log expects with skiprows=2) and a FolderAddress.txt listing the folders.
+#
+#   python synthetic_logs.py bench_data --machines 10 --days 30 --parts 2000 --bad-line-rate 0.001
+import argparse
+import os
+import random
+from datetime import datetime, timedelta
+
+HEADER = ['Parts Name', 'Feeder ID', 'Nozzle ID', 'Consumption', 'Pick Error Counter', 'Vision Error Counter',
+          'Nozzle Error Counter', 'Coplanarity Error Counter', 'No Parts Error Counter']
+PREAMBLE = ["[PartsLog]", "Format Version,2"]
+SHIFT_HOURS = (6, 14, 22)  # One file per program and shift, like the mounters write them
+
+
+def _part_names(count, rng):
+    packages = ['0402', '0603', '0805', '1206', 'SOT23', 'QFN32', 'BGA256']
+    values = ['10K', '1U', '100N', '4K7', '22P', '0R', '47U', '330R']
+    names = set()
+    while len(names) < count:
+        names.add(f"{rng.choice(packages)}-{rng.choice(values)}-{rng.randint(0, 99999):05d}")
+    return sorted(names)
+
+
+def _row(part, feeder, nozzle, rng):
+    consumption = rng.choice((0, 0, rng.randint(1, 50), rng.randint(50, 2000)))
+    pick = rng.randint(0, max(1, consumption // 100))
+    vision = rng.randint(0, max(1, consumption // 300))
+    nozzle_errors = rng.randint(0, 2) if rng.random() < 0.1 else 0
+    coplanarity = rng.randint(0, 1) if rng.random() < 0.05 else 0
+    no_parts = rng.randint(0, min(pick, 3))
+    return f"{part},{feeder},{nozzle},{consumption},{pick},{vision},{nozzle_errors},{coplanarity},{no_parts}\n"
+
+
+def generate_parts_logs(root, machines=3, days=7, parts=200, programs=4, rows_per_file=500,
+                        bad_line_rate=0.0, start_date='2025-01-01', seed=0):
+    # Returns [(folder, machine_name)] for the written tree; the same arguments always give the same files
+    rng = random.Random(seed)
+    part_names = _part_names(parts, rng)
+    program_names = [f"PRG{i:02d}_{rng.choice(['TOP', 'BOT'])}" for i in range(programs)]
+    first_day = datetime.strptime(start_date, '%Y-%m-%d')
+    folder_info = []
+
+    for m in range(machines):
+        machine_name = f"NXT{m + 1:02d}"
+        folder = os.path.join(root, machine_name)
+        folder_info.append((folder, machine_name))
+        for day in range(days):
+            date = first_day + timedelta(days=day)
+            # Machines keep a folder per month, as on the real shares
+            day_folder = os.path.join(folder, date.strftime('%Y%m'))
+            os.makedirs(day_folder, exist_ok=True)
+            for program_name in program_names:
+                program_parts = rng.sample(part_names, min(len(part_names), max(1, rows_per_file // 4)))
+                for hour in SHIFT_HOURS:
+                    stamp = date.replace(hour=hour, minute=rng.randint(0, 59), second=rng.randint(0, 59))
+                    path = os.path.join(day_folder, f"PartsLog_{program_name}_{stamp.strftime('%Y%m%d%H%M%S')}.csv")
+                    with open(path, 'w', newline='') as f:
+                        f.write('\n'.join(PREAMBLE) + '\n')
+                        f.write(','.join(HEADER) + '\n')
+                        for r in range(rows_per_file):
+                            if bad_line_rate and rng.random() < bad_line_rate:
+                                # Over-long line, as left behind by an interrupted write
+                                f.write(_row(rng.choice(program_parts), r, r, rng).rstrip('\n') + ",,ERR\n")
+                            f.write(_row(rng.choice(program_parts), f"F{r % 120:03d}", f"N{r % 8}", rng))
+                    # Dated the end of the shift (at least a day ago), like a log the machine has finished
+                    # writing; a fresh mtime would send the loaders down the path for files still being written
+                    written = min(stamp + timedelta(hours=8), datetime.now() - timedelta(days=1)).timestamp()
+                    os.utime(path, (written, written))
+
+    os.makedirs(root, exist_ok=True)
+    with open(os.path.join(root, "FolderAddress.txt"), 'w') as f:
+        for folder, machine_name in folder_info:
+            f.write(f"{os.path.abspath(folder)} {machine_name}\n")
+    return folder_info
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Write a synthetic PartsLog folder tree.")
+    parser.add_argument('root', help="Output folder (FolderAddress.txt is written here too)")
+    parser.add_argument('--machines', type=int, default=3)
+    parser.add_argument('--days', type=int, default=7)
+    parser.add_argument('--parts', type=int, default=200, help="Distinct Parts Name values")
+    parser.add_argument('--programs', type=int, default=4)
+    parser.add_argument('--rows-per-file', type=int, default=500)
+    parser.add_argument('--bad-line-rate', type=float, default=0.0, help="Fraction of malformed lines, e.g. 0.001")
+    parser.add_argument('--start-date', default='2025-01-01', help="First day, YYYY-MM-DD")
+    parser.add_argument('--seed', type=int, default=0)
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    folders = generate_parts_logs(args.root, args.machines, args.days, args.parts, args.programs,
+                                  args.rows_per_file, args.bad_line_rate, args.start_date, args.seed)
+    print(f"Wrote {len(folders)} machine folders to {args.root}")
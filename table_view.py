@@ -0,0 +1,173 @@
+# table_view.py
+# Virtualized table for large DataFrames: the Treeview only ever holds the rows that fit on screen,
+# and scrolling swaps their values in from the underlying frame. Sorting and filtering work on a
+# position array, so opening, sorting or filtering does not depend on building widgets per row.
+from tkinter import Frame, StringVar, ttk
+
+import numpy as np
+import pandas as pd
+
+WIDTH_SAMPLE_ROWS = 200  # Rows looked at to size the columns
+CHAR_WIDTH = 8           # Pixels per character for the column widths
+DEFAULT_ROW_HEIGHT = 20
+
+
+class VirtualTable(Frame):
+    def __init__(self, master, data, **kwargs):
+        super().__init__(master, **kwargs)
+        self.data = data.reset_index(drop=True)
+        self.columns = [str(col) for col in self.data.columns]
+        self.sort_order = np.arange(len(self.data))  # All row positions in sort order
+        self.mask = None                              # Rows passing the filter, or None
+        self.order = self.sort_order                  # Row positions shown, in display order
+        self.offset = 0
+        self.visible_rows = 1
+        self.sort_column = None
+        self.sort_ascending = True
+
+        # Filter bar: column + text, matched as a case-insensitive substring
+        filter_bar = Frame(self)
+        filter_bar.pack(side='top', fill='x')
+        ttk.Label(filter_bar, text="Filter:").pack(side='left', padx=5)
+        self.filter_column_var = StringVar(value=self.columns[0] if self.columns else "")
+        ttk.Combobox(filter_bar, textvariable=self.filter_column_var, values=self.columns,
+                     state='readonly', width=25).pack(side='left', padx=5)
+        self.filter_text_var = StringVar()
+        filter_entry = ttk.Entry(filter_bar, textvariable=self.filter_text_var, width=30)
+        filter_entry.pack(side='left', padx=5)
+        filter_entry.bind('<Return>', lambda event: self.apply_filter())
+        ttk.Button(filter_bar, text="Apply", command=self.apply_filter).pack(side='left', padx=5)
+        ttk.Button(filter_bar, text="Clear", command=self.clear_filter).pack(side='left', padx=5)
+        self.count_var = StringVar()
+        ttk.Label(filter_bar, textvariable=self.count_var).pack(side='left', padx=15)
+
+        body = Frame(self)
+        body.pack(side='top', fill='both', expand=True)
+        self.tree = ttk.Treeview(body, columns=self.columns, show='headings', selectmode='browse')
+        self.scroll_y = ttk.Scrollbar(body, orient='vertical', command=self._on_scrollbar)
+        self.scroll_x = ttk.Scrollbar(self, orient='horizontal', command=self.tree.xview)
+        self.tree.configure(xscrollcommand=self.scroll_x.set)
+
+        for col, width in zip(self.columns, self._column_widths()):
+            self.tree.heading(col, text=col, command=lambda c=col: self.sort_by(c))
+            self.tree.column(col, width=width, minwidth=40, stretch=False, anchor='w')
+
+        self.scroll_y.pack(side='right', fill='y')
+        self.tree.pack(side='left', fill='both', expand=True)
+        self.scroll_x.pack(side='bottom', fill='x')
+
+        self.tree.bind('<Configure>', self._on_resize)
+        self.tree.bind('<MouseWheel>', self._on_mousewheel)
+        self.tree.bind('<Button-4>', lambda event: self.scroll_rows(-3))  # Linux wheel
+        self.tree.bind('<Button-5>', lambda event: self.scroll_rows(3))
+        self.tree.bind('<Up>', lambda event: self.scroll_rows(-1))
+        self.tree.bind('<Down>', lambda event: self.scroll_rows(1))
+        self.tree.bind('<Prior>', lambda event: self.scroll_rows(-self.visible_rows))
+        self.tree.bind('<Next>', lambda event: self.scroll_rows(self.visible_rows))
+
+        self._refresh()
+
+    def _column_widths(self):
+        sample = self.data.head(WIDTH_SAMPLE_ROWS)
+        widths = []
+        for col, name in zip(self.data.columns, self.columns):
+            longest = max([len(name)] + [len(str(val)) for val in sample[col]])
+            widths.append((longest + 2) * CHAR_WIDTH)
+        return widths
+
+    def _row_height(self):
+        height = ttk.Style().lookup('Treeview', 'rowheight')
+        try:
+            return int(height) or DEFAULT_ROW_HEIGHT
+        except (TypeError, ValueError):
+            return DEFAULT_ROW_HEIGHT
+
+    def _on_resize(self, event):
+        # Header takes about one row
+        visible_rows = max(1, event.height // self._row_height() - 1)
+        if visible_rows != self.visible_rows:
+            self.visible_rows = visible_rows
+            self._refresh()
+
+    def _on_mousewheel(self, event):
+        self.scroll_rows(-3 if event.delta > 0 else 3)
+
+    def _on_scrollbar(self, action, amount, unit=None):
+        if action == 'moveto':
+            self.offset = int(float(amount) * len(self.order))
+        elif unit == 'pages':
+            self.offset += int(amount) * self.visible_rows
+        else:
+            self.offset += int(amount)
+        self._refresh()
+
+    def scroll_rows(self, rows):
+        self.offset += rows
+        self._refresh()
+        return 'break'
+
+    def _refresh(self):
+        total = len(self.order)
+        self.offset = max(0, min(self.offset, total - self.visible_rows))
+        positions = self.order[self.offset:self.offset + self.visible_rows]
+        page = self.data.iloc[positions]
+
+        # Reuse the same items; only their values change while scrolling
+        items = self.tree.get_children()
+        for i, row in enumerate(page.itertuples(index=False, name=None)):
+            values = ["" if pd.isna(val) else str(val) for val in row]
+            if i < len(items):
+                self.tree.item(items[i], values=values)
+            else:
+                self.tree.insert('', 'end', values=values)
+        if len(items) > len(page):
+            self.tree.delete(*items[len(page):])
+
+        if total:
+            self.scroll_y.set(self.offset / total, min(1.0, (self.offset + len(page)) / total))
+        else:
+            self.scroll_y.set(0, 1)
+        self.count_var.set(f"{total:,} of {len(self.data):,} rows")
+
+    def _update_order(self):
+        self.order = self.sort_order if self.mask is None else self.sort_order[self.mask[self.sort_order]]
+        self.offset = 0
+        self._refresh()
+
+    def sort_by(self, column):
+        if self.sort_column == column:
+            self.sort_ascending = not self.sort_ascending
+        else:
+            self.sort_column, self.sort_ascending = column, True
+        keys = self.data[self.data.columns[self.columns.index(column)]]
+        if isinstance(keys.dtype, pd.CategoricalDtype):
+            # Sort by the category text, not by the order categories were first seen in
+            ranks = np.argsort(np.argsort(keys.cat.categories.astype(str).to_numpy(), kind='stable'))
+            codes = keys.cat.codes.to_numpy()
+            keys = pd.Series(np.where(codes >= 0, ranks[codes], np.nan))
+        self.sort_order = keys.sort_values(ascending=self.sort_ascending, kind='stable',
+                                           na_position='last').index.to_numpy()
+        for name in self.columns:
+            arrow = (" ▲" if self.sort_ascending else " ▼") if name == column else ""
+            self.tree.heading(name, text=name + arrow)
+        self._update_order()
+
+    def apply_filter(self):
+        text = self.filter_text_var.get().strip()
+        if not text or self.filter_column_var.get() not in self.columns:
+            self.clear_filter()
+            return
+        series = self.data[self.data.columns[self.columns.index(self.filter_column_var.get())]]
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            # Match the distinct values once instead of every row
+            matching = np.asarray(series.cat.categories.astype(str).str.contains(text, case=False, regex=False))
+            codes = series.cat.codes.to_numpy()
+            self.mask = (codes >= 0) & matching[codes]
+        else:
+            self.mask = series.astype(str).str.contains(text, case=False, regex=False).to_numpy(dtype=bool)
+        self._update_order()
+
+    def clear_filter(self):
+        self.filter_text_var.set("")
+        self.mask = None
+        self._update_order()
@@ -0,0 +1,10 @@
+# The modules live at the top of the repository; make them importable when pytest runs from anywhere
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Start of every PartsLog file: the two preamble lines, then the column header
+PREAMBLE = "Machine,X\nVersion,1\n"
+HEADER = ("Parts Name,Feeder ID,Consumption,Pick Error Counter,Vision Error Counter,Nozzle Error Counter,"
+          "Coplanarity Error Counter,No Parts Error Counter\n")
@@ -0,0 +1,65 @@
+# Aggregation server (aggregation_server.py) on a local stand-in: answers match the in-process computation
+import json
+from urllib.error import HTTPError
+from urllib.request import urlopen
+
+import pandas as pd
+import pytest
+
+from aggregation_server import AggregationClient, AggregationService, start_server
+from data_processing import get_top_10_worst_components
+from file_catalog import FileCatalog
+from FileHandler import merge_and_clean
+from metrics import daily_pickup
+from synthetic_logs import generate_parts_logs
+
+START, END = pd.Timestamp('2025-01-01'), pd.Timestamp('2025-01-03')
+
+
+@pytest.fixture
+def server(tmp_path):
+    folders = generate_parts_logs(str(tmp_path / "logs"), machines=2, days=3, parts=20, programs=2, rows_per_file=40)
+    service = AggregationService(folders, str(tmp_path / "cache"))
+    server = start_server(service, port=0)
+    catalog = FileCatalog()
+    catalog.refresh(folders)
+    yield server, merge_and_clean(catalog.select(START, END))
+    server.shutdown()
+
+
+def test_answers_match_the_loaded_rows(server):
+    server, data = server
+    client = AggregationClient(f"http://127.0.0.1:{server.server_address[1]}")
+
+    # Pairs tied with the last one shown may come in either order, so only the pairs above it are compared
+    top = client.top(START, END)
+    expected_top = get_top_10_worst_components(data)
+    assert top['Total Errors'].tolist() == expected_top['Total Errors'].tolist()
+    keys, columns = ['Parts Name', 'Machine Name'], ['Total Errors', 'Good Rate']
+    cutoff = expected_top['Total Errors'].min()
+
+    def above_cutoff(frame):
+        frame = frame[frame['Total Errors'] > cutoff].sort_values(keys)
+        return frame[keys + columns].reset_index(drop=True)
+
+    pd.testing.assert_frame_equal(above_cutoff(top), above_cutoff(expected_top),
+                                  check_dtype=False, check_categorical=False)
+
+    rollup = client.rollup(START, END)
+    assert int(rollup['Rows'].sum()) == len(data)
+    assert int(rollup['Consumption'].sum()) == int(data['Consumption'].sum())
+
+    part = expected_top['Parts Name'].iloc[0]
+    expected_by_machine, expected_daily = daily_pickup(data[data['Parts Name'] == part])
+    by_machine, daily = client.daily(START, END, part)
+    assert by_machine.sum().sum() == expected_by_machine.sum().sum()
+    assert daily['Pickup Errors'].tolist() == expected_daily['Pickup Errors'].tolist()
+    assert daily['Pickup Rate'].round(9).tolist() == expected_daily['Pickup Rate'].round(9).tolist()
+
+
+def test_missing_start_is_a_bad_request(server):
+    server, _ = server
+    with pytest.raises(HTTPError) as error:
+        urlopen(f"http://127.0.0.1:{server.server_address[1]}/top?end=2025-01-03")
+    assert error.value.code == 400
+    assert 'start' in json.load(error.value)['error']
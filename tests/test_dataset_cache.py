@@ -0,0 +1,55 @@
+# Session cache of loaded rows per day (dataset_cache.py)
+import pandas as pd
+
+from dataset_cache import SessionDataset
+
+
+class Loader:
+    # Two rows per day; remembers every range it was asked for
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, start_date, end_date):
+        self.calls.append((start_date.strftime('%Y%m%d'), end_date.strftime('%Y%m%d')))
+        days = pd.date_range(start_date, end_date, freq='D').repeat(2)
+        return pd.DataFrame({'Parts Name': [f"P{i % 2}" for i in range(len(days))],
+                             'Consumption': range(len(days)), 'Date': days})
+
+
+def test_only_days_not_in_memory_are_loaded():
+    dataset, loader = SessionDataset(), Loader()
+    assert len(dataset.get('2025-01-03', '2025-01-04', loader)) == 4
+    assert dataset.covers('2025-01-03', '2025-01-04') and not dataset.covers('2025-01-01', '2025-01-04')
+
+    # Widening the range on both sides loads the two new runs only
+    data = dataset.get('2025-01-01', '2025-01-06', loader)
+    assert loader.calls == [('20250103', '20250104'), ('20250101', '20250102'), ('20250105', '20250106')]
+    assert list(data['Date'].drop_duplicates().dt.day) == [1, 2, 3, 4, 5, 6]
+    assert dataset.covers('2025-01-02', '2025-01-05')
+
+    dataset.get('2025-01-02', '2025-01-05', loader)
+    assert len(loader.calls) == 3
+
+
+def test_invalidated_days_are_loaded_again():
+    dataset, loader = SessionDataset(), Loader()
+    dataset.get('2025-01-01', '2025-01-03', loader)
+    dataset.invalidate(['20250102'])
+    assert not dataset.covers('2025-01-01', '2025-01-03') and dataset.covers('2025-01-03', '2025-01-03')
+    assert len(dataset.get('2025-01-01', '2025-01-03', loader)) == 6
+    assert loader.calls[-1] == ('20250102', '20250102')
+
+
+def test_eviction_drops_the_least_recently_used_days_first():
+    dataset, loader = SessionDataset(), Loader()
+    dataset.get('2025-01-01', '2025-01-02', loader)
+    dataset.max_bytes = 3 * max(dataset.day_bytes.values())  # Room for three days
+    dataset.get('2025-01-05', '2025-01-05', loader)
+    dataset.get('2025-01-01', '2025-01-01', loader)  # 2025-01-02 is now the least recently used
+    dataset.get('2025-01-06', '2025-01-06', loader)
+    assert sorted(day.day for day in dataset.days) == [1, 5, 6]
+
+    # The days of the current request stay even when they alone are over the limit
+    dataset.get('2025-01-10', '2025-01-13', loader)
+    assert sorted(day.day for day in dataset.days) == [10, 11, 12, 13]
+    assert dataset.covers('2025-01-10', '2025-01-13')
@@ -0,0 +1,30 @@
+# Bar-click drill-down lookups (drilldown.py) against masking the loaded frame on every click
+import pandas as pd
+
+from drilldown import DrillDownIndex
+from file_catalog import FileCatalog
+from FileHandler import merge_and_clean
+from metrics import summarize
+from synthetic_logs import generate_parts_logs
+
+
+def test_lookups_match_masking_the_frame(tmp_path):
+    folders = generate_parts_logs(str(tmp_path / "logs"), machines=2, days=2, parts=15, programs=3, rows_per_file=60)
+    catalog = FileCatalog()
+    catalog.refresh(folders)
+    data = merge_and_clean(catalog.select(pd.Timestamp('2025-01-01'), pd.Timestamp('2025-01-02')))
+    index = DrillDownIndex(data)
+
+    pairs = data[['Parts Name', 'Machine Name']].drop_duplicates().itertuples(index=False)
+    for part_name, machine_name in list(pairs) + [('MISSING', 'NXT01')]:
+        pair = data[(data['Parts Name'] == part_name) & (data['Machine Name'] == machine_name)]
+        # create_second_chart without an index
+        expected = summarize(pair[pair['Consumption'] > 0], ['Program Name'])
+        expected = expected.sort_values(by='Total Errors', ascending=False).head(20)
+        pd.testing.assert_frame_equal(index.program_errors(part_name, machine_name), expected, check_dtype=False,
+                                      check_categorical=False)
+        # show_program_details without an index, rows without consumption included
+        for program_name in data['Program Name'].cat.categories:
+            pd.testing.assert_frame_equal(index.rows(part_name, machine_name, program_name),
+                                          pair[pair['Program Name'] == program_name])
+        pd.testing.assert_frame_equal(index.rows(part_name, machine_name), pair)
@@ -0,0 +1,38 @@
+# File catalog (file_catalog.FileCatalog): shares that answer slowly
+import os
+import time
+
+import file_catalog
+from file_catalog import FileCatalog
+from conftest import HEADER, PREAMBLE
+
+
+def test_share_slower_than_the_timeout_becomes_selectable(tmp_path, monkeypatch):
+    share = tmp_path / "NXT01"
+    share.mkdir()
+    for day in ('20250101', '20250102'):
+        (share / f"PartsLog_PA_{day}080000.csv").write_text(PREAMBLE + HEADER)
+    folders = [(str(share), 'NXT01')]
+    scandir = os.scandir
+
+    def slow_scandir(path):
+        time.sleep(0.3)
+        return scandir(path)
+
+    monkeypatch.setattr(file_catalog.os, 'scandir', slow_scandir)
+    catalog = FileCatalog()
+    catalog.refresh(folders, timeout=0.1)
+    assert catalog.share_status[str(share)]['status'] == 'unreachable'
+    assert catalog.select() == []
+
+    # The listing finishes after the refresh gave up on it; the next refresh uses it
+    time.sleep(0.5)
+    catalog.refresh(folders, timeout=0.1)
+    assert catalog.share_status[str(share)]['status'] != 'unreachable'
+    assert len(catalog.select()) == 2
+    assert catalog.changed_dates == {'20250101', '20250102'}
+
+    # Unchanged directories are not listed again, so later refreshes stay within the timeout
+    catalog.refresh(folders, timeout=0.1)
+    assert catalog.share_status[str(share)]['status'] != 'unreachable'
+    assert len(catalog.select()) == 2
@@ -0,0 +1,206 @@
+# Ingest (FileHandler.merge_and_clean, rollup.stream_rollups): files that yield no rows, worker processes
+import os
+import time
+
+import pandas as pd
+
+import FileHandler
+import main
+from dataset_cache import SessionDataset
+from file_catalog import FileCatalog
+from query import ValueFilter
+import rollup as rollup_module
+from FileHandler import merge_and_clean, SETTLED_SECONDS
+from parse_cache import ParseCache
+from rollup import stream_rollups
+from conftest import HEADER, PREAMBLE
+
+
+def write_log(folder, name, text, settled=True):
+    path = os.path.join(folder, name)
+    with open(path, 'w', newline='') as f:
+        f.write(text)
+    if settled:
+        mtime = time.time() - 2 * SETTLED_SECONDS
+        os.utime(path, (mtime, mtime))
+    return path
+
+
+def test_files_without_rows_do_not_abort_the_load(tmp_path):
+    logs = tmp_path / "logs"
+    logs.mkdir()
+    good = write_log(logs, "PartsLog_PA_20250101000000.csv", PREAMBLE + HEADER + "P1,F0,10,1,0,0,0,0\n")
+    empty = write_log(logs, "PartsLog_PA_20250102000000.csv", "")
+    preamble_only = write_log(logs, "PartsLog_PA_20250103000000.csv", PREAMBLE)
+    files = [(path, 'M0') for path in (good, empty, preamble_only)]
+
+    cache = ParseCache(str(tmp_path / "cache"))
+    data = merge_and_clean(files, cache)
+    assert len(data) == 1
+    statuses = {record['path']: record['status'] for record in cache.ingest_outcomes()}
+    assert statuses == {empty: 'empty', preamble_only: 'empty'}
+
+    rollup = stream_rollups(files, ParseCache(str(tmp_path / "stream_cache")))
+    assert int(rollup['Rows'].sum()) == 1
+
+
+def test_small_loads_are_parsed_without_worker_processes(tmp_path, monkeypatch):
+    rows = "".join(f"P{i % 7},F{i % 3},{i},1,0,0,0,0\n" for i in range(20_000))
+    files = [(write_log(tmp_path, f"PartsLog_PA_2025010{day}000000.csv", PREAMBLE + HEADER + rows), 'M0')
+             for day in range(1, 4)]
+    serial = merge_and_clean(files)
+    serial_rollup = stream_rollups(files)
+
+    def no_pool(*args, **kwargs):
+        raise AssertionError("process pool started for a small load")
+
+    monkeypatch.setattr(FileHandler, 'ProcessPoolExecutor', no_pool)
+    monkeypatch.setattr(rollup_module, 'ProcessPoolExecutor', no_pool)
+    pd.testing.assert_frame_equal(merge_and_clean(files, workers=2), serial)
+    pd.testing.assert_frame_equal(stream_rollups(files, workers=2), serial_rollup)
+
+    # Past the thresholds the same files go to the pool, with the same result
+    monkeypatch.undo()
+    monkeypatch.setattr(FileHandler, 'PARALLEL_MIN_FILE_BYTES', 1)
+    monkeypatch.setattr(FileHandler, 'PARALLEL_MIN_BYTES', 1)
+    monkeypatch.setattr(rollup_module, 'PARALLEL_MIN_BYTES', 1)
+    pd.testing.assert_frame_equal(merge_and_clean(files, workers=2), serial)
+    pd.testing.assert_frame_equal(stream_rollups(files, workers=2), serial_rollup)
+
+
+def test_usecols_applies_to_cached_files(tmp_path):
+    path = write_log(tmp_path, "PartsLog_PA_20250101000000.csv", PREAMBLE + HEADER + "P1,F0,10,1,0,0,0,0\n")
+    cache = ParseCache(str(tmp_path / "cache"))
+    usecols = ['Parts Name', 'Consumption']
+    parsed = merge_and_clean([(path, 'M0')], cache, usecols=usecols)
+    cache.save()
+    timings = {}
+    cached = merge_and_clean([(path, 'M0')], cache, usecols=usecols, timings=timings)
+    assert timings['cached_files'] == 1
+    expected = merge_and_clean([(path, 'M0')], usecols=usecols)
+    assert set(expected.columns) == {'Program Name', 'Parts Name', 'Consumption', 'Machine Name', 'File Name', 'Date'}
+    pd.testing.assert_frame_equal(parsed, expected)
+    pd.testing.assert_frame_equal(cached, expected)
+    # The cache still holds every column for loads with other usecols
+    assert 'Feeder ID' in merge_and_clean([(path, 'M0')], cache).columns
+
+
+def test_benchmark_reports_whether_the_pool_was_used(tmp_path):
+    files = [(write_log(tmp_path, f"PartsLog_PA_2025010{day}000000.csv",
+                        PREAMBLE + HEADER + "P1,F0,10,1,0,0,0,0\n"), 'M0') for day in range(1, 3)]
+    serial, = FileHandler.benchmark_workers(files, [2])
+    assert serial['pool_files'] == 0  # Far below PARALLEL_MIN_BYTES
+    pooled, = FileHandler.benchmark_workers(files, [2], force_pool=True)
+    assert pooled['pool_files'] == 2
+
+
+def test_files_that_cannot_be_opened_do_not_abort_the_load(tmp_path):
+    good = write_log(tmp_path, "PartsLog_PA_20250101000000.csv", PREAMBLE + HEADER + "P1,F0,10,1,0,0,0,0\n")
+    gone = os.path.join(tmp_path, "PartsLog_PA_20250102000000.csv")
+    files = [(good, 'M0'), (gone, 'M0')]
+
+    cache = ParseCache(str(tmp_path / "cache"))
+    rollup = stream_rollups(files, cache)
+    assert int(rollup['Rows'].sum()) == 1
+    assert not cache.is_quarantined(gone, 'M0')
+    assert len(merge_and_clean(files)) == 1
+
+
+def test_wrong_header_is_quarantined_when_streaming(tmp_path):
+    wrong = write_log(tmp_path, "PartsLog_PA_20250101000000.csv",
+                      PREAMBLE + "Parts Name,Feeder ID,Consumption\n" + "P1,F0,10\n")
+    files = [(wrong, 'M0')]
+
+    cache = ParseCache(str(tmp_path / "cache"))
+    assert merge_and_clean(files, cache).empty
+    stream_cache = ParseCache(str(tmp_path / "stream_cache"))
+    assert stream_rollups(files, stream_cache).empty
+    for parse_cache in (cache, stream_cache):
+        assert [record['status'] for record in parse_cache.ingest_outcomes()] == ['quarantined']
+        assert parse_cache.is_quarantined(wrong, 'M0')
+    assert stream_cache.get_rollup(wrong, 'M0') is None
+
+
+def test_outcomes_are_kept_while_their_share_is_offline(tmp_path):
+    share = tmp_path / "share"
+    share.mkdir()
+    empty = write_log(share, "PartsLog_PA_20250101000000.csv", "")
+    folders = [(str(share), 'M0')]
+    catalog = FileCatalog()
+    catalog.refresh(folders)
+    cache = ParseCache(str(tmp_path / "cache"))
+    merge_and_clean(catalog.select(), cache)
+    assert [record['path'] for record in cache.ingest_outcomes(catalog)] == [empty]
+
+    share.rename(tmp_path / "offline")
+    catalog.refresh(folders, timeout=0.2)
+    assert catalog.share_status[str(share)]['status'] == 'unreachable'
+    assert [record['path'] for record in cache.ingest_outcomes(catalog)] == [empty]
+
+    (tmp_path / "offline").rename(share)
+    os.remove(empty)
+    catalog.refresh(folders)
+    assert cache.ingest_outcomes(catalog) == []
+
+
+def test_cache_entries_survive_a_share_outage(tmp_path):
+    path = write_log(tmp_path, "PartsLog_PA_20250101000000.csv", PREAMBLE + HEADER + "P1,F0,10,1,0,0,0,0\n")
+    cache = ParseCache(str(tmp_path / "cache"))
+    merge_and_clean([(path, 'M0')], cache)
+
+    os.rename(path, path + ".offline")
+    assert cache.get(path, 'M0') is None
+    os.rename(path + ".offline", path)
+    assert len(cache.get(path, 'M0')) == 1
+
+
+def test_cache_files_are_written_after_the_load(tmp_path):
+    path = write_log(tmp_path, "PartsLog_PA_20250101000000.csv", PREAMBLE + HEADER + "P1,F0,10,1,0,0,0,0\n")
+    cache = ParseCache(str(tmp_path / "cache"))
+    merge_and_clean([(path, 'M0')], cache)
+    # Part names are available while the file is still being written to the cache
+    assert cache.part_names(path, 'M0') == ['P1']
+    assert cache.parsed_length(path, 'M0') == os.path.getsize(path)
+
+    cache.flush()
+    reopened = ParseCache(str(tmp_path / "cache"))
+    assert len(reopened.get(path, 'M0')) == 1
+    assert int(reopened.get_rollup(path, 'M0')['Rows'].sum()) == 1
+
+
+def test_over_long_first_data_line_is_skipped(tmp_path):
+    rows = "P2,F0,20,2,0,0,0,0\nP3,F0,30,3,0,0,0,0\n"
+    whole = write_log(tmp_path, "PartsLog_PA_20250101000000.csv",
+                      PREAMBLE + HEADER + "P1,F0,10,1,0,0,0,0,,ERR\n" + rows)
+    cache = ParseCache(str(tmp_path / "cache"))
+    data = merge_and_clean([(whole, 'M0')], cache)
+    assert data['Parts Name'].tolist() == ['P2', 'P3']
+    assert data['Consumption'].tolist() == [20, 30]
+    assert [(record['status'], record['bad_lines']) for record in cache.ingest_outcomes()] == [('bad_lines', 1)]
+
+    # Lines appended to a file still being written are parsed with the header's column names
+    growing = write_log(tmp_path, "PartsLog_PA_20250102000000.csv", PREAMBLE + HEADER + "P1,F0,10,1,0,0,0,0\n",
+                        settled=False)
+    assert len(merge_and_clean([(growing, 'M0')], cache)) == 1
+    with open(growing, 'a', newline='') as f:
+        f.write("P9,F9,90,9,9,9,9,9,,ERR\n" + rows)
+    data = merge_and_clean([(growing, 'M0')], cache)
+    assert data['Parts Name'].tolist() == ['P1', 'P2', 'P3']
+    assert data['Consumption'].tolist() == [10, 20, 30]
+
+
+def test_range_without_usable_rows_loads_as_no_rows(tmp_path):
+    share = tmp_path / "share"
+    share.mkdir()
+    write_log(share, "PartsLog_PA_20250101000000.csv", PREAMBLE + "Parts Name,Feeder ID\n" + "P1,F0\n")
+    folders = [(str(share), 'M0')]
+    catalog = FileCatalog()
+    catalog.refresh(folders)
+    cache = ParseCache(str(tmp_path / "cache"))
+    day = pd.Timestamp('2025-01-01')
+
+    data = merge_and_clean(catalog.select(), cache)
+    assert data.empty and 'Date' in data.columns and 'Consumption' in data.columns
+    # The filtered load and the session cache both filter the result on Date
+    assert main.load_data(folders, day, day, cache, catalog, machine_filter=ValueFilter('M0')).empty
+    assert SessionDataset().get(day, day, lambda start, end: main.load_data(folders, start, end, cache, catalog)).empty
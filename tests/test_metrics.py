@@ -0,0 +1,88 @@
+# Metrics engine (metrics.py) against the per-row formulas the charts used before it
+import numpy as np
+import pandas as pd
+
+from metrics import add_rates, daily_pickup, top_components
+
+COUNTERS = ['Consumption', 'Pick Error Counter', 'Vision Error Counter', 'Nozzle Error Counter',
+            'Coplanarity Error Counter', 'No Parts Error Counter']
+
+
+def sample_rows():
+    rng = np.random.default_rng(0)
+    rows = 400
+    data = pd.DataFrame({
+        'Date': pd.to_datetime('2025-01-01') + pd.to_timedelta(rng.integers(0, 4, rows), unit='D'),
+        'Machine Name': rng.choice(['NXT01', 'NXT02', 'NXT03'], rows),
+        'Parts Name': rng.choice([f"P{i}" for i in range(12)], rows),
+    })
+    # Rows without consumption still carry errors: the charts count them in Total Errors but not in the rates
+    data['Consumption'] = rng.choice([0, 0, 5, 50, 500], rows)
+    for col in COUNTERS[1:]:
+        data[col] = rng.integers(0, 6, rows)
+    data['Pick Error Counter'] += data['No Parts Error Counter']
+    return data
+
+
+def baseline_top(data):
+    data = data.copy()
+    data['Pick Error Counter'] = data['Pick Error Counter'] - data['No Parts Error Counter']
+    data['Total Errors'] = data[['Pick Error Counter', 'Vision Error Counter', 'Nozzle Error Counter',
+                                 'Coplanarity Error Counter']].sum(axis=1)
+    totals = data.groupby(['Parts Name', 'Machine Name'])['Total Errors'].sum()
+    consumed = data[data['Consumption'] > 0].groupby(['Parts Name', 'Machine Name'])[
+        ['Total Errors', 'Consumption']].sum()
+    good_rate = (100 - consumed['Total Errors'] / consumed['Consumption'] * 100).reindex(totals.index, fill_value=100.0)
+    return pd.DataFrame({'Total Errors': totals, 'Good Rate': good_rate}).reset_index()
+
+
+def baseline_daily(data):
+    data = data[data['Consumption'] > 0].copy()
+    data['Total Errors'] = (data['Pick Error Counter'] + data['Vision Error Counter'] +
+                            data['Coplanarity Error Counter'] - data['No Parts Error Counter'])
+    data['Valid Consumption'] = data['Consumption'] - data['No Parts Error Counter']
+    by_machine = data.groupby(['Date', 'Machine Name'])['Total Errors'].sum().unstack(fill_value=0)
+    daily = data.groupby('Date')[COUNTERS + ['Total Errors', 'Valid Consumption']].sum().reset_index()
+    daily['Pickup Rate'] = 100 - (daily['Total Errors'] / daily['Valid Consumption'] * 100)
+    return by_machine, daily
+
+
+def test_top_components_match_the_per_row_formulas():
+    data = sample_rows()
+    keys = ['Parts Name', 'Machine Name']
+    top = top_components(data, n=len(data)).sort_values(keys).reset_index(drop=True)
+    expected = baseline_top(data).sort_values(keys).reset_index(drop=True)
+    pd.testing.assert_frame_equal(top[keys + ['Total Errors', 'Good Rate']], expected, check_dtype=False)
+    # The top N are the pairs with the most Total Errors
+    assert top_components(data, n=5)['Total Errors'].tolist() == \
+        sorted(expected['Total Errors'], reverse=True)[:5]
+
+
+def test_daily_pickup_matches_the_per_row_formulas():
+    data = sample_rows()
+    data = data[data['Parts Name'] == 'P3']
+    by_machine, daily = daily_pickup(data)
+    expected_by_machine, expected_daily = baseline_daily(data)
+    pd.testing.assert_frame_equal(by_machine, expected_by_machine, check_dtype=False, check_names=False)
+    pd.testing.assert_series_equal(daily['Pickup Errors'], expected_daily['Total Errors'],
+                                   check_dtype=False, check_names=False)
+    for col in ['Date', 'Valid Consumption', 'Pickup Rate']:
+        pd.testing.assert_series_equal(daily[col], expected_daily[col], check_dtype=False)
+    # The data passed in is not modified
+    assert 'Total Errors' not in data.columns
+
+
+def test_sums_of_compact_counters_are_widened():
+    # Two int32 counters whose total is past the int32 range
+    big = np.iinfo(np.int32).max - 10
+    sums = pd.DataFrame({col: np.array([0], dtype='int32') for col in COUNTERS})
+    sums['Consumption'] = np.array([big], dtype='int32')
+    sums['Pick Error Counter'] = np.array([big], dtype='int32')
+    sums['Vision Error Counter'] = np.array([big], dtype='int32')
+    result = add_rates(sums)
+    assert result['Total Errors'].dtype == 'int64'
+    assert result['Total Errors'].iloc[0] == 2 * big
+    assert result['Pickup Errors'].iloc[0] == 2 * big
+    assert result['Valid Consumption'].iloc[0] == big
+    # The sums passed in keep their dtype
+    assert sums['Consumption'].dtype == 'int32'
@@ -0,0 +1,71 @@
+# GUI filters (query.py) pushed down to the file catalog and applied to rows
+import pandas as pd
+
+from file_catalog import FileCatalog
+from query import ValueFilter, filter_rows, parse_filter, select_files
+from conftest import HEADER, PREAMBLE
+
+
+def make_catalog(tmp_path):
+    # Machines NXT01, NXT02, SMT01 with programs TOP_A and BOT_A on 2025-01-01 and 2025-01-02
+    folders = []
+    for machine in ('NXT01', 'NXT02', 'SMT01'):
+        folder = tmp_path / machine
+        folder.mkdir()
+        for program in ('TOP_A', 'BOT_A'):
+            for day in ('20250101', '20250102'):
+                (folder / f"PartsLog_{program}_{day}080000.csv").write_text(PREAMBLE + HEADER)
+        folders.append((str(folder), machine))
+    catalog = FileCatalog()
+    catalog.refresh(folders)
+    return catalog
+
+
+def selected(catalog, *args):
+    return sorted((machine, catalog.files[path]['program'], catalog.files[path]['date'])
+                  for path, machine in select_files(catalog, *args))
+
+
+def test_value_filter_terms():
+    value_filter = ValueFilter(" NXT0* ; SMT01,, ")
+    assert value_filter.names == {'SMT01'}
+    assert value_filter.resolve(['NXT01', 'NXT02', 'SMT01', 'SMT02', 'XNXT01']) == {'NXT01', 'NXT02', 'SMT01'}
+    assert ValueFilter('NXT0[2-3]').resolve(['NXT01', 'NXT02', 'NXT03']) == {'NXT02', 'NXT03'}
+    assert parse_filter('  ') is None
+    assert parse_filter(None) is None
+
+
+def test_select_files(tmp_path):
+    catalog = make_catalog(tmp_path)
+    assert len(select_files(catalog)) == 12
+    # Wildcard
+    assert {machine for machine, _, _ in selected(catalog, None, None, ValueFilter('NXT*'))} == {'NXT01', 'NXT02'}
+    # Several values, machine and program together, date range
+    assert selected(catalog, pd.Timestamp('2025-01-02'), pd.Timestamp('2025-01-02'),
+                    ValueFilter('NXT02, SMT01'), ValueFilter('TOP_?')) == \
+        [('NXT02', 'TOP_A', '20250102'), ('SMT01', 'TOP_A', '20250102')]
+    # Nothing matches: no files, not all of them
+    assert select_files(catalog, None, None, ValueFilter('NXT99')) == []
+    assert select_files(catalog, None, None, None, ValueFilter('MID_*')) == []
+
+
+def test_catalog_select(tmp_path):
+    catalog = make_catalog(tmp_path)
+    assert len(catalog.select(machines={'NXT01', 'SMT01'})) == 8
+    assert len(catalog.select(programs={'BOT_A'})) == 6
+    assert catalog.select(machines=set()) == []
+    assert catalog.select(machines={'UNKNOWN'}) == []
+    # Files keep the catalog's folder order
+    paths = [path for path, _ in catalog.select(pd.Timestamp('2025-01-01'), pd.Timestamp('2025-01-01'))]
+    assert paths == [path for path in catalog.order if catalog.files[path]['date'] == '20250101']
+
+
+def test_filter_rows():
+    data = pd.DataFrame({'Machine Name': pd.Categorical(['NXT01', 'NXT02', 'SMT01', 'NXT01']),
+                         'Program Name': ['TOP_A', 'BOT_A', 'TOP_A', 'BOT_A'],
+                         'Consumption': [1, 2, 3, 4]})
+    assert filter_rows(data, ValueFilter('NXT*'))['Consumption'].tolist() == [1, 2, 4]
+    assert filter_rows(data, ValueFilter('NXT01,SMT01'), ValueFilter('TOP*'))['Consumption'].tolist() == [1, 3]
+    assert filter_rows(data, ValueFilter('NXT99')).empty
+    assert filter_rows(data)['Consumption'].tolist() == [1, 2, 3, 4]
+    assert filter_rows(data.iloc[:0], ValueFilter('NXT*')).empty
@@ -0,0 +1,65 @@
+# Streamed rollups (rollup.stream_rollups) must equal the rollup of the fully loaded rows
+import os
+import time
+
+import pandas as pd
+
+from FileHandler import merge_and_clean, SETTLED_SECONDS
+from rollup import build_rollup, stream_rollups, ROLLUP_KEYS
+from file_catalog import FileCatalog
+from synthetic_logs import generate_parts_logs
+from conftest import HEADER, PREAMBLE
+
+
+def sorted_rollup(rollup):
+    rollup = rollup.astype({col: str for col in ROLLUP_KEYS if col != 'Date'})
+    return rollup.sort_values(ROLLUP_KEYS + ['Consumption']).reset_index(drop=True)
+
+
+def test_bad_line_on_chunk_boundary(tmp_path):
+    lines = [f"P{i % 3},F{i},{10 + i},{i % 2},0,0,0,0\n" for i in range(12)]
+    # Over-long lines as the first line of the second and third chunk (chunksize 4), and one inside a chunk
+    lines.insert(4, "P9,F9,1000,9,9,9,9,9,7,7\n")
+    lines.insert(9, "P9,F9,2000,9,9,9,9,9,7,7\n")
+    lines.insert(11, "P9,F9,3000,9,9,9,9,9,7\n")
+    path = tmp_path / "PartsLog_PA_20250101000000.csv"
+    path.write_text(PREAMBLE + HEADER + ''.join(lines))
+    mtime = time.time() - 2 * SETTLED_SECONDS
+    os.utime(path, (mtime, mtime))
+    files = [(str(path), 'M0')]
+
+    expected = build_rollup(merge_and_clean(files))
+    timings = {}
+    streamed = stream_rollups(files, chunksize=4, timings=timings)
+    assert int(streamed['Rows'].sum()) == 12
+    assert int(streamed['Consumption'].sum()) == sum(10 + i for i in range(12))
+    pd.testing.assert_frame_equal(sorted_rollup(streamed), sorted_rollup(expected),
+                                  check_dtype=False, check_categorical=False)
+    assert timings['bad_line_files'] == 1
+
+
+def test_bad_first_data_line(tmp_path):
+    path = tmp_path / "PartsLog_PA_20250101000000.csv"
+    path.write_text(PREAMBLE + HEADER + "P9,F9,1000,9,9,9,9,9,,ERR\n" +
+                    ''.join(f"P{i % 3},F{i},{10 + i},{i % 2},0,0,0,0\n" for i in range(6)))
+    mtime = time.time() - 2 * SETTLED_SECONDS
+    os.utime(path, (mtime, mtime))
+    files = [(str(path), 'M0')]
+
+    expected = build_rollup(merge_and_clean(files))
+    assert int(expected['Rows'].sum()) == 6
+    for chunksize in (4, 100):
+        streamed = stream_rollups(files, chunksize=chunksize)
+        pd.testing.assert_frame_equal(sorted_rollup(streamed), sorted_rollup(expected),
+                                      check_dtype=False, check_categorical=False)
+
+
+def test_generated_logs_with_bad_lines(tmp_path):
+    folders = generate_parts_logs(str(tmp_path), machines=2, days=3, parts=50, programs=2, rows_per_file=200,
+                                  bad_line_rate=0.02)
+    catalog = FileCatalog()
+    catalog.refresh(folders)
+    files = catalog.select()
+    expected = build_rollup(merge_and_clean(files))
+    pd.testing.assert_frame_equal(sorted_rollup(stream_rollups(files)), sorted_rollup(expected),
+                                  check_dtype=False, check_categorical=False)
@@ -0,0 +1,54 @@
+# Compact in-memory schema (schema.py)
+import numpy as np
+import pandas as pd
+
+from schema import INT32_MAX, apply_schema, concat_frames, memory_report
+
+
+def sample_rows(rows=300):
+    return pd.DataFrame({
+        'Parts Name': [f"P{i % 7}" for i in range(rows)],
+        'Machine Name': ['NXT01', 'NXT02'] * (rows // 2),
+        'Feeder Serial': [f"S{i}" for i in range(rows)],  # Not a known repeated column: stays as read
+        'Consumption': np.arange(rows, dtype='int64'),
+        'Pick Error Counter': np.full(rows, INT32_MAX + 1, dtype='int64'),
+        'Ratio': np.linspace(0, 1, rows),
+        'Date': pd.Timestamp('2025-01-01'),
+    })
+
+
+def test_apply_schema_compacts_and_keeps_the_values():
+    data = sample_rows()
+    compact = apply_schema(data)
+    assert isinstance(compact['Parts Name'].dtype, pd.CategoricalDtype)
+    assert isinstance(compact['Machine Name'].dtype, pd.CategoricalDtype)
+    assert compact['Feeder Serial'].dtype == object
+    assert compact['Consumption'].dtype == 'int32'
+    assert compact['Pick Error Counter'].dtype == 'int64'  # Would not fit in 32 bits
+    assert compact['Ratio'].dtype == 'float32'
+    assert compact['Date'].dtype == data['Date'].dtype
+    pd.testing.assert_frame_equal(compact, data, check_dtype=False, check_categorical=False, atol=1e-6)
+    # Applying it again changes nothing
+    pd.testing.assert_frame_equal(apply_schema(compact), compact)
+
+
+def test_concat_frames_keeps_categoricals_with_different_categories():
+    first = apply_schema(pd.DataFrame({'Parts Name': ['R1', 'R2'], 'Consumption': [1, 2]}))
+    second = apply_schema(pd.DataFrame({'Parts Name': ['C1', 'R2'], 'Consumption': [3, 4]}))
+    combined = concat_frames([first, second])
+    assert isinstance(combined['Parts Name'].dtype, pd.CategoricalDtype)
+    assert set(combined['Parts Name'].cat.categories) == {'R1', 'R2', 'C1'}
+    assert combined['Parts Name'].tolist() == ['R1', 'R2', 'C1', 'R2']
+    assert combined['Consumption'].tolist() == [1, 2, 3, 4]
+    assert concat_frames([]).empty
+
+
+def test_memory_report_compares_both_layouts():
+    data = sample_rows()
+    report = memory_report(data)
+    assert report['rows'] == len(data)
+    assert report['bytes_after'] < report['bytes_before']
+    assert report['bytes_per_row_before'] == report['bytes_before'] / len(data)
+    assert report['bytes_after'] == apply_schema(data).memory_usage(deep=True).sum()
+    # The report is the same whether the frame was already compact or not
+    assert memory_report(apply_schema(data))['bytes_before'] == report['bytes_before']
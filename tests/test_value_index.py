@@ -0,0 +1,45 @@
+# As-you-type suggestions and the part check before a load (value_index.py)
+from file_catalog import FileCatalog
+from value_index import SortedValues, ValueIndex
+from conftest import HEADER, PREAMBLE
+
+
+class PartNames:
+    # Stands in for the parse cache: part names of the files that were parsed, None for the others
+    def __init__(self, names):
+        self.names = names
+
+    def part_names(self, path, machine_name):
+        return self.names.get(path)
+
+
+def test_prefix_matches_come_before_substring_matches():
+    values = SortedValues(['R0402-10K', 'c0603-100n', 'C0402-1u', 'XR0402', 'LED-R0402'])
+    assert values.suggest('r0402') == ['R0402-10K', 'LED-R0402', 'XR0402']
+    assert values.suggest('C06') == ['c0603-100n']
+    assert values.suggest(' 0402 ', limit=2) == ['C0402-1u', 'LED-R0402']
+    assert values.suggest('') == ['C0402-1u', 'c0603-100n', 'LED-R0402', 'R0402-10K', 'XR0402']
+    assert values.suggest('missing') == []
+    assert 'XR0402' in values and 'xr0402' not in values
+
+
+def test_parts_are_not_rejected_while_a_day_is_incomplete(tmp_path):
+    folder = tmp_path / "NXT01"
+    folder.mkdir()
+    first = folder / "PartsLog_TOP_20250101080000.csv"
+    second = folder / "PartsLog_TOP_20250101120000.csv"
+    for path in (first, second):
+        path.write_text(PREAMBLE + HEADER)
+    catalog = FileCatalog()
+    catalog.refresh([(str(folder), 'NXT01')])
+
+    index = ValueIndex()
+    index.refresh(catalog, PartNames({str(first): {'R0402'}}))
+    assert index.has_part('R0402', ['20250101']) is True
+    assert index.has_part('C0603', ['20250101']) is None  # Could be in the file not read yet
+    assert index.suggest('Machine Name', 'nxt') == ['NXT01']
+
+    index.refresh(catalog, PartNames({str(first): {'R0402'}, str(second): {'C0805'}}))
+    assert index.has_part('C0603', ['20250101']) is False
+    assert index.has_part('C0805', ['20250101', '20250102']) is True
+    assert index.suggest('Parts Name', '0') == ['C0805', 'R0402']
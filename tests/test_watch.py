@@ -0,0 +1,30 @@
+# Live watch (watch.LogWatcher): days changed outside the followed files must still be reported
+from datetime import datetime
+
+from file_catalog import FileCatalog
+from FileHandler import merge_and_clean
+from query import ValueFilter, select_files
+from watch import LogWatcher
+from conftest import HEADER, PREAMBLE
+
+
+def test_growth_of_unfollowed_files_is_reported(tmp_path):
+    today = datetime.now().strftime('%Y%m%d')
+    folders = []
+    for machine in ('A', 'B'):
+        folder = tmp_path / machine
+        folder.mkdir()
+        (folder / f"PartsLog_PA_{today}000000.csv").write_text(PREAMBLE + HEADER + "P1,F0,10,1,0,0,0,0\n")
+        folders.append((str(folder), machine))
+    catalog = FileCatalog()
+    catalog.refresh(folders)
+    machine_filter = ValueFilter('A')
+    start = datetime.strptime(today, '%Y%m%d')
+    data = merge_and_clean(select_files(catalog, start, None, machine_filter))
+    watcher = LogWatcher(folders, catalog, data, start, machine_filter=machine_filter)
+
+    with open(tmp_path / 'B' / f"PartsLog_PA_{today}000000.csv", 'a') as f:
+        f.write("P2,F1,20,2,0,0,0,0\n")
+    new_rows, changed_dates = watcher.poll()
+    assert new_rows.empty
+    assert changed_dates == {today}
@@ -0,0 +1,162 @@
+# value_index.py
+# Distinct Parts Name / Machine Name / Program Name values for as-you-type suggestions and for
+# checking the filters before anything is loaded. Machine and program names come from the file
+# catalog. Part names are only known once a file has been parsed, so they are collected per day
+# from the rollups in the parse cache and kept in PartLogCache/values.json.
+import bisect
+import json
+import os
+from itertools import accumulate
+
+VALUES_VERSION = 1
+MAX_SUGGESTIONS = 20
+
+
+class SortedValues:
+    # Case-insensitive prefix and substring lookups over a fixed set of strings
+    def __init__(self, values):
+        pairs = sorted({(str(value).lower(), str(value)) for value in values})
+        self.keys = [key for key, _ in pairs]
+        self.values = [value for _, value in pairs]
+        self.known = set(self.values)
+        # All keys in one string, so a substring search is a few str.find calls instead of a loop over every value
+        self.text = '\n'.join(self.keys)
+        self.starts = list(accumulate((len(key) + 1 for key in self.keys[:-1]), initial=0))
+
+    def __len__(self):
+        return len(self.values)
+
+    def __contains__(self, value):
+        return value in self.known
+
+    def suggest(self, text, limit=MAX_SUGGESTIONS):
+        # Values starting with `text` first (in sorted order), then the ones containing it
+        needle = text.strip().lower()
+        if not needle:
+            return self.values[:limit]
+        if '\n' in needle:
+            return []
+        result = []
+        i = bisect.bisect_left(self.keys, needle)
+        while i < len(self.keys) and len(result) < limit and self.keys[i].startswith(needle):
+            result.append(self.values[i])
+            i += 1
+        position = self.text.find(needle)
+        while position >= 0 and len(result) < limit:
+            i = bisect.bisect_right(self.starts, position) - 1
+            if not self.keys[i].startswith(needle):
+                result.append(self.values[i])
+            position = self.text.find(needle, self.starts[i] + len(self.keys[i]) + 1)
+        return result
+
+
+def _signature(catalog, paths):
+    # Changes whenever a file of the day is added, removed, grows or is rewritten
+    infos = [catalog.files[path] for path in paths]
+    return f"{len(infos)}:{sum(info['size'] for info in infos)}:{max((info['mtime'] for info in infos), default=0)}"
+
+
+class ValueIndex:
+    def __init__(self, index_path=None):
+        self.index_path = index_path
+        # 'YYYYMMDD' -> {'signature', 'complete' (every file of the day was read), 'parts': set,
+        #                'learned': set of paths read so far while the day is not complete}
+        self.dates = {}
+        self.columns = {name: SortedValues([]) for name in ('Parts Name', 'Machine Name', 'Program Name')}
+        if index_path:
+            self._load()
+
+    def _load(self):
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return
+        if data.get('version') != VALUES_VERSION:
+            return
+        names = data.get('names', [])
+        for date_str, record in data.get('dates', {}).items():
+            self.dates[date_str] = {'signature': record['signature'], 'complete': record['complete'],
+                                    'parts': {names[i] for i in record['parts']},
+                                    'learned': set(record.get('learned', []))}
+        self.columns = dict(self.columns, **{'Machine Name': SortedValues(data.get('machines', [])),
+                                             'Program Name': SortedValues(data.get('programs', []))})
+        self._build_parts()
+
+    def save(self):
+        if not self.index_path:
+            return
+        # Part names are stored once and referenced by position from every day
+        names = sorted(self.columns['Parts Name'].values)
+        ids = {name: i for i, name in enumerate(names)}
+        dates = {}
+        for date_str, record in self.dates.items():
+            dates[date_str] = {'signature': record['signature'], 'complete': record['complete'],
+                               'parts': sorted(ids[name] for name in record['parts'])}
+            if not record['complete']:
+                dates[date_str]['learned'] = sorted(record['learned'])
+        os.makedirs(os.path.dirname(self.index_path) or '.', exist_ok=True)
+        tmp_path = self.index_path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'version': VALUES_VERSION, 'names': names, 'dates': dates,
+                       'machines': self.columns['Machine Name'].values,
+                       'programs': self.columns['Program Name'].values}, f)
+        os.replace(tmp_path, self.index_path)
+
+    def _build_parts(self):
+        parts = set()
+        for record in self.dates.values():
+            parts |= record['parts']
+        # Replaced as a whole: suggestions may be read from the Tk thread while a load refreshes the index
+        self.columns = dict(self.columns, **{'Parts Name': SortedValues(parts)})
+
+    def refresh(self, catalog, cache=None):
+        # Brings the index up to date with the catalog; part names of files in the parse cache that were
+        # not read yet are taken from their rollups
+        changed = False
+        for date_str, paths in catalog.by_date.items():
+            signature = _signature(catalog, paths)
+            record = self.dates.get(date_str)
+            if record is None or record['signature'] != signature:
+                record = {'signature': signature, 'complete': False, 'parts': set(), 'learned': set()}
+                self.dates[date_str] = record
+                changed = True
+            if record['complete'] or cache is None:
+                continue
+            for path in paths:
+                if path in record['learned']:
+                    continue
+                names = cache.part_names(path, catalog.files[path]['machine'])
+                if names is not None:
+                    record['parts'].update(names)
+                    record['learned'].add(path)
+                    changed = True
+            if len(record['learned']) == len(paths):
+                record['complete'], record['learned'] = True, set()
+                changed = True
+
+        for date_str in [date_str for date_str in self.dates if date_str not in catalog.by_date]:
+            del self.dates[date_str]
+            changed = True
+
+        machines = SortedValues(catalog.by_machine)
+        programs = SortedValues(catalog.by_program)
+        if machines.values != self.columns['Machine Name'].values or programs.values != self.columns['Program Name'].values:
+            changed = True
+        self.columns = dict(self.columns, **{'Machine Name': machines, 'Program Name': programs})
+        if changed:
+            self._build_parts()
+            self.save()
+
+    def suggest(self, column, text, limit=MAX_SUGGESTIONS):
+        return self.columns[column].suggest(text, limit)
+
+    def has_part(self, part_name, date_strs):
+        # True / False whether the part occurs on any of the days ('YYYYMMDD');
+        # None when it was not found but some of those days have files that were never read
+        date_strs = [date_str for date_str in date_strs if date_str in self.dates]
+        if any(part_name in self.dates[date_str]['parts'] for date_str in date_strs):
+            return True
+        if all(self.dates[date_str]['complete'] for date_str in date_strs):
+            return False
+        return None
@@ -0,0 +1,116 @@
+# watch.py
+# Live watch mode: polls the folders for PartsLog files that are new or have grown since the last
+# poll and parses only the lines added since then, so keeping the current day on screen does not
+# mean re-reading it every few minutes. New rows are folded into a running rollup (see rollup.py)
+# that the charts are redrawn from.
+import os
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+from FileHandler import read_parts_log_from
+from query import select_files
+from rollup import build_rollup, combine_rollups
+from schema import apply_schema, concat_frames
+
+# Only files of the newest day and the day before are checked for growth; older files are done
+ACTIVE_DAYS = 2
+
+
+def complete_length(path, size):
+    # Bytes of `path` up to and including its last newline
+    with open(path, 'rb') as f:
+        position = size
+        while position > 0:
+            start = max(0, position - 65536)
+            f.seek(start)
+            newline = f.read(position - start).rfind(b'\n')
+            if newline >= 0:
+                return start + newline + 1
+            position = start
+    return 0
+
+
+class LogWatcher:
+    # data: what is on screen now (raw rows or a rollup) for the files catalog.select(start_date, end_date)
+    # returns; end_date=None keeps following new days. row_filter(frame) applies the GUI filters to new rows;
+    # machine_filter / program_filter (query.ValueFilter) limit the files that are followed.
+    # cache: the ParseCache the data was loaded through; rows are followed from where that load stopped
+    # reading each file, so lines appended before watching started are not lost.
+    def __init__(self, folder_paths, catalog, data, start_date, end_date=None, row_filter=None,
+                 machine_filter=None, program_filter=None, cache=None):
+        self.folder_paths = folder_paths
+        self.catalog = catalog
+        self.start_date = start_date
+        self.end_date = end_date
+        self.row_filter = row_filter
+        self.machine_filter = machine_filter
+        self.program_filter = program_filter
+        self.rollup = data if 'Rows' in data.columns else apply_schema(build_rollup(data))
+        self.offsets = {}   # path -> bytes parsed so far (None: loaded before watching, not active)
+        self.columns = {}   # path -> CSV column names, for parsing appended lines
+        self.rewritten = set()
+
+        files = self._select()
+        active_from = self._active_from(files)
+        for path, machine_name in files:
+            self.offsets[path] = None
+            if catalog.files[path]['date'] >= active_from:
+                parsed = cache.parsed_length(path, machine_name) if cache is not None else None
+                try:
+                    # Files the load did not leave in the cache (e.g. streamed ones) are followed from now on
+                    self.offsets[path] = parsed if parsed is not None else complete_length(path, os.path.getsize(path))
+                except OSError:
+                    pass
+
+    def _select(self):
+        # Wildcard filters are resolved again on every poll, so matching new programs are picked up
+        return select_files(self.catalog, self.start_date, self.end_date, self.machine_filter, self.program_filter)
+
+    def _active_from(self, files):
+        if not files:
+            return ''
+        newest = max(self.catalog.files[path]['date'] for path, _ in files)
+        return (datetime.strptime(newest, '%Y%m%d') - timedelta(days=ACTIVE_DAYS - 1)).strftime('%Y%m%d')
+
+    def poll(self):
+        # Parses what was added since the last poll. Returns (new rows after row_filter, dates that changed);
+        # self.rollup then includes the new rows. Files that got shorter were replaced and are only
+        # reported in self.rewritten (a full reload is needed for them).
+        # The changed dates include every day the catalog refresh saw change, not only the followed files:
+        # the refresh resets catalog.changed_dates, so growth of files outside the view is reported here.
+        self.catalog.refresh(self.folder_paths)
+        files = self._select()
+        active_from = self._active_from(files)
+        frames, changed_dates = [], set()
+
+        for path, machine_name in files:
+            date_str = self.catalog.files[path]['date']
+            offset = self.offsets.get(path, 0)
+            if path in self.offsets and (offset is None or date_str < active_from):
+                continue
+            try:
+                size = os.path.getsize(path)
+            except OSError:
+                continue
+            if size < offset:
+                self.rewritten.add(path)
+                continue
+            if size == offset:
+                continue
+            try:
+                df, self.offsets[path], self.columns[path] = read_parts_log_from(
+                    path, machine_name, offset, self.columns.get(path))
+            except (OSError, pd.errors.ParserError) as e:
+                print(f"Error reading {path}: {e}")
+                continue
+            if df is not None and not df.empty:
+                frames.append(df)
+                changed_dates.add(date_str)
+
+        new_rows = concat_frames(frames)
+        if self.row_filter is not None and not new_rows.empty:
+            new_rows = self.row_filter(new_rows)
+        if not new_rows.empty:
+            self.rollup = apply_schema(combine_rollups([self.rollup, build_rollup(new_rows)]))
+        return new_rows, changed_dates | self.catalog.changed_dates